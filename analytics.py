@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""analytics.py
+Meta share, top-8/top-16 conversion and average placement per leader, base or
+archetype (leader + base).
+
+`ResultsTable.load` reads every row of `results` once, together with the deck's
+leader and base and the tournament's date and level, and keeps it as NumPy
+arrays of integer codes. Each report is then a boolean mask for the date and
+level filters plus a handful of `np.bincount` group-bys, so reports over the full
+history can be produced repeatedly without going back to the database.
+
+Results without a deck (see remove_unknown_decks.py) are reported as "Unknown".
+Usage
+-------
+    python analytics.py [--db swu_meta.db] [--by leader|base|archetype]
+                        [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD] [--level LEVEL ...]
+                        [--min-entries N] [--top N] [--csv report.csv]
+"""
+import argparse
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DB = "swu_meta.db"
+GROUPINGS = ("leader", "base", "archetype")
+UNKNOWN = "Unknown"
+
+RESULTS_QUERY = """
+    SELECT r.tournament_id, r.result, COALESCE(r.player_id, -1),
+           COALESCE(d.leader_id, -1), COALESCE(d.base_id, -1)
+      FROM results r
+      JOIN tournaments t ON t.tournament_id = r.tournament_id
+      LEFT JOIN decks d ON d.deck_id = r.deck_id
+"""
+
+class ResultsTable:
+    """Columnar copy of the results joined with decks and tournaments.
+
+    Every row is one player's finish in one tournament. Leaders, bases,
+    archetypes, players and levels are stored as dense integer codes into the
+    matching `*_names` arrays.
+    """
+    def __init__(self, placement, tournament, player, leader_ids, base_ids, tournament_dates, tournament_levels,
+                 leader_names, base_names):
+        self.placement = placement
+        self.player, _ = pd.factorize(player)
+        self.leader, leader_values = pd.factorize(leader_ids)
+        self.base, base_values = pd.factorize(base_ids)
+        self.archetype, archetype_values = pd.factorize(self.leader.astype(np.int64) * len(base_values) + self.base)
+
+        # Per-row tournament date and level, looked up through the tournament position
+        self.tournament = tournament
+        self.date = tournament_dates[tournament]
+        levels, level_names = pd.factorize(tournament_levels)
+        self.level = levels[tournament]
+        self.level_names = np.asarray(level_names, dtype=object)
+
+        self.leader_names = np.array([leader_names.get(value, UNKNOWN) for value in leader_values], dtype=object)
+        self.base_names = np.array([base_names.get(value, UNKNOWN) for value in base_values], dtype=object)
+        self.archetype_names = np.array(
+            [f"{self.leader_names[code // len(base_values)]} - {self.base_names[code % len(base_values)]}"
+             for code in archetype_values],
+            dtype=object,
+        )
+
+    def __len__(self):
+        return len(self.placement)
+
+    @classmethod
+    def load(cls, conn):
+        rows = np.array(conn.execute(RESULTS_QUERY).fetchall(), dtype=np.int64).reshape(-1, 5)
+        tournaments = conn.execute(
+            "SELECT tournament_id, date, COALESCE(level, '') FROM tournaments ORDER BY tournament_id;"
+        ).fetchall()
+        tournament_ids = np.array([row[0] for row in tournaments], dtype=np.int64)
+        dates = pd.to_datetime(pd.Series([row[1] for row in tournaments], dtype=object),
+                               format="%Y-%m-%d", errors="coerce").to_numpy(dtype="datetime64[D]")
+        levels = np.array([row[2] for row in tournaments], dtype=object)
+
+        # Tournament ids of the results become positions in the tournament arrays
+        position = np.searchsorted(tournament_ids, rows[:, 0])
+        leader_names = {leader_id: f"{name}, {subtitle}" if subtitle else name
+                        for leader_id, name, subtitle in conn.execute("SELECT leader_id, name, subtitle FROM leaders;")}
+        base_names = dict(conn.execute("SELECT base_id, name FROM bases;").fetchall())
+        return cls(
+            placement=rows[:, 1].astype(np.int32),
+            tournament=position,
+            player=rows[:, 2],
+            leader_ids=rows[:, 3],
+            base_ids=rows[:, 4],
+            tournament_dates=dates,
+            tournament_levels=levels,
+            leader_names=leader_names,
+            base_names=base_names,
+        )
+
+    def mask(self, start_date=None, end_date=None, levels=None):
+        """Return a boolean mask of the rows inside the date window and levels."""
+        mask = np.ones(len(self), dtype=bool)
+        if start_date:
+            mask &= self.date >= np.datetime64(start_date, "D")
+        if end_date:
+            mask &= self.date <= np.datetime64(end_date, "D")
+        if levels is not None:
+            wanted = np.isin(self.level_names, list(levels))
+            mask &= wanted[self.level]
+        return mask
+
+    def report(self, by="archetype", start_date=None, end_date=None, levels=None, min_entries=1):
+        """Meta share, top-8/top-16 conversion and average placement per group.
+
+        Sorted by number of entries, most played first.
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping {by!r}, expected one of {', '.join(GROUPINGS)}.")
+        codes = getattr(self, by)
+        names = getattr(self, f"{by}_names")
+        mask = self.mask(start_date, end_date, levels)
+        selected = codes[mask]
+        placement = self.placement[mask]
+
+        groups = len(names)
+        entries = np.bincount(selected, minlength=groups)
+        top8 = np.bincount(selected[placement <= 8], minlength=groups)
+        top16 = np.bincount(selected[placement <= 16], minlength=groups)
+        placement_sum = np.bincount(selected, weights=placement, minlength=groups)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            report = pd.DataFrame({
+                by: names,
+                "entries": entries,
+                "meta_share": entries / max(int(mask.sum()), 1),
+                "top8": top8,
+                "top8_rate": top8 / entries,
+                "top16": top16,
+                "top16_rate": top16 / entries,
+                "avg_placement": placement_sum / entries,
+            })
+        report = report[report["entries"] >= max(min_entries, 1)]
+        return report.sort_values(["entries", by], ascending=[False, True], kind="stable").reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Meta share and conversion report.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    parser.add_argument("--by", choices=GROUPINGS, default="archetype", help="Group by leader, base or archetype")
+    parser.add_argument("--start-date", help="First tournament date to include (YYYY-MM-DD)")
+    parser.add_argument("--end-date", help="Last tournament date to include (YYYY-MM-DD)")
+    parser.add_argument("--level", action="append", help="Tournament level to include (repeatable)")
+    parser.add_argument("--min-entries", type=int, default=1, help="Hide groups with fewer entries")
+    parser.add_argument("--top", type=int, default=30, help="Rows to print (default: 30)")
+    parser.add_argument("--csv", help="Also write the full report to this CSV file")
+    args = parser.parse_args()
+
+    with closing(sqlite3.connect(args.db)) as conn:
+        table = ResultsTable.load(conn)
+    report = table.report(args.by, args.start_date, args.end_date, args.level, args.min_entries)
+
+    if args.csv:
+        report.to_csv(args.csv, index=False)
+        print(f"Saved report as \"{args.csv}\"")
+    formatted = report.head(args.top).copy()
+    for column in ("meta_share", "top8_rate", "top16_rate"):
+        formatted[column] = (100 * formatted[column]).map("{:.1f}%".format)
+    formatted["avg_placement"] = formatted["avg_placement"].map("{:.1f}".format)
+    print(formatted.to_string(index=False))
+    print(f"{int(report['entries'].sum())} results in {len(report)} groups.")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""bench_analytics.py
+Time the columnar meta reports of analytics.py against the equivalent SQL
+GROUP BY queries on a synthetic database (see benchmarks/synthetic.py).
+The database only holds standings (no pairings), so millions of result rows can
+be generated quickly. Each report is produced for every grouping, for the full
+history and for a date window with a level filter, and its counts are checked
+against SQL.
+Usage
+-------
+    python -m benchmarks.bench_analytics [--tournaments N] [--players N] [--seed N]
+
+It exits with status 1 if a report differs from the SQL result.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+
+import analytics
+from benchmarks import synthetic
+
+GROUP_COLUMNS = {
+    "leader": "COALESCE(d.leader_id, -1)",
+    "base": "COALESCE(d.base_id, -1)",
+    "archetype": "COALESCE(d.leader_id, -1), COALESCE(d.base_id, -1)",
+}
+
+def sql_report(conn, by, start_date=None, end_date=None, levels=None):
+    """Return sorted (entries, top8, top16, placement sum) tuples computed in SQL."""
+    clauses, params = ["1"], []
+    if start_date:
+        clauses.append("t.date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("t.date <= ?")
+        params.append(end_date)
+    if levels is not None:
+        clauses.append(f"COALESCE(t.level, '') IN ({','.join('?' * len(levels))})")
+        params.extend(levels)
+    rows = conn.execute(
+        f"""
+        SELECT COUNT(*), SUM(r.result <= 8), SUM(r.result <= 16), SUM(r.result)
+          FROM results r
+          JOIN tournaments t ON t.tournament_id = r.tournament_id
+          LEFT JOIN decks d ON d.deck_id = r.deck_id
+         WHERE {' AND '.join(clauses)}
+         GROUP BY {GROUP_COLUMNS[by]};
+        """,
+        params,
+    ).fetchall()
+    return sorted(rows)
+
+def report_counts(report):
+    return sorted(zip(report["entries"].tolist(), report["top8"].tolist(), report["top16"].tolist(),
+                      (report["avg_placement"] * report["entries"]).round().astype(int).tolist()))
+
+def main(tournaments, players, seed):
+    filters = [
+        ("full history", {}),
+        ("2025, PQ+SQ", {"start_date": "2025-01-01", "end_date": "2025-12-31", "levels": ["PQ", "SQ"]}),
+    ]
+    identical = True
+    with tempfile.TemporaryDirectory() as scratch:
+        with closing(synthetic.create_database(Path(scratch) / "bench.db")) as conn:
+            start = time.perf_counter()
+            synthetic.populate(conn, tournaments, players, rounds=0, seed=seed)
+            print(f"built {tournaments * players} results in {time.perf_counter() - start:.1f}s")
+
+            start = time.perf_counter()
+            table = analytics.ResultsTable.load(conn)
+            print(f"load:  {time.perf_counter() - start:8.3f}s  ({len(table)} rows)")
+
+            for label, kwargs in filters:
+                for by in analytics.GROUPINGS:
+                    start = time.perf_counter()
+                    report = table.report(by, **kwargs)
+                    columnar = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    expected = sql_report(conn, by, **kwargs)
+                    sql = time.perf_counter() - start
+
+                    same = report_counts(report) == [tuple(row) for row in expected]
+                    identical = identical and same
+                    print(f"{label:<14} {by:<10} columnar {columnar:7.3f}s  sql {sql:7.3f}s  "
+                          f"{len(report):5} groups  {'ok' if same else 'MISMATCH'}")
+    return identical
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the columnar meta reports.")
+    parser.add_argument("--tournaments", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=200, help="Players per tournament")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(0 if main(args.tournaments, args.players, args.seed) else 1)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""bench_decklists.py
+Load synthetic decklist pages with decklists.py and time card-inclusion queries.
+A synthetic database is built with benchmarks/synthetic.py and a decklist page is
+written for every deck into a scratch fixtures directory: most in Melee's
+decklist markup, some as a plain text export, a few without any cards. Many
+decks copy a popular list of their archetype, as players do. The pages are
+loaded with `decklists.py fetch --fixtures`, and the script checks that every
+deck got exactly its own cards through `all_deck_cards`, that identical lists
+were stored once, and that the empty pages were left for a retry. Then random
+one and two card queries are answered both by `CardIndex` and by the same
+question in SQL over `all_deck_cards`, which must agree.
+Usage
+-------
+    python -m benchmarks.bench_decklists [--tournaments 200] [--players 64] [--queries 200] [--seed N]
+
+It exits with status 1 if a check fails.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import closing
+from html import escape
+from pathlib import Path
+
+import decklists
+from benchmarks.synthetic import build_database
+
+SECTIONS = ["Ground Units", "Space Units", "Events", "Upgrades"]
+POOL = 600  # Cards per section
+SHARED_LISTS = 0.6  # Decks playing the popular list of their archetype
+TEXT_PAGES = 0.1
+EMPTY_PAGES = 0.01
+
+def card_pool(rng):
+    return {section: [f"{section.split()[0]} Card {number}" + (f", Subtitle {number}" if rng.random() < 0.3 else "")
+                      for number in range(POOL)]
+            for section in SECTIONS}
+
+def random_list(rng, pool):
+    # 50 cards in the main deck in up to 3 copies each, and a sideboard of up to 10
+    cards = []
+    for section, count in zip(SECTIONS, (20, 8, 14, 8)):
+        for name in rng.sample(pool[section], count // 2):
+            cards.append((section, name, 2))
+    for name in rng.sample(pool["Events"] + pool["Upgrades"], rng.randint(0, 5)):
+        cards.append(("Sideboard", name, 2))
+    return cards
+
+def markup_page(cards):
+    parts = ['<html><body><div class="decklist-container">']
+    for section in SECTIONS + ["Sideboard"]:
+        records = [(name, count) for card_section, name, count in cards if card_section == section]
+        if not records:
+            continue
+        parts.append(f'<div class="decklist-category"><div class="decklist-category-title">'
+                     f'{section} ({sum(count for _, count in records)})</div>')
+        for name, count in records:
+            parts.append(f'<div class="decklist-record"><span class="decklist-record-quantity">{count}</span>'
+                         f'<a class="decklist-record-name" href="#"><span>{escape(name)}</span></a></div>')
+        parts.append("</div>")
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+def text_page(cards):
+    lines = []
+    for section in SECTIONS + ["Sideboard"]:
+        records = [(name, count) for card_section, name, count in cards if card_section == section]
+        if records:
+            lines.append(f"{section}:")
+            lines.extend(f"{count} {name.replace(', ', ' | ')}" for name, count in records)
+    return f'<html><body><textarea class="decklist-text">{escape(chr(10).join(lines))}</textarea></body></html>'
+
+def write_fixtures(conn, directory, rng):
+    """Write a page for every deck; return the expected {deck_id: cards} and the deck ids of the empty pages."""
+    pool = card_pool(rng)
+    popular = {}
+    expected, empty = {}, set()
+    for deck_id, leader_id, base_id, link in conn.execute("SELECT deck_id, leader_id, base_id, decklink FROM decks"):
+        path = Path(directory) / decklists.fixture_name(link)
+        if rng.random() < EMPTY_PAGES:
+            path.write_text("<html><body>Decklist is private</body></html>", encoding="utf-8")
+            empty.add(deck_id)
+            continue
+        if rng.random() < SHARED_LISTS:
+            cards = popular.setdefault((leader_id, base_id), random_list(rng, pool))
+        else:
+            cards = random_list(rng, pool)
+        page = text_page(cards) if rng.random() < TEXT_PAGES else markup_page(cards)
+        path.write_text(page, encoding="utf-8")
+        expected[deck_id] = {(name, 1 if section == "Sideboard" else 0): count for section, name, count in cards}
+    return expected, empty
+
+def check_load(conn, expected, empty):
+    failures = 0
+    stored = {}
+    for deck_id, name, subtitle, count, sideboard in conn.execute(
+            "SELECT a.deck_id, c.name, c.subtitle, a.count, a.sideboard FROM all_deck_cards a "
+            "JOIN cards c ON c.card_id = a.card_id"):
+        full_name = f"{name}, {subtitle}" if subtitle else name
+        stored.setdefault(deck_id, {})[(full_name, sideboard)] = count
+    failures += sum(1 for deck_id, cards in expected.items() if stored.get(deck_id) != cards)
+    failures += sum(1 for deck_id in empty if deck_id in stored)
+    distinct = len({frozenset(cards.items()) for cards in expected.values()})
+    lists = conn.execute("SELECT COUNT(*) FROM decklists").fetchone()[0]
+    owners = conn.execute("SELECT COUNT(DISTINCT deck_id) FROM deck_cards").fetchone()[0]
+    unhashed = conn.execute("SELECT COUNT(*) FROM decks WHERE content_hash IS NULL").fetchone()[0]
+    print(f"  {len(expected)} decks, {distinct} distinct lists, {lists} stored, {unhashed} left for a retry")
+    if failures:
+        print(f"  {failures} decks with DIFFERENT cards")
+    return not failures and distinct == lists == owners and unhashed == len(empty)
+
+def sql_query(conn, card_ids, top):
+    # Same question as CardIndex.query over the expanded view: results whose deck has every card
+    having = " AND ".join(f"SUM(a.card_id IN ({','.join(map(str, ids))})) > 0" for ids in card_ids)
+    return conn.execute(
+        f"""
+        SELECT COUNT(*), SUM(r.result <= ?) FROM results r
+          JOIN decks d ON d.deck_id = r.deck_id AND d.content_hash IS NOT NULL
+         WHERE r.deck_id IN (SELECT a.deck_id FROM all_deck_cards a WHERE a.sideboard = 0
+                              GROUP BY a.deck_id HAVING {having})
+        """, (top,)).fetchone()
+
+def main(tournaments, players, queries, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as scratch:
+        fixtures = os.path.join(scratch, "fixtures")
+        os.mkdir(fixtures)
+        with closing(build_database(os.path.join(scratch, "bench.db"), tournaments, players, 0, seed)) as conn:
+            expected, empty = write_fixtures(conn, fixtures, rng)
+            start = time.perf_counter()
+            store, failed = decklists.fetch(conn, concurrency=1, rate=0, fixtures=fixtures)
+            print(f"  load fixtures    {time.perf_counter() - start:8.2f} s  "
+                  f"({store.stored} new lists, {store.shared} shared, {len(failed)} failed)")
+            ok = check_load(conn, expected, empty)
+
+            start = time.perf_counter()
+            index = decklists.CardIndex(conn)
+            print(f"  build index      {(time.perf_counter() - start) * 1000:8.1f} ms")
+            names = [name for name, subtitle in conn.execute("SELECT name, subtitle FROM cards")]
+            asked = [rng.sample(names, rng.choice((1, 2))) for _ in range(queries)]
+
+            start = time.perf_counter()
+            answers = [index.query(names) for names in asked]
+            indexed = (time.perf_counter() - start) / queries
+            start = time.perf_counter()
+            expected_answers = [sql_query(conn, [index.card_ids(name) for name in names], 8) for names in asked]
+            scanned = (time.perf_counter() - start) / queries
+            different = sum(1 for answer, (results, top) in zip(answers, expected_answers)
+                            if (answer["results_with"], answer["top_with"]) != (results, top or 0))
+            print(f"  card index query {indexed * 1000:8.2f} ms")
+            print(f"  SQL query        {scanned * 1000:8.2f} ms  {scanned / indexed:5.1f}x")
+            print(f"  {'identical' if not different else f'{different} queries DIFFERENT'}")
+    return ok and not different
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark decklist loading and card-inclusion queries")
+    parser.add_argument("--tournaments", type=int, default=200, help="Synthetic tournaments (default: 200)")
+    parser.add_argument("--players", type=int, default=64, help="Players per tournament (default: 64)")
+    parser.add_argument("--queries", type=int, default=200, help="Card queries timed (default: 200)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.tournaments, args.players, args.queries, args.seed) else 1)
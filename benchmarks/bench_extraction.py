@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""bench_extraction.py
+Compare the two table extraction modes of the Selenium scraper.
+`dom` reads every cell with its own WebDriver calls, `script` captures a whole page
+with one `execute_script` call (see `SNAPSHOT_TABLE_SCRIPT` in melee_scraper.py).
+Each tournament is scraped once per mode with the same browser session, in a scratch
+directory, and the script reports wall time, time spent parsing and whether both
+runs wrote the same CSV files. The script mode reads `innerText` instead of
+WebDriver's visible text (see `CellSnapshot`), so this is the check that the two
+agree on the events scraped.
+Usage
+-------
+    python -m benchmarks.bench_extraction <tournament_url> [<tournament_url> ...] [--mode standings|pairings|both]
+
+It exits with status 1 if any tournament produced different CSV output.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import melee_scraper
+
+MODES = ["dom", "script"]
+
+def run_once(session, url, mode, extraction, workdir):
+    session.extraction = extraction
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        ctx = session.scrape(url, mode)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(previous_dir)
+    outputs = {path.name: path.read_bytes() for path in Path(workdir).glob("*.csv")}
+    return elapsed, ctx.timer.totals.get("parse", 0.0), ctx.pages, outputs
+
+def main(urls, mode):
+    identical = True
+    with melee_scraper.MeleeSession() as session, tempfile.TemporaryDirectory() as scratch:
+        for url in urls:
+            results = {}
+            for extraction in MODES:
+                workdir = Path(scratch) / f"{url.split('/')[-1]}_{extraction}"
+                workdir.mkdir()
+                results[extraction] = run_once(session, url, mode, extraction, workdir)
+
+            same = results["dom"][3] == results["script"][3]
+            identical = identical and same
+            print(f"\n{url}")
+            for extraction in MODES:
+                elapsed, parse, pages, outputs = results[extraction]
+                print(f"  {extraction:<6} {elapsed:7.1f}s total  {parse:7.1f}s parsing  {pages} pages  {len(outputs)} file(s)")
+            dom_parse, script_parse = results["dom"][1], results["script"][1]
+            if script_parse > 0:
+                print(f"  parsing speedup: {dom_parse / script_parse:.1f}x")
+            print(f"  CSV output identical: {'yes' if same else 'NO'}")
+    return identical
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dom vs script table extraction")
+    parser.add_argument("urls", nargs="+", help="Melee.gg tournament URLs")
+    parser.add_argument("--mode", default="standings", help="Scrape standings, pairings or both")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.urls, args.mode) else 1)
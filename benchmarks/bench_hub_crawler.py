@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""bench_hub_crawler.py
+Compare the serial hub page loop of comp_hub_scraper.py with the concurrent
+crawler of hub_crawler.py.
+Both fetch the same synthetic tournament pages from the fixture server of
+tests/fixture_server.py, which adds a fixed latency to every response and
+answers a share of the first requests with `429 Too Many Requests` or
+`503 Service Unavailable`, so the crawler's retries are exercised too. The script reports wall time, requests and retries,
+and checks that both produce identical parsed pages.
+Usage
+-------
+    python -m benchmarks.bench_hub_crawler [--pages N] [--latency SECONDS] [--concurrency N] [--rate R]
+                                           [--failure-rate F] [--seed N]
+
+It exits with status 1 if the crawler's results differ from the serial loop.
+"""
+import argparse
+import sys
+import time
+
+import requests
+
+import comp_hub_scraper
+import hub_crawler
+from tests.fixture_server import FixtureServer
+
+def run_serial(links):
+    # Like comp_hub_scraper.run_serial, with a plain retry since requests doesn't retry 429/503 by itself
+    pages = {}
+    with requests.Session() as session:
+        for link in links:
+            for attempt in range(hub_crawler.RETRIES + 1):
+                try:
+                    pages[link["link"]] = comp_hub_scraper.scrape_tournament_page(link["link"], session)
+                    break
+                except requests.HTTPError:
+                    if attempt == hub_crawler.RETRIES:
+                        raise
+    return pages
+
+def main(pages, latency, concurrency, rate, failure_rate, seed):
+    with FixtureServer(pages, latency, failure_rate, seed) as server:
+        links = [{"link": server.url(number)} for number in range(pages)]
+        print(f"{pages} pages, {latency * 1000:.0f} ms latency, {len(server.failing)} pages failing once")
+
+        start = time.perf_counter()
+        serial = run_serial(links)
+        serial_time = time.perf_counter() - start
+        print(f"  serial loop   {serial_time:7.2f}s")
+
+        server.reset()
+        crawler = hub_crawler.HubCrawler(concurrency=concurrency, rate=rate, backoff=0.01)
+        start = time.perf_counter()
+        results = crawler.crawl(links, progress=False)
+        crawl_time = time.perf_counter() - start
+        print(f"  crawler       {crawl_time:7.2f}s  ({crawler.stats()}, concurrency {concurrency}, "
+              f"rate {rate or 'unlimited'}/s)")
+
+    errors = [error for _, _, error in results if error is not None]
+    crawled = {link["link"]: data for link, data, error in results if error is None}
+    same = not errors and crawled == serial
+    print(f"  speedup: {serial_time / crawl_time:.1f}x")
+    print(f"  parsed pages identical: {'yes' if same else 'NO'}")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+    return same
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the serial hub loop against the async crawler")
+    parser.add_argument("--pages", type=int, default=200, help="Tournament pages to fetch (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response (default: 0.05)")
+    parser.add_argument("--concurrency", type=int, default=hub_crawler.CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second for the crawler, 0 for no limit")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="Share of pages answering 429/503 once")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.pages, args.latency, args.concurrency, args.rate, args.failure_rate, args.seed) else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""bench_hub_parsers.py
+Compare the HTML parsing backends of hub_parsers.py.
+Every backend parses the same pages; the script checks that all of them return
+exactly the rows and Melee link of the `html.parser` backend and reports the
+parse time of each. Without arguments a synthetic results listing of `--rows`
+rows and a tournament page of `--players` placements are generated, with the
+usual hub clutter around them (navigation, scripts, comments, entities). Saved
+pages (e.g. `curl -o listing.html https://www.swu-competitivehub.com/tournaments-results/`)
+can be passed instead; each file is checked both as a listing and as a
+tournament page.
+Usage
+-------
+    python -m benchmarks.bench_hub_parsers [page.html ...] [--rows N] [--players N] [--repeat N]
+
+It exits with status 1 if a backend's output differs from `html.parser`.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import hub_parsers
+
+COUNTRIES = ["United States", "France", "Germany", "Spain", "Italy", "United Kingdom", "Canada", "Brazil"]
+LEVELS = ["PQ", "SQ", "RQ", "GC"]
+
+HEAD = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Tournaments results</title>
+<script>var rows = "<tr><td>not a row</td></tr>";</script>
+<style>td { padding: 2px; }</style></head>
+<body><nav><ul>{nav}</ul></nav>
+<!-- results -->
+"""
+
+def listing_page(rows):
+    nav = "".join(f'<li><a href="/page-{i}">Page {i}</a></li>' for i in range(50))
+    body = []
+    for number in range(rows):
+        day = f"2025-{12 - number // 400 % 12:02d}-{28 - number % 28:02d}"
+        country = COUNTRIES[number % len(COUNTRIES)]
+        flag = f'<img src="/flags/{number % 8}.png" alt="{country}">' if number % 17 else ""
+        body.append(
+            f"<tr>\n  <td> {day} </td>\n"
+            f'  <td><a href="/tournament/{number}/">Tournament &amp; Cup <span>#{number}</span></a> <!-- id {number} --></td>\n'
+            f"  <td>{flag}</td>\n"
+            f'  <td><img src="/flags/{number % 8}.png" alt="{country}"> {country}&nbsp;</td>\n'
+            f"  <td>{LEVELS[number % len(LEVELS)]}</td>\n</tr>"
+        )
+    return (HEAD.replace("{nav}", nav)
+            + '<table id="tableTournaments" class="table"><thead><tr><th>Date</th><th>Name</th></tr></thead>\n<tbody>\n'
+            + "\n".join(body)
+            + "\n</tbody></table>\n"
+            + '<table id="tableFooter"><tbody><tr><td>footer</td></tr></tbody></table>'
+            + "<script>console.log('done');</script></body></html>")
+
+def tournament_page(players):
+    rows = "".join(
+        f"<tr><td>{rank}</td><td><img src='/leaders/{rank % 30}.png' alt='Leader {rank % 30}'></td>"
+        f"<td>Base</td><td> Player Ñame {rank} <script>track({rank})</script></td></tr>\n"
+        for rank in range(1, players + 1)
+    )
+    return (HEAD.replace("{nav}", "")
+            + '<a id="link_text-238-135" href="https://melee.gg/Tournament/View/123456">Melee</a>\n'
+            + f'<table id="tableResults"><thead><tr><th>#</th></tr></thead><tbody>\n{rows}</tbody></table>\n'
+            + "<div>" + "<p>Lorem ipsum dolor sit amet.</p>" * 2000 + "</div></body></html>")
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def compare(name, html, parse, repeat):
+    print(f"\n{name} ({len(html) / 1024:.0f} KiB)")
+    reference_time, reference = best_time(lambda: parse(html, "html.parser"), repeat)
+    identical = True
+    for parser in hub_parsers.PARSERS:
+        elapsed, result = best_time(lambda: parse(html, parser), repeat)
+        same = result == reference
+        identical = identical and same
+        print(f"  {parser:<12} {elapsed * 1000:8.1f} ms  {reference_time / elapsed:5.1f}x  "
+              f"{'identical' if same else 'DIFFERENT'}")
+    return identical
+
+def main(files, rows, players, repeat):
+    if files:
+        pages = [(path.name, path.read_bytes()) for path in map(Path, files)]
+        checks = [(f"{name} as listing", html, hub_parsers.listing_rows) for name, html in pages]
+        checks += [(f"{name} as tournament page", html, hub_parsers.tournament_page) for name, html in pages]
+    else:
+        checks = [
+            (f"listing of {rows} rows", listing_page(rows), hub_parsers.listing_rows),
+            (f"tournament page of {players} placements", tournament_page(players), hub_parsers.tournament_page),
+        ]
+    identical = True
+    for name, html, parse in checks:
+        identical = compare(name, html, parse, repeat) and identical
+    return identical
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the hub HTML parsing backends")
+    parser.add_argument("files", nargs="*", help="Saved hub pages to check instead of the synthetic ones")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows of the synthetic listing (default: 5000)")
+    parser.add_argument("--players", type=int, default=256, help="Placements of the synthetic tournament page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, the fastest is reported")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.files, args.rows, args.players, args.repeat) else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""bench_import_time.py
+Guard the startup time of the lightweight `swu_stats.py` commands.
+Every command is started in a fresh interpreter with `python -X importtime` and
+the import times of everything imported after interpreter startup (i.e. after
+`site`) are added up; the fastest of `--repeat` runs is reported, together with
+the wall time of the whole process. A command fails the check if it takes longer
+than `--budget-ms` to import its modules, or if it imports one of the heavy
+dependencies (pandas, Selenium's browser modules, country_converter, ...) that
+should only be loaded once they are actually used.
+Usage
+-------
+    python -m benchmarks.bench_import_time [--repeat N] [--budget-ms MS] [--show N]
+
+It exits with status 1 if a command is over budget or imports a heavy module.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "swu_stats.py"
+
+# Commands that must start without the heavy dependencies
+LIGHT_COMMANDS = [
+    ["--help"],
+    ["hub", "--help"],
+    ["scrape", "--help"],
+    ["load", "--help"],
+    ["unify", "--help"],
+    ["migrate", "--help"],
+    ["matchups", "--help"],
+    ["locations", "--help"],
+    ["cache", "--help"],
+]
+
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "selenium.webdriver.support.ui",
+    "selenium.webdriver.remote.webdriver",
+    "webdriver_manager",
+    "country_converter",
+    "lxml",
+    "bs4",
+    "requests",
+    "tqdm",
+    "httpx",
+]
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] of the imports after interpreter startup."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    # Everything up to `site` is imported by the interpreter itself
+    for index, (name, _, _, depth) in enumerate(imports):
+        if name == "site" and depth == 0:
+            return imports[index + 1:]
+    return imports
+
+def measure(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", str(SCRIPT)] + args,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=SCRIPT.parent)
+    wall = time.perf_counter() - start
+    imports = parse_importtime(result.stderr)
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    return total / 1000, wall * 1000, imports
+
+def main(repeat, budget_ms, show):
+    ok = True
+    for args in LIGHT_COMMANDS:
+        runs = [measure(args) for _ in range(repeat)]
+        import_ms, _, imports = min(runs, key=lambda run: run[0])
+        wall_ms = min(run[1] for run in runs)
+        names = {name for name, _, _, _ in imports}
+        heavy = [module for module in HEAVY_MODULES if module in names]
+        over = import_ms > budget_ms
+        ok = ok and not heavy and not over
+        status = "ok" if not heavy and not over else "FAIL"
+        print(f"swu_stats.py {' '.join(args):<20} imports {import_ms:6.1f} ms  process {wall_ms:6.1f} ms  {status}")
+        if heavy:
+            print(f"  imports heavy modules: {', '.join(heavy)}")
+        if over:
+            print(f"  over the budget of {budget_ms:.0f} ms")
+        if show:
+            top = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: -entry[2])[:show]
+            for name, _, cumulative, _ in top:
+                print(f"    {cumulative / 1000:6.1f} ms  {name}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of the lightweight swu_stats commands")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command, the fastest is reported (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=50, help="Import time allowed per command (default: 50 ms)")
+    parser.add_argument("--show", type=int, default=0, help="Also list the N slowest top-level imports of each command")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.repeat, args.budget_ms, args.show) else 1)
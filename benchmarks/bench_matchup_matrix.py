@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""bench_matchup_matrix.py
+Compare matchup queries served from `matchup_buckets` with the same queries run
+directly against the matches, decks and tournaments tables.
+A synthetic database is built in a scratch directory (see benchmarks/synthetic.py),
+the matrix is refreshed once in full, then one tournament is marked as changed and
+one match result corrected to time incremental refreshes. Every query is run with both implementations and
+the results are compared.
+Usage
+-------
+    python -m benchmarks.bench_matchup_matrix [--tournaments N] [--players N] [--queries N] [--seed N]
+
+It exits with status 1 if any query returns different results.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+
+import matchup_matrix
+from benchmarks import synthetic
+
+def random_queries(conn, count, seed):
+    """Return `count` query keyword sets over popular archetypes and random date ranges."""
+    rng = random.Random(seed)
+    archetypes = conn.execute(
+        """
+        SELECT d.leader_id, d.base_id FROM results r JOIN decks d ON d.deck_id = r.deck_id
+         GROUP BY d.leader_id, d.base_id ORDER BY COUNT(*) DESC LIMIT 20;
+        """
+    ).fetchall()
+    dates = sorted(row[0] for row in conn.execute("SELECT DISTINCT date FROM tournaments;"))
+    queries = []
+    for _ in range(count):
+        leader, base = rng.choice(archetypes)
+        start, end = sorted(rng.sample(dates, 2))
+        query = {"leaders": [leader], "start_date": start, "end_date": end}
+        if rng.random() < 0.5:
+            query["bases"] = [base]
+        if rng.random() < 0.3:
+            query["levels"] = rng.sample(synthetic.LEVELS, 2)
+        if rng.random() < 0.2:
+            query.pop("start_date"), query.pop("end_date")
+        queries.append(query)
+    return queries
+
+def time_queries(conn, function, queries):
+    start = time.perf_counter()
+    results = [function(conn, **query) for query in queries]
+    return time.perf_counter() - start, results
+
+def main(tournaments, players, query_count, seed):
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = Path(scratch) / "bench.db"
+        with closing(synthetic.create_database(db_path)) as conn:
+            synthetic.populate(conn, tournaments, players, seed=seed)
+            match_count = conn.execute("SELECT COUNT(*) FROM matches;").fetchone()[0]
+            print(f"{tournaments} tournaments, {match_count} matches")
+
+            start = time.perf_counter()
+            refreshed, buckets = matchup_matrix.refresh(conn, full=True)
+            print(f"full refresh:        {time.perf_counter() - start:8.3f}s  ({refreshed} tournaments, {buckets} week/level buckets)")
+
+            start = time.perf_counter()
+            refreshed, buckets = matchup_matrix.refresh(conn)
+            print(f"no-op refresh:       {time.perf_counter() - start:8.3f}s  ({refreshed} tournaments)")
+
+            # Pretend one more event was loaded by reloading the last tournament's pairings
+            last = conn.execute("SELECT MAX(tournament_id) FROM tournaments;").fetchone()[0]
+            conn.execute("UPDATE matchup_tournaments SET match_count = 0 WHERE tournament_id = ?;", (last,))
+            conn.commit()
+            start = time.perf_counter()
+            refreshed, buckets = matchup_matrix.refresh(conn)
+            print(f"incremental refresh: {time.perf_counter() - start:8.3f}s  ({refreshed} tournament, {buckets} buckets)")
+
+            # A corrected result keeps the match count; the checksum still marks its tournament
+            conn.execute("UPDATE matches SET player1_wins = player2_wins, player2_wins = player1_wins "
+                         "WHERE match_id = (SELECT MIN(match_id) FROM matches WHERE player2_id IS NOT NULL);")
+            conn.commit()
+            start = time.perf_counter()
+            refreshed, buckets = matchup_matrix.refresh(conn)
+            print(f"corrected result:    {time.perf_counter() - start:8.3f}s  ({refreshed} tournament, {buckets} buckets)")
+
+            row_count = conn.execute("SELECT COUNT(*) FROM matchup_buckets;").fetchone()[0]
+            print(f"matrix rows: {row_count}")
+
+            queries = random_queries(conn, query_count, seed)
+            naive_time, naive_results = time_queries(conn, matchup_matrix.naive_query, queries)
+            bucket_time, bucket_results = time_queries(conn, matchup_matrix.query_matrix, queries)
+
+    print(f"\n{query_count} queries")
+    print(f"  naive  {naive_time:8.3f}s  {1000 * naive_time / query_count:8.2f} ms/query")
+    print(f"  matrix {bucket_time:8.3f}s  {1000 * bucket_time / query_count:8.2f} ms/query")
+    if bucket_time > 0:
+        print(f"  speedup: {naive_time / bucket_time:.1f}x")
+
+    mismatches = sum(1 for naive, bucket in zip(naive_results, bucket_results) if naive != bucket)
+    print(f"  results identical: {'yes' if not mismatches else f'NO ({mismatches} queries differ)'}")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the materialized matchup matrix.")
+    parser.add_argument("--tournaments", type=int, default=300)
+    parser.add_argument("--players", type=int, default=64, help="Players per tournament")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    sys.exit(0 if main(args.tournaments, args.players, args.queries, args.seed) else 1)
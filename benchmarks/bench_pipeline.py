@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""bench_pipeline.py
+Time every stage of the pipeline, from scraped files to reports, and compare runs between commits.
+For each size of `synthetic.EVENT_SIZES` the standings, pairings and placements
+files are generated (see `synthetic.write_events`), the tournaments are stored as
+the Competitive Hub scraper would, and the stages are timed in pipeline order:
+
+    unify      unify_placements.unify_placements on every event
+    gap-fix    remove_standing_gaps.fix_sequence on every unified standings file
+    load-bulk  melee_csv_to_sql.bulk_load of the standings and pairings
+    load-rows  melee_csv_to_sql.process_csv of the standings, row by row
+    cleanup    remove_unknown_decks.main, after some decks were given an unknown ("-")
+               leader or base as older loads left them
+    analytics  analytics.ResultsTable.load and every meta report, all time and last 90 days
+    matchups   matchup_matrix.refresh(full=True)
+
+Like pytest-benchmark, every stage runs for as many rounds as fit in
+`--max-time` seconds, judged by the first round, but at least `--min-rounds`
+(after an untimed round with `--warmup`). Stages that write to the database
+start every round from a fresh copy, made outside the timing. A full run takes
+several minutes, most of it `process_csv` on the history; `--sizes` and
+`--stages` select a part. The results are saved as `.benchmarks/<commit>.json` (`-dirty` is added
+when tracked files were modified), with min/max/mean/stddev/median/IQR per stage.
+`compare` reads two saved runs (files, commits or git refs; the two latest runs
+by default) and reports the change of every stage.
+
+The two loaders must store the same results; `run` exits with status 1 if they
+don't, and `compare` if a stage got slower than `--threshold` percent.
+Usage
+-------
+    python -m benchmarks.bench_pipeline run [--sizes local regional galactic history] [--stages STAGE ...]
+                                            [--min-rounds 3] [--max-time 2] [--warmup] [--seed N]
+                                            [--output FILE | --no-save]
+    python -m benchmarks.bench_pipeline compare [BASE [HEAD]] [--stat median] [--threshold 10]
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing, redirect_stdout
+from datetime import datetime, timedelta, timezone
+from glob import glob
+from io import StringIO
+from pathlib import Path
+
+from benchmarks import synthetic
+
+RESULTS_DIR = Path(__file__).resolve().parent.parent / ".benchmarks"
+STAGES = ["unify", "gap-fix", "load-bulk", "load-rows", "cleanup", "analytics", "matchups"]
+STATS = ["min", "max", "mean", "stddev", "median", "iqr"]
+MAX_ROUNDS = 1000
+UNKNOWN_DECKS = 0.01  # Results moved to decks of an unknown leader or base before the cleanup
+
+def measure(run, setup=None, min_rounds=3, max_time=2.0, warmup=False):
+    """Time `run` like pytest-benchmark: at least `min_rounds` rounds, more if they fit in `max_time` seconds."""
+    if warmup:
+        if setup is not None:
+            setup()
+        run()
+    times = []
+    rounds = min_rounds
+    while len(times) < rounds:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        if len(times) == 1:
+            rounds = max(min_rounds, min(MAX_ROUNDS, math.ceil(max_time / max(times[0], 1e-9))))
+    return summarize(times)
+
+def summarize(times):
+    quartiles = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    mean = statistics.fmean(times)
+    return {
+        "min": min(times),
+        "max": max(times),
+        "mean": mean,
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "median": statistics.median(times),
+        "q1": quartiles[0],
+        "q3": quartiles[2],
+        "iqr": quartiles[2] - quartiles[0],
+        "ops": 1 / mean if mean else 0.0,
+        "rounds": len(times),
+        "iterations": 1,
+        "total": sum(times),
+        "data": times,
+    }
+
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=RESULTS_DIR.parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def commit_info():
+    return {
+        "id": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "time": git("log", "-1", "--format=%cI"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+def machine_info():
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+    }
+
+def store_tournaments(db_path, events):
+    # What comp_hub_scraper.py stores before the Melee files are loaded
+    with closing(synthetic.create_database(db_path)) as conn:
+        conn.executemany("INSERT INTO tournaments (date, level, location, name, link) VALUES (?, ?, ?, ?, ?);",
+                         [(event["date"], event["level"], "US", event["name"], event["link"]) for event in events])
+        conn.commit()
+
+def add_unknown_decks(db_path, seed):
+    """Move some results to copies of their decks with an unknown leader or base; return how many."""
+    with closing(sqlite3.connect(db_path)) as conn:
+        leader_id = conn.execute("INSERT INTO leaders (name, subtitle) VALUES ('-', '-');").lastrowid
+        base_id = conn.execute("INSERT INTO bases (name) VALUES ('-');").lastrowid
+        results = conn.execute("SELECT r.result_id, d.leader_id, d.base_id, d.decklink FROM results r "
+                               "JOIN decks d ON d.deck_id = r.deck_id ORDER BY r.result_id;").fetchall()
+        moved = random.Random(seed).sample(results, int(len(results) * UNKNOWN_DECKS))
+        for number, (result_id, leader, base, decklink) in enumerate(moved):
+            unknown = (leader_id, base) if number % 2 else (leader, base_id)
+            deck_id = conn.execute("INSERT INTO decks (leader_id, base_id, decklink) VALUES (?, ?, ?);",
+                                   (*unknown, decklink)).lastrowid
+            conn.execute("UPDATE results SET deck_id = ? WHERE result_id = ?;", (deck_id, result_id))
+        conn.commit()
+    return len(moved)
+
+def count_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f) - 1  # Without the header
+
+def loaded_results(db_path):
+    with closing(sqlite3.connect(db_path)) as conn:
+        return sorted(conn.execute(
+            "SELECT r.tournament_id, p.name, r.result, l.name, l.subtitle, b.name, d.decklink FROM results r "
+            "JOIN players p ON p.player_id = r.player_id LEFT JOIN decks d ON d.deck_id = r.deck_id "
+            "LEFT JOIN leaders l ON l.leader_id = d.leader_id LEFT JOIN bases b ON b.base_id = d.base_id;"),
+            key=repr)
+
+class SizeRun:
+    """The files and databases of one size, and the stages run on them."""
+    def __init__(self, directory, size, seed):
+        self.directory = Path(directory)
+        self.size = size
+        self.seed = seed
+        self.events = synthetic.write_events(self.directory, size, seed)
+        self.ids = [event["melee_id"] for event in self.events]
+        self.empty_db = self.directory / "empty.db"
+        self.loaded_db = self.directory / "loaded.db"
+        self.work_db = self.directory / "work.db"
+        store_tournaments(self.empty_db, self.events)
+        self.unify_reports = []
+        self.matching_loads = None  # Whether both loaders stored the same results, once load-rows ran
+
+    def file(self, melee_id, kind):
+        return str(self.directory / f"{melee_id}_{kind}")
+
+    def fresh(self, source):
+        return lambda: shutil.copyfile(source, self.work_db)
+
+    def unify(self):
+        from unify_placements import unify_placements
+        self.unify_reports = [unify_placements(self.file(melee_id, "placements.txt"),
+                                               self.file(melee_id, "standings.csv"),
+                                               self.file(melee_id, "standings_unified.csv"), verbose=False)
+                              for melee_id in self.ids]
+
+    def gap_fix(self):
+        from remove_standing_gaps import fix_sequence
+        for melee_id in self.ids:
+            fix_sequence(Path(self.file(melee_id, "standings_unified.csv")),
+                         Path(self.file(melee_id, "standings_fixed.csv")))
+
+    def load_bulk(self):
+        from melee_csv_to_sql import bulk_load
+        with closing(sqlite3.connect(self.work_db)) as conn:
+            bulk_load(conn, [self.file(melee_id, "standings_fixed.csv") for melee_id in self.ids],
+                      [self.file(melee_id, "pairings.csv") for melee_id in self.ids])
+
+    def load_rows(self):
+        from melee_csv_to_sql import process_csv
+        with closing(sqlite3.connect(self.work_db)) as conn, redirect_stdout(StringIO()):
+            for melee_id in self.ids:
+                process_csv(conn, self.file(melee_id, "standings_fixed.csv"))
+            conn.commit()
+
+    def cleanup(self):
+        import remove_unknown_decks
+        with redirect_stdout(StringIO()):
+            remove_unknown_decks.main(str(self.work_db))
+
+    def analytics(self):
+        import analytics
+        with closing(sqlite3.connect(self.loaded_db)) as conn:
+            table = analytics.ResultsTable.load(conn)
+        last = max(event["date"] for event in self.events)
+        start = (datetime.fromisoformat(last) - timedelta(days=90)).date().isoformat()
+        for by in analytics.GROUPINGS:
+            table.report(by)
+            table.report(by, start_date=start)
+
+    def matchups(self):
+        import matchup_matrix
+        with closing(sqlite3.connect(self.work_db)) as conn:
+            matchup_matrix.refresh(conn, full=True)
+
+    def run(self, stages, **timing):
+        """Yield (stage, stats, extra info) of the selected stages, in pipeline order."""
+        # Later stages need the output of earlier ones, whether they are timed or not
+        rows = sum(event["players"] for event in self.events)
+        pairings = sum(count_rows(self.file(melee_id, "pairings.csv")) for melee_id in self.ids)
+        if "unify" in stages:
+            yield "unify", measure(self.unify, None, **timing), {
+                "events": len(self.ids), "unmatched": sum(len(report["unmatched"]) for report in self.unify_reports)}
+        else:
+            self.unify()
+        if "gap-fix" in stages:
+            yield "gap-fix", measure(self.gap_fix, None, **timing), {"rows": rows}
+        else:
+            self.gap_fix()
+        if "load-bulk" in stages:
+            yield "load-bulk", measure(self.load_bulk, self.fresh(self.empty_db), **timing), \
+                {"rows": rows + pairings}
+        else:
+            self.fresh(self.empty_db)()
+            self.load_bulk()
+        shutil.copyfile(self.work_db, self.loaded_db)
+        if "load-rows" in stages:
+            yield "load-rows", measure(self.load_rows, self.fresh(self.empty_db), **timing), {"rows": rows}
+            self.matching_loads = loaded_results(self.work_db) == loaded_results(self.loaded_db)
+        if "cleanup" in stages:
+            unknown = self.directory / "unknown.db"
+            shutil.copyfile(self.loaded_db, unknown)
+            moved = add_unknown_decks(unknown, self.seed)
+            yield "cleanup", measure(self.cleanup, self.fresh(unknown), **timing), {"decks": moved}
+        if "analytics" in stages:
+            yield "analytics", measure(self.analytics, None, **timing), {"rows": rows}
+        if "matchups" in stages:
+            yield "matchups", measure(self.matchups, self.fresh(self.loaded_db), **timing), \
+                {"matches": pairings}
+
+def format_time(seconds):
+    return f"{seconds * 1000:9.2f} ms" if seconds < 1 else f"{seconds:9.3f} s "
+
+def run(sizes, stages, seed, **timing):
+    """Run the stages on every size, timed by `measure(**timing)`; return the pytest-benchmark style result document and whether the loads agree."""
+    document = {"machine_info": machine_info(), "commit_info": commit_info(),
+                "datetime": datetime.now(timezone.utc).isoformat(), "benchmarks": []}
+    ok = True
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as scratch:
+            start = time.perf_counter()
+            size_run = SizeRun(scratch, size, seed)
+            players = sum(event["players"] for event in size_run.events)
+            print(f"{size}: {len(size_run.events)} events, {players} players "
+                  f"(generated in {time.perf_counter() - start:.1f}s)")
+            print(f"  {'stage':<10} {'median':>12} {'min':>12} {'stddev':>12} {'rounds':>6}")
+            for stage, stats, extra in size_run.run(stages, **timing):
+                document["benchmarks"].append({"group": size, "name": f"{stage}[{size}]", "stage": stage,
+                                               "params": {"size": size, "seed": seed}, "stats": stats,
+                                               "extra_info": extra})
+                per_second = f"  {extra['rows'] / stats['median']:9.0f} rows/s" if "rows" in extra else ""
+                print(f"  {stage:<10} {format_time(stats['median'])} {format_time(stats['min'])} "
+                      f"{format_time(stats['stddev'])} {stats['rounds']:>6}{per_second}")
+            if size_run.matching_loads is False:
+                print("  load-bulk and load-rows stored DIFFERENT results")
+                ok = False
+    return document, ok
+
+def save(document, output=None):
+    if output is None:
+        commit = document["commit_info"]
+        name = (commit["id"][:12] or "unknown") + ("-dirty" if commit["dirty"] else "")
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{name}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    return output
+
+def find_run(reference):
+    """Path of a saved run: a file, or the run of a commit id prefix or git ref."""
+    if Path(reference).is_file():
+        return Path(reference)
+    commit = git("rev-parse", "--verify", "--quiet", f"{reference}^{{commit}}") or reference
+    found = sorted(glob(str(RESULTS_DIR / f"{commit[:12]}*.json")))
+    if not found:
+        raise FileNotFoundError(f"No saved run for {reference} in {RESULTS_DIR}")
+    return Path(found[0])
+
+def latest_runs(count):
+    return sorted(RESULTS_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime)[-count:]
+
+def compare(base_file, head_file, stat="median", threshold=10.0):
+    """Print the change of every stage of `head_file` against `base_file`; return the number of regressions."""
+    runs = []
+    for path in (base_file, head_file):
+        with open(path, encoding="utf-8") as f:
+            runs.append({bench["name"]: bench["stats"][stat] for bench in json.load(f)["benchmarks"]})
+    base, head = runs
+    print(f"{stat}: {Path(base_file).stem} -> {Path(head_file).stem}")
+    regressions = 0
+    for name in list(base) + [name for name in head if name not in base]:
+        if name not in base or name not in head:
+            print(f"  {name:<24} {'only in ' + ('head' if name in head else 'base'):>40}")
+            continue
+        change = 100 * (head[name] - base[name]) / base[name] if base[name] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<24} {format_time(base[name])} {format_time(head[name])} {change:+8.1f}%{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages and compare runs between commits")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Time the stages and save the results")
+    run_parser.add_argument("--sizes", nargs="+", choices=synthetic.EVENT_SIZES, default=list(synthetic.EVENT_SIZES),
+                            help="Sizes to run (default: all)")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to time (default: all)")
+    run_parser.add_argument("--min-rounds", type=int, default=3, help="Fewest timed rounds per stage (default: 3)")
+    run_parser.add_argument("--max-time", type=float, default=2.0,
+                            help="Seconds of rounds per stage, when more than --min-rounds fit (default: 2)")
+    run_parser.add_argument("--warmup", action="store_true", help="Run every stage once before timing it")
+    run_parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    run_parser.add_argument("--output", help=f"Result file (default: {RESULTS_DIR.name}/<commit>.json)")
+    run_parser.add_argument("--no-save", action="store_true", help="Only print the results")
+    compare_parser = commands.add_parser("compare", help="Compare two saved runs")
+    compare_parser.add_argument("runs", nargs="*", metavar="RUN",
+                                help="BASE and HEAD as files, commits or git refs (default: the two latest runs)")
+    compare_parser.add_argument("--stat", choices=STATS, default="median", help="Statistic compared (default: median)")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Percent slower that counts as a regression (default: 10)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        document, ok = run(args.sizes, args.stages, args.seed, min_rounds=args.min_rounds, max_time=args.max_time,
+                            warmup=args.warmup)
+        if not args.no_save:
+            print(f"Saved {save(document, args.output)}")
+        sys.exit(0 if ok else 1)
+
+    try:
+        if len(args.runs) > 2:
+            parser.error("compare takes at most two runs")
+        files = [find_run(reference) for reference in args.runs]
+        if len(files) < 2:
+            latest = [path for path in latest_runs(3) if path not in files]
+            files = (files + latest[-(2 - len(files)):]) if files else latest[-2:]
+        if len(files) < 2:
+            raise FileNotFoundError(f"Two saved runs are needed in {RESULTS_DIR}")
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    sys.exit(1 if compare(files[0], files[1], args.stat, args.threshold) else 0)
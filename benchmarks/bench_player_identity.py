@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""bench_player_identity.py
+Measure the lookup cost of player_identity.PlayerIndex as the player table grows.
+For every size an index of that many synthetic player names is built, then
+queried with names in another spelling (case, accents, spacing) through
+`resolve` and with typos through `candidates`. The cost of `resolve` should stay
+flat from the smallest to the largest size, and `candidates` should grow far
+slower than a full scan of all names, which is timed on a sample of the typo
+queries. The script checks that every respelled name resolves to its player and
+that `candidates` returns exactly what the full scan finds.
+Usage
+-------
+    python -m benchmarks.bench_player_identity [--sizes 10000 100000 300000] [--queries N] [--seed N]
+
+It exits with status 1 if a lookup returns a different player than expected.
+"""
+import argparse
+import random
+import sys
+import time
+
+from player_identity import THRESHOLD, PlayerIndex, ngrams, normalize_name
+
+LETTERS = "abcdefghijklmnopqrstuvwxyzéñü"
+BRUTE_FORCE_SAMPLE = 50
+
+def word(rng):
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 8))).capitalize()
+
+def player_names(rng, count):
+    # Melee usernames: "Firstname Lastname" or a handle, sometimes with digits. Names
+    # that only differ in accents or case would be the same player, so keep one of them
+    names = {}
+    while len(names) < count:
+        name = f"{word(rng)} {word(rng)}" if rng.random() < 0.5 else word(rng)
+        name = f"{name}{rng.randrange(100) if rng.random() < 0.3 else ''}"
+        names.setdefault(normalize_name(name), name)
+    return sorted(names.values())
+
+def respell(rng, name):
+    # Another spelling of the same name after normalization
+    variant = rng.choice([name.upper(), name.lower(), f"  {name} ", name.replace(" ", "  ")])
+    return variant.replace("é", "e").replace("ñ", "n").replace("ü", "u") if rng.random() < 0.5 else variant
+
+def typo(rng, name):
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice("aeiouxz") + name[position + 1:]
+
+def brute_force(index, name, limit):
+    query = ngrams(normalize_name(name))
+    scored = []
+    for key, player_id in index.normalized.items():
+        grams = ngrams(key)
+        score = 2 * len(query & grams) / (len(query) + len(grams))
+        if score >= THRESHOLD:
+            scored.append((score, player_id, key))
+    scored.sort(key=lambda candidate: (-candidate[0], candidate[2]))
+    return scored[:limit]
+
+def brute_force_us(index, queries):
+    return per_lookup_us(lambda name: brute_force(index, name, 5), queries)
+
+def per_lookup_us(function, queries):
+    start = time.perf_counter()
+    results = [function(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+def main(sizes, queries, seed):
+    rng = random.Random(seed)
+    names = player_names(rng, max(sizes))
+    ok = True
+    print(f"{'players':>9} {'build':>9} {'resolve':>12} {'postings':>9} {'candidates':>14} {'full scan':>14}")
+    for size in sizes:
+        start = time.perf_counter()
+        index = PlayerIndex()
+        for player_id, name in enumerate(names[:size], 1):
+            index.add(player_id, name)
+        build = time.perf_counter() - start
+
+        picks = [rng.randrange(size) for _ in range(queries)]
+        respelled = [respell(rng, names[pick]) for pick in picks]
+        resolve_us, resolved = per_lookup_us(index.resolve, respelled)
+        expected = [index.normalized[normalize_name(names[pick])] for pick in picks]
+        wrong = sum(1 for got, want in zip(resolved, expected) if got != want)
+
+        start = time.perf_counter()
+        index.candidates("")  # Builds the trigram postings
+        postings = time.perf_counter() - start
+        typos = [typo(rng, names[pick]) for pick in picks[:max(1, queries // 10)]]
+        candidates_us, found = per_lookup_us(index.candidates, typos)
+        scan_us, scanned = brute_force_us(index, typos[:BRUTE_FORCE_SAMPLE])
+        different = sum(1 for result, expected in zip(found, scanned) if result != expected)
+
+        ok = ok and not wrong and not different
+        print(f"{size:>9} {build:>8.2f}s {resolve_us:>9.2f} us {postings:>8.2f}s {candidates_us:>11.1f} us {scan_us:>11.1f} us"
+              + (f"  {wrong} WRONG" if wrong else "") + (f"  {different} DIFFERENT from brute force" if different else ""))
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark player name resolution against the player table size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000],
+                        help="Player table sizes (default: 10000 100000 300000)")
+    parser.add_argument("--queries", type=int, default=20000, help="Respelled names looked up per size")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.sizes, args.queries, args.seed) else 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""bench_swiss_standings.py
+Time the NumPy standings engine of swiss_standings.py on a large synthetic event.
+A Swiss event of `--players` players over `--rounds` rounds is generated (players
+paired by points, a bye for the odd player out, some drops, the round in progress
+unreported), and its standings are computed both by `Pairings.standings` and by
+a straightforward per-match Python implementation of the same rules. All
+records, points and tiebreakers and the final order must agree. The reference
+standings are also written as a scraped standings CSV and checked with
+`swiss_standings.compare`, the check used against real events.
+Usage
+-------
+    python -m benchmarks.bench_swiss_standings [--players 5000] [--rounds 15] [--repeat N] [--seed N]
+
+It exits with status 1 if the two implementations disagree.
+"""
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import swiss_standings
+from benchmarks.synthetic import _game_score, _swiss_round
+
+def swiss_event(rng, players, rounds):
+    """Return pairings rows in the `split_matches_headers` layout."""
+    names = [f"player{number}" for number in range(players)]
+    points = {name: 0 for name in names}
+    active = list(names)
+    rows = []
+    for round_number in range(1, rounds + 1):
+        active = [name for name in active if rng.random() > 0.01]  # Drops
+        pairs, bye = _swiss_round(rng, {name: points[name] for name in active})
+        for table, (first, second) in enumerate(pairs, 1):
+            wins1, wins2, draws = _game_score(rng)
+            if round_number == rounds and rng.random() < 0.2:
+                wins1, wins2, draws = 0, 0, 0  # Not reported yet
+            elif wins1 > wins2:
+                points[first] += 3
+            elif wins2 > wins1:
+                points[second] += 3
+            else:
+                points[first] += 1
+                points[second] += 1
+            rows.append([round_number, table, first, first.upper(), second, second.upper(),
+                         "Leader, Subtitle", "Base", "-", "Leader, Subtitle", "Base", "-", wins1, wins2, draws])
+        if bye is not None:
+            points[bye] += 3
+            rows.append([round_number, "", bye, bye.upper(), "-", "-",
+                         "Leader, Subtitle", "Base", "-", "-", "-", "-", 2, 0, 0])
+    return rows
+
+def reference_standings(rows):
+    """Records and tiebreakers of every player, one pairing at a time."""
+    record = defaultdict(lambda: [0, 0, 0, 0, 0, 0])  # Match W/L/D, game W/L/D
+    opponents = defaultdict(list)
+    for row in rows:
+        first, second = row[2], row[4]
+        wins1, wins2, draws = row[12], row[13], row[14]
+        if second == "-":
+            record[first][0] += 1
+            record[first][3] += wins1
+            continue
+        record[first]
+        record[second]
+        if wins1 + wins2 + draws == 0:
+            continue
+        for player, opponent, won, lost in ((first, second, wins1, wins2), (second, first, wins2, wins1)):
+            result = 0 if won > lost else (1 if won < lost else 2)
+            record[player][result] += 1
+            record[player][3] += won
+            record[player][4] += lost
+            record[player][5] += draws
+            opponents[player].append(opponent)
+
+    def match_win(player):
+        wins, losses, draws = record[player][:3]
+        matches = wins + losses + draws
+        return max((3 * wins + draws) / (3 * matches), swiss_standings.FLOOR) if matches else swiss_standings.FLOOR
+
+    def game_win(player):
+        wins, losses, draws = record[player][3:]
+        games = wins + losses + draws
+        return max((3 * wins + draws) / (3 * games), swiss_standings.FLOOR) if games else swiss_standings.FLOOR
+
+    standings = {}
+    for player, values in record.items():
+        played = opponents[player]
+        omw = sum(match_win(opponent) for opponent in played) / len(played) if played else 0.0
+        ogw = sum(game_win(opponent) for opponent in played) / len(played) if played else 0.0
+        standings[player] = values + [3 * values[0] + values[2], omw, game_win(player), ogw]
+    order = sorted(standings, key=lambda player: (-standings[player][6], -round(standings[player][7], 9),
+                                                  -round(standings[player][8], 9), -round(standings[player][9], 9),
+                                                  player))
+    return order, standings
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main(players, rounds, repeat, seed):
+    rows = swiss_event(random.Random(seed), players, rounds)
+    columns = swiss_standings.PAIRINGS_COLUMNS
+    print(f"{players} players, {rounds} rounds, {len(rows)} pairings")
+
+    load, pairings = best_time(lambda: swiss_standings.Pairings.from_rows(columns, rows), repeat)
+    engine, derived = best_time(lambda: pairings.standings().rows(), repeat)
+    reference, (order, expected) = best_time(lambda: reference_standings(rows), repeat)
+    print(f"  load pairings    {load * 1000:8.1f} ms")
+    print(f"  numpy engine     {engine * 1000:8.1f} ms")
+    print(f"  python reference {reference * 1000:8.1f} ms  {reference / engine:5.1f}x")
+
+    different = 0
+    for row, player in zip(derived, order):
+        values = expected[player]
+        wanted = [player] + values[:6] + [str(values[6])] + [swiss_standings.percentage(value) for value in values[7:]]
+        if [row[1]] + row[6:] != wanted:
+            different += 1
+    different += abs(len(derived) - len(order))
+
+    # The reference as a scraped standings file, checked like a real event
+    with tempfile.TemporaryDirectory() as scratch:
+        standings_file = Path(scratch) / "bench_standings.csv"
+        with open(standings_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(swiss_standings.STANDINGS_COLUMNS)
+            for rank, player in enumerate(order, 1):
+                values = expected[player]
+                writer.writerow([rank, player, player.upper(), "Leader, Subtitle", "Base", "-"] + values[:7]
+                                + [swiss_standings.percentage(value) for value in values[7:]])
+        with redirect_stdout(StringIO()):
+            compared = swiss_standings.compare(derived, str(standings_file))
+
+    print(f"  {'identical' if not different else f'{different} rows DIFFERENT'}, "
+          f"compare: {compared} differences")
+    return not different and not compared
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark deriving standings from pairings")
+    parser.add_argument("--players", type=int, default=5000, help="Players in the event (default: 5000)")
+    parser.add_argument("--rounds", type=int, default=15, help="Swiss rounds (default: 15)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = parser.parse_args()
+
+    sys.exit(0 if main(args.players, args.rounds, args.repeat, args.seed) else 1)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""synthetic.py
+Build reproducible synthetic databases for the benchmarks.
+The database is created from `base_db.sql` (so the real leaders and bases are
+used) and brought to the current schema with `migrate.py`. Tournaments, players,
+decks, results and Swiss pairings are then generated from a seeded random
+generator, so two runs with the same arguments produce the same data. With
+`--rounds 0` only standings are generated, which is much faster for large sizes.
+
+`write_events` (`--files`) generates the files of the scraping pipeline instead:
+for every event a `<id>_pairings.csv` of Swiss rounds, the `<id>_standings.csv`
+derived from it (see swiss_standings.py) with a few rows missing, as in Melee's
+standings of dropped players, and the `<id>_placements.txt` of its top cut as the
+Competitive Hub lists it (display names, sometimes in another spelling, with a
+typo or as the username). `EVENT_SIZES` are the sizes of the benchmark suite,
+from a local event to a Galactic Championship and a two-year history.
+Usage
+-------
+    python -m benchmarks.synthetic <database.sqlite> [--tournaments N] [--players N] [--rounds N] [--seed N]
+    python -m benchmarks.synthetic --files DIR [--size local|regional|galactic|history] [--seed N]
+"""
+import argparse
+import csv
+import math
+import random
+import sqlite3
+import sys
+import unicodedata
+from contextlib import closing, redirect_stdout
+from datetime import date, timedelta
+from io import StringIO
+from itertools import accumulate
+from pathlib import Path
+
+import migrate
+from swiss_standings import PAIRINGS_COLUMNS, STANDINGS_COLUMNS, standings_rows
+
+BASE_SCHEMA = Path(__file__).resolve().parent.parent / "base_db.sql"
+
+LEVELS = ["PQ", "SQ", "RQ", "GC"]
+START_DATE = date(2024, 3, 8)
+
+# name: (events, (fewest, most) players per event, days the events are spread over)
+EVENT_SIZES = {
+    "local": (1, (32, 32), 1),
+    "regional": (1, (1500, 1500), 1),
+    "galactic": (1, (10000, 10000), 1),
+    "history": (500, (16, 256), 730),
+}
+FIRST_NAMES = ["Alex", "Sam", "José", "Zoë", "Mika", "Björn", "Chloé", "Noah", "Léa", "Ines", "Kai", "Renée",
+               "Jonas", "Maria", "Ana", "Lukas", "Émile", "Sofia", "Tomás", "Yuki"]
+LAST_NAMES = ["Smith", "García", "Müller", "Nguyen", "Kowalski", "Dubois", "Rossi", "Jensen", "Sánchez", "Novák",
+              "Brown", "Silva", "Øster", "Kim", "Lefèvre", "Ito", "Costa", "Weiß", "Andersen", "Peña"]
+TOP_CUT = ["1st", "2nd", "3rd-4th", "3rd-4th", "5th-8th", "5th-8th", "5th-8th", "5th-8th"]
+MISSING_STANDINGS = 0.01  # Players left out of the scraped standings
+NO_DECKLIST = 0.02
+
+def create_database(path):
+    """Create an empty database at `path` with the seeded base schema and all migrations."""
+    conn = sqlite3.connect(path)
+    conn.executescript(BASE_SCHEMA.read_text(encoding="utf-8"))
+    with redirect_stdout(StringIO()):
+        migrate.migrate(conn)
+    return conn
+
+def _swiss_round(rng, standings):
+    # Pair players with equal points where possible; an odd player out gets a bye
+    order = sorted(standings, key=lambda player: (-standings[player], rng.random()))
+    pairs = [(order[i], order[i + 1]) for i in range(0, len(order) - 1, 2)]
+    bye = order[-1] if len(order) % 2 else None
+    return pairs, bye
+
+def _game_score(rng):
+    return rng.choice([(2, 0, 0), (2, 1, 0), (0, 2, 0), (1, 2, 0), (1, 1, 1), (1, 0, 0), (0, 0, 1)])
+
+def populate(conn, tournaments=100, players=64, rounds=6, seed=1):
+    """Fill an empty database with `tournaments` events of `players` players each."""
+    rng = random.Random(seed)
+    leader_ids = [row[0] for row in conn.execute("SELECT leader_id FROM leaders ORDER BY leader_id;")]
+    base_ids = [row[0] for row in conn.execute("SELECT base_id FROM bases ORDER BY base_id;")]
+    # A skewed meta: a few archetypes are much more popular than the rest
+    archetypes = [(leader, base) for leader in leader_ids for base in base_ids]
+    rng.shuffle(archetypes)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(archetypes))))
+
+    pool_size = max(players * 4, tournaments * players // 5)
+    conn.executemany("INSERT INTO players (player_id, name) VALUES (?, ?);",
+                     [(player_id, f"Player {player_id}") for player_id in range(1, pool_size + 1)])
+
+    deck_id = 0
+    decks, results, matches = [], [], []
+    for number in range(1, tournaments + 1):
+        event_date = START_DATE + timedelta(days=rng.randrange(0, 730))
+        level = rng.choices(LEVELS, weights=[8, 4, 2, 1])[0]
+        conn.execute(
+            "INSERT INTO tournaments (tournament_id, date, level, location, name, link) VALUES (?, ?, ?, ?, ?, ?);",
+            (number, event_date.isoformat(), level, "US", f"Synthetic {level} #{number}",
+             f"https://melee.gg/Tournament/View/{100000 + number}"),
+        )
+        entrants = rng.sample(range(1, pool_size + 1), players)
+        player_decks = {}
+        for player_id in entrants:
+            deck_id += 1
+            leader, base = rng.choices(archetypes, cum_weights=cum_weights)[0]
+            decks.append((deck_id, leader, base, f"https://melee.gg/Decklist/View/{deck_id}"))
+            player_decks[player_id] = deck_id
+
+        points = {player_id: 0 for player_id in entrants}
+        for round_number in range(1, rounds + 1):
+            pairs, bye = _swiss_round(rng, points)
+            for table, (player1, player2) in enumerate(pairs, start=1):
+                wins1, wins2, draws = _game_score(rng)
+                points[player1] += 3 if wins1 > wins2 else 1 if wins1 == wins2 else 0
+                points[player2] += 3 if wins2 > wins1 else 1 if wins1 == wins2 else 0
+                matches.append((number, round_number, table, player1, player2,
+                                player_decks[player1], player_decks[player2], wins1, wins2, draws))
+            if bye is not None:
+                points[bye] += 3
+                matches.append((number, round_number, None, bye, None, player_decks[bye], None, 2, 0, 0))
+
+        ranking = sorted(entrants, key=lambda player_id: (-points[player_id], rng.random()))
+        results.extend((number, player_decks[player_id], rank, player_id)
+                       for rank, player_id in enumerate(ranking, start=1))
+
+    conn.executemany("INSERT INTO decks (deck_id, leader_id, base_id, decklink) VALUES (?, ?, ?, ?);", decks)
+    conn.executemany("INSERT INTO results (tournament_id, deck_id, result, player_id) VALUES (?, ?, ?, ?);", results)
+    conn.executemany(
+        """
+        INSERT INTO matches (tournament_id, round, table_number, player1_id, player2_id,
+                             deck1_id, deck2_id, player1_wins, player2_wins, draws)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        matches,
+    )
+    conn.commit()
+
+def build_database(path, tournaments=100, players=64, rounds=6, seed=1):
+    """Create and populate a synthetic database; return the open connection."""
+    conn = create_database(path)
+    populate(conn, tournaments, players, rounds, seed)
+    return conn
+
+def swiss_rounds(players):
+    return max(3, math.ceil(math.log2(players)))
+
+def _deck_names():
+    # The leaders and bases of the seeded schema, as the decklist links name them
+    with closing(sqlite3.connect(":memory:")) as conn:
+        conn.executescript(BASE_SCHEMA.read_text(encoding="utf-8"))
+        leaders = [f"{name}, {subtitle}" for name, subtitle
+                   in conn.execute("SELECT name, subtitle FROM leaders ORDER BY leader_id;")]
+        bases = [name for (name,) in conn.execute("SELECT name FROM bases ORDER BY base_id;")]
+    return leaders, bases
+
+def _unaccented(text):
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+def _player_names(rng, count):
+    """Return {player number: (username, display name)} with unique usernames and display names."""
+    names, taken = {}, set()
+    for number in range(1, count + 1):
+        display = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        while display in taken:
+            display = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randrange(1000)}"
+        taken.add(display)
+        names[number] = (f"{_unaccented(display.split()[0]).lower()}{number}", display)
+    return names
+
+def _hub_spelling(rng, username, display):
+    # How a placement names a player: mostly the display name, sometimes another spelling of it
+    roll = rng.random()
+    if roll < 0.05:
+        return username
+    if roll < 0.08:
+        position = rng.randrange(len(display))
+        return display[:position] + "x" + display[position + 1:]
+    if roll < 0.2:
+        return rng.choice([display.upper(), display.lower(), _unaccented(display)])
+    return display
+
+def write_event(directory, melee_id, rng, entrants, names, decks, rounds):
+    """Write the pairings, standings and placements files of one Swiss event; return its standings rows."""
+    pairings = []
+    points = {player: 0 for player in entrants}
+    active = list(entrants)
+
+    for round_number in range(1, rounds + 1):
+        if round_number > 1:
+            active = [player for player in active if rng.random() > 0.02]  # Drops
+        standings = {player: points[player] for player in active}
+        pairs, bye = _swiss_round(rng, standings)
+        for table, (player1, player2) in enumerate(pairs, start=1):
+            wins1, wins2, draws = _game_score(rng)
+            points[player1] += 3 if wins1 > wins2 else 1 if wins1 == wins2 else 0
+            points[player2] += 3 if wins2 > wins1 else 1 if wins1 == wins2 else 0
+            pairings.append([round_number, table] + list(names[player1]) + list(names[player2])
+                            + list(decks[player1]) + list(decks[player2]) + [wins1, wins2, draws])
+        if bye is not None:
+            points[bye] += 3
+            pairings.append([round_number, ""] + list(names[bye]) + ["-", "-"]
+                            + list(decks[bye]) + ["-", "-", "-"] + [2, 0, 0])
+
+    with open(Path(directory) / f"{melee_id}_pairings.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(PAIRINGS_COLUMNS)
+        writer.writerows(pairings)
+
+    standings = standings_rows(PAIRINGS_COLUMNS, pairings)
+    top_cut = standings[:len(TOP_CUT)]
+    scraped = top_cut + [row for row in standings[len(TOP_CUT):] if rng.random() >= MISSING_STANDINGS]
+    with open(Path(directory) / f"{melee_id}_standings.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(STANDINGS_COLUMNS)
+        writer.writerows(scraped)
+
+    finishers = list(top_cut)
+    rng.shuffle(finishers)
+    with open(Path(directory) / f"{melee_id}_placements.txt", "w", encoding="utf-8") as f:
+        for placement, row in zip(TOP_CUT, finishers):
+            f.write(f"{placement}: {_hub_spelling(rng, row[1], row[2])}\n")
+    return scraped
+
+def write_events(directory, size="local", seed=1):
+    """Write the files of the `EVENT_SIZES[size]` events into `directory`.
+
+    Returns one dict per event with the `tournaments` row the Competitive Hub
+    scraper would have stored for it (melee_id, date, level, name, link) and
+    its number of players and rounds.
+    """
+    events, (fewest, most), days = EVENT_SIZES[size]
+    rng = random.Random(seed)
+    leaders, bases = _deck_names()
+    archetypes = [(leader, base) for leader in leaders for base in bases]
+    rng.shuffle(archetypes)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(archetypes))))
+    names = _player_names(rng, max(most * 2, events * (fewest + most) // 10))
+    pool = list(names)
+
+    written = []
+    deck_number = 0
+    for number in range(1, events + 1):
+        melee_id = 100000 + number
+        players = rng.randint(fewest, most)
+        rounds = swiss_rounds(players)
+        decks = {}
+        entrants = rng.sample(pool, players)
+        for player in entrants:
+            deck_number += 1
+            if rng.random() < NO_DECKLIST:
+                decks[player] = ("-", "-", "-")
+            else:
+                leader, base = rng.choices(archetypes, cum_weights=cum_weights)[0]
+                decks[player] = (leader, base, f"https://melee.gg/Decklist/View/{deck_number}")
+        write_event(directory, melee_id, rng, entrants, names, decks, rounds)
+        level = "GC" if players >= 5000 else rng.choices(LEVELS[:3], weights=[8, 4, 2])[0]
+        written.append({
+            "melee_id": melee_id,
+            "date": (START_DATE + timedelta(days=rng.randrange(days))).isoformat(),
+            "level": level,
+            "name": f"Synthetic {level} #{number}",
+            "link": f"https://melee.gg/Tournament/View/{melee_id}",
+            "players": players,
+            "rounds": rounds,
+        })
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a synthetic SWU stats database.")
+    parser.add_argument("db", nargs="?", help="Database file to create (must not exist)")
+    parser.add_argument("--tournaments", type=int, default=100)
+    parser.add_argument("--players", type=int, default=64, help="Players per tournament")
+    parser.add_argument("--rounds", type=int, default=6, help="Swiss rounds per tournament")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--files", help="Write standings, pairings and placements files into this folder instead")
+    parser.add_argument("--size", choices=EVENT_SIZES, default="local", help="Events written with --files")
+    args = parser.parse_args()
+
+    if args.files:
+        Path(args.files).mkdir(parents=True, exist_ok=True)
+        events = write_events(args.files, args.size, args.seed)
+        print(f"{len(events)} events, {sum(event['players'] for event in events)} players written to {args.files}")
+        sys.exit(0)
+    if args.db is None:
+        parser.error("a database file or --files is required")
+    if Path(args.db).exists():
+        print(f"{args.db} already exists.")
+        sys.exit(1)
+    with closing(build_database(args.db, args.tournaments, args.players, args.rounds, args.seed)) as conn:
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+                  for table in ("tournaments", "players", "decks", "results", "matches")}
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
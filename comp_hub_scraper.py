@@ -6,7 +6,10 @@ scrapes the tournament pages for results, and saves the data into a SQLite datab
 It also downloads the Melee.gg links for each tournament and saves the results in text files.
 Usage
 -------
-    python comp_hub_scraper.py [--date YYYY-MM-DD] [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+    python comp_hub_scraper.py [--date YYYY-MM-DD] [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD] [--incremental]
+                               [--workers N] [--engine selenium|http] [--cache [melee_cache.db]]
+                               [--http-cache http_cache.db | --no-http-cache]
+                               [--crawl-concurrency N] [--crawl-rate R] [--parser html.parser|lxml|stream]
 
 If `--date` is specified, it scrapes tournaments for that specific date.
 If `--start-date` is specified, it scrapes tournaments from that date onwards.
@@ -14,58 +17,116 @@ If `--end-date` is specified, it scrapes tournaments up to that date.
 If both `--start-date` and `--end-date` are specified, it scrapes tournaments within that range.
 
 If no arguments are provided, it scrapes all tournaments listed on the SWU Competitive Hub website.
+
+With `--incremental` only tournaments the previous runs haven't seen are processed.
+The processed hub links and a high-water mark (the newest listing date) are kept
+in the database (tables created by `python migrate.py`). The listing is ordered
+newest first, so parsing stops at the first row older than the high-water mark
+minus `INCREMENTAL_OVERLAP_DAYS`. Tournaments whose Melee standings were saved as
+`_standings_incomplete.csv` are queued again; once the final standings are
+scraped, the stale incomplete file is removed.
+
+With `--workers N` the tournaments are spread over N worker processes. Each worker
+keeps its own HTTP session and Melee session (one browser for all of its
+tournaments); all SQLite writes stay in the main process. A throughput summary is printed at the end of every run.
+
+With `--cache` the Melee scrapes checkpoint every table page (see scrape_cache.py),
+so rerunning after a crash resumes the interrupted tournament where it stopped.
+
+Hub pages are fetched through a persistent HTTP cache (see http_cache.py): the
+results listing is revalidated with a conditional request on every run and
+tournament pages are reused for a week, so a daily run only downloads new or
+changed pages. Hit/miss counters are part of the run summary.
+
+With `--crawl-concurrency N` all tournament pages are fetched up front by the
+asynchronous crawler in hub_crawler.py (N requests in flight, at most
+`--crawl-rate` requests per second, 429/5xx answers retried with backoff) instead
+of one at a time; the Melee scraping and database writes are unchanged.
+
+`--parser` picks the HTML parsing backend for the hub pages (see hub_parsers.py):
+`lxml` and `stream` only read the tables and link that are needed and are much
+faster than the default `html.parser` on large listing pages.
+
+Listing locations are converted to ISO2 codes by `locations.LocationNormalizer`,
+which keeps the codes it has looked up in the `country_codes` table, so
+country_converter is only loaded when a location appears for the first time.
 """
+# requests, BeautifulSoup (through melee_http and http_cache), tqdm and the process
+# pool are imported where they are used, so `--help` starts without them
 import argparse
 import os
-import requests
-import country_converter as coco
-from bs4 import BeautifulSoup
+import sys
+import time
+import hub_parsers
+from locations import LocationNormalizer
 import melee_scraper
+import scrape_cache
 import sqlite3
-from datetime import datetime
-from tqdm import tqdm
+from datetime import datetime, timedelta
 
 BASE_URL = "https://www.swu-competitivehub.com/tournaments-results/"
 
+# Hub rows sometimes appear a few days after the event; re-read this many days below the high-water mark
+INCREMENTAL_OVERLAP_DAYS = 14
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Scrape SWU tournaments by date.")
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--date", type=str, help="Scrape tournaments for a specific date (YYYY-MM-DD)")
+    group.add_argument("--incremental", action="store_true",
+                       help="Only scrape tournaments not seen by previous runs, and retry incomplete ones")
     group2 = parser.add_argument_group("date range")
     group2.add_argument("--start-date", type=str, help="Earliest date to scrape (YYYY-MM-DD)")
     group2.add_argument("--end-date", type=str, help="Last date to scrape (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes scraping tournaments in parallel")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium", help="Melee scraping engine (see melee_scraper.py)")
+    parser.add_argument("--cache", nargs="?", const=scrape_cache.DEFAULT_CACHE, default=None,
+                        help=f"Checkpoint Melee pages in this cache file (default: {scrape_cache.DEFAULT_CACHE})")
+    parser.add_argument("--http-cache", default="http_cache.db",
+                        help="HTTP response cache file (default: http_cache.db)")
+    parser.add_argument("--no-http-cache", dest="http_cache", action="store_const", const=None,
+                        help="Always download every page")
+    parser.add_argument("--crawl-concurrency", type=int, default=0,
+                        help="Fetch the tournament pages up front with this many concurrent requests (see hub_crawler.py)")
+    parser.add_argument("--crawl-rate", type=float, default=5.0,
+                        help="Hub requests per second while crawling, 0 for no limit (default: 5)")
+    parser.add_argument("--parser", choices=hub_parsers.PARSERS, default=hub_parsers.DEFAULT_PARSER,
+                        help=f"HTML parsing backend for hub pages (default: {hub_parsers.DEFAULT_PARSER})")
     return parser.parse_args()
 
-def fetch_tournament_links(url=BASE_URL, date=None, start_date=None, end_date=None):
+def fetch_tournament_links(url=BASE_URL, date=None, start_date=None, end_date=None, session=None, stop_before=None,
+                           parser=hub_parsers.DEFAULT_PARSER, normalize=None):
     # Convert start_date and end_date to datetime.date if they are not None
     if start_date:
         start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
     if end_date:
         end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-    response = requests.get(url)
+    if session is None:
+        import requests
+        session = requests
+    response = session.get(url)
     response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-    tournament_links = []
-
-    table = soup.find("table", id="tableTournaments")
-    if not table:
-        return tournament_links
+    return parse_tournament_links(response.text, date, start_date, end_date, stop_before, parser, normalize)
 
-    tbody = table.find("tbody")
-    if not tbody:
-        return tournament_links
+def parse_tournament_links(html, date=None, start_date=None, end_date=None, stop_before=None,
+                           parser=hub_parsers.DEFAULT_PARSER, normalize=None):
+    """Return the rows of the results listing that pass the date filters (dates as datetime.date)."""
+    # Without a database the country codes are only remembered for this listing
+    normalize = normalize or LocationNormalizer()
+    tournament_links = []
 
-    for row in tbody.find_all("tr"):
-        cols = row.find_all("td")
+    for cols in hub_parsers.listing_rows(html, parser):
         if len(cols) < 2:
             continue
-        row_date = cols[0].get_text(strip=True)
-        row_name = cols[1].get_text(strip=True)
-        row_location = cols[3].find("img")["alt"] if cols[2].find("img") else ""
+        row_date = cols[0].text
+        if stop_before and row_date < stop_before:
+            # Rows are listed newest first: everything below was handled by earlier runs
+            break
+        row_name = cols[1].text
+        row_location = cols[3].img if cols[2].img is not None else ""
         # convert location to iso2 format
-        cc = coco.CountryConverter()
-        row_location = cc.convert(names=row_location, to="ISO2")
-        row_level = cols[4].get_text(strip=True)
+        row_location = normalize(row_location)
+        row_level = cols[4].text
 
         # Date filtering logic
         if date:
@@ -79,81 +140,292 @@ def fetch_tournament_links(url=BASE_URL, date=None, start_date=None, end_date=No
                 continue
             if end_date and current_date > end_date:
                 continue
-        link_tag = cols[1].find("a", href=True)
-        if link_tag:
-            link = link_tag["href"]
+        if cols[1].href is not None:
+            link = cols[1].href
             if not link.startswith("http"):
                 link = "https://www.swu-competitivehub.com" + link
             tournament_links.append({"link": link, "date": row_date, "name": row_name, "location": row_location, "level": row_level})
 
     return tournament_links
 
-def scrape_tournament_page(url):
-    response = requests.get(url)
+def scrape_tournament_page(url, session=None, parser=hub_parsers.DEFAULT_PARSER):
+    if session is None:
+        import requests
+        session = requests
+    response = session.get(url)
     response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_tournament_page(response.text, parser)
 
-    # Get the href with id "link_text-238-135"
-    melee_link_tag = soup.find("a", id="link_text-238-135")
-    melee_link = melee_link_tag["href"] if melee_link_tag else None
+def parse_tournament_page(html, parser=hub_parsers.DEFAULT_PARSER):
+    """Return the Melee link and the placements of a hub tournament page."""
+    # The href with id "link_text-238-135" and the rows of the table with id "tableResults"
+    melee_link, rows = hub_parsers.tournament_page(html, parser)
 
-    # Get results from table with id "tableResults"
     results = []
-    table = soup.find("table", id="tableResults")
-    if table:
-        tbody = table.find("tbody")
-        if tbody:
-            for row in tbody.find_all("tr"):
-                cols = row.find_all("td")
-                if len(cols) >= 4:
-                    placement = cols[0].get_text(strip=True)
-                    player = cols[3].get_text(strip=True)
-                    results.append({"placement": placement, "player": player})
+    for cols in rows:
+        if len(cols) >= 4:
+            placement = cols[0].text
+            player = cols[3].text
+            results.append({"placement": placement, "player": player})
 
     return {"melee_link": melee_link, "results": results}
 
-if __name__ == "__main__":
-    args = parse_args()
-    links = fetch_tournament_links(
-        date=args.date,
-        start_date=args.start_date,
-        end_date=args.end_date
-    )
-    linkNumber = 1
-    totalNumber = len(links)
-    conn = sqlite3.connect("swu_meta.db")
+def save_tournament(conn, link, data, link_number, total_number):
+    # All database writes happen here, in the main process
     cursor = conn.cursor()
+    filename = data['melee_link'].split("/")[-1] + "_placements.txt"
+    if not os.path.exists(filename):
+        # Add tournament information to sqlite database
+        # We'll assume your DB identifies a tournament uniquely by date+name+location+level
+        cursor.execute("""
+        SELECT tournament_id
+        FROM tournaments
+        WHERE date = ? AND name = ?
+        """, (link['date'], link['name']))
 
-    for link in tqdm(links, desc="Tournaments", unit="tournament", bar_format='{l_bar}{bar:30}{r_bar}{bar:-30b}'):
-        data = scrape_tournament_page(link["link"])
-        filename = data['melee_link'].split("/")[-1] + "_placements.txt"
-        if not os.path.exists(filename):
-            # Add tournament information to sqlite database
-            # We'll assume your DB identifies a tournament uniquely by date+name+location+level
+        if cursor.fetchone() is None:
+            # Insert new tournament
+            print(f" Processing {link_number}/{total_number}: {link['name']} on {link['date']}")
             cursor.execute("""
-            SELECT tournament_id
-            FROM tournaments
-            WHERE date = ? AND name = ?
-            """, (link['date'], link['name']))
-
-            if cursor.fetchone() is None:
-                # Insert new tournament
-                print(f" Processing {linkNumber}/{totalNumber}: {link['name']} on {link['date']}")
-                cursor.execute("""
-                INSERT INTO tournaments (date, level, location, name, link)
-                VALUES (?, ?, ?, ?, ?)
-                """, (link['date'], link['level'], link['location'], link['name'], data['melee_link']))
-                conn.commit()
-
-            with open(filename, "w", encoding="utf-8") as f:
-                for result in data["results"]:
-                    if result['placement'] and result['player']:
-                        # Write each placement to the file
-                        f.write(f"{result['placement']}: {result['player']}\n")
-
-        if (data['melee_link'] and (data["melee_link"].startswith("https://melee.gg/") or data["melee_link"].startswith("https://www.melee.gg/"))):
-            output_file = f"{data['melee_link'].split('/')[-1]}_standings.csv"
-            if not os.path.exists(output_file) and not os.path.exists(f"{data['melee_link'].split('/')[-1]}_standings_incomplete.csv"):
-                melee_scraper.scrape_tournament(data['melee_link'])
+            INSERT INTO tournaments (date, level, location, name, link)
+            VALUES (?, ?, ?, ?, ?)
+            """, (link['date'], link['level'], link['location'], link['name'], data['melee_link']))
+            conn.commit()
+
+        with open(filename, "w", encoding="utf-8") as f:
+            for result in data["results"]:
+                if result['placement'] and result['player']:
+                    # Write each placement to the file
+                    f.write(f"{result['placement']}: {result['player']}\n")
+
+def has_melee_link(data):
+    return bool(data['melee_link'] and (data["melee_link"].startswith("https://melee.gg/") or data["melee_link"].startswith("https://www.melee.gg/")))
+
+def melee_complete(data):
+    # Nothing left to scrape once the final standings exist (or there is no Melee event)
+    return not has_melee_link(data) or os.path.exists(f"{data['melee_link'].split('/')[-1]}_standings.csv")
+
+def scrape_melee_results(data, melee, retry_incomplete=False):
+    if has_melee_link(data):
+        output_file = f"{data['melee_link'].split('/')[-1]}_standings.csv"
+        incomplete_file = f"{data['melee_link'].split('/')[-1]}_standings_incomplete.csv"
+        if not os.path.exists(output_file) and (retry_incomplete or not os.path.exists(incomplete_file)):
+            melee.scrape(data['melee_link'])
+            if os.path.exists(output_file) and os.path.exists(incomplete_file):
+                # The event has finished since the last run, drop the stale partial standings
+                os.remove(incomplete_file)
+    else:
+        print(f" Invalid Melee link: {data['melee_link']}")
+
+def load_hub_state(conn):
+    """Return the high-water date (or None), the processed hub links and the links to retry."""
+    row = conn.execute("SELECT value FROM hub_state WHERE key = 'high_water_date'").fetchone()
+    high_water = row[0] if row else None
+    seen = {link for (link,) in conn.execute("SELECT link FROM hub_links")}
+    retry = [
+        {"link": link, "date": date, "name": name, "location": location, "level": level}
+        for link, date, name, location, level in conn.execute(
+            "SELECT link, date, name, location, level FROM hub_links WHERE complete = 0 ORDER BY date"
+        )
+    ]
+    return high_water, seen, retry
+
+def save_hub_link(conn, link, data):
+    conn.execute("""
+    INSERT OR REPLACE INTO hub_links (link, date, name, location, level, melee_link, complete, processed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (link['link'], link['date'], link['name'], link['location'], link['level'], data['melee_link'],
+          int(melee_complete(data)), datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+
+def save_high_water_mark(conn, high_water):
+    conn.execute("INSERT OR REPLACE INTO hub_state (key, value) VALUES ('high_water_date', ?)", (high_water,))
+    conn.commit()
+
+def incremental_links(conn, session, start_date=None, end_date=None, parser=hub_parsers.DEFAULT_PARSER,
+                      normalize=None):
+    """Return the listing rows newer than the previous runs plus the incomplete tournaments to retry."""
+    high_water, seen, retry = load_hub_state(conn)
+    stop_before = None
+    if high_water:
+        stop_before = (datetime.strptime(high_water, "%Y-%m-%d").date() - timedelta(days=INCREMENTAL_OVERLAP_DAYS)).isoformat()
+    listed = fetch_tournament_links(start_date=start_date, end_date=end_date, session=session, stop_before=stop_before,
+                                    parser=parser, normalize=normalize)
+    new_links = [link for link in listed if link["link"] not in seen]
+    queued = {link["link"] for link in new_links}
+    retry = [link for link in retry if link["link"] not in queued]
+    print(f"Incremental run: {len(new_links)} new tournaments since {stop_before or 'the beginning'}, "
+          f"{len(retry)} incomplete to retry")
+    return new_links + retry
+
+def next_high_water_mark(high_water, processed_links, failed_links):
+    # Never move the mark past a tournament that failed, so the next run lists it again
+    dates = [link["date"] for link in processed_links]
+    if high_water:
+        dates.append(high_water)
+    if not dates:
+        return None
+    mark = max(dates)
+    if failed_links:
+        mark = min([mark] + [link["date"] for link in failed_links])
+    return mark
+
+# Per-process state of the pool workers
+_worker_session = None
+_worker_melee = None
+_worker_http_cache = None
+_worker_retry_incomplete = False
+_worker_parser = hub_parsers.DEFAULT_PARSER
+
+def _init_worker(engine, cache_path=None, http_cache_path=None, retry_incomplete=False,
+                 parser=hub_parsers.DEFAULT_PARSER):
+    from multiprocessing.util import Finalize
+    import http_cache
+    import melee_http
+    global _worker_session, _worker_melee, _worker_http_cache, _worker_retry_incomplete, _worker_parser
+    _worker_retry_incomplete = retry_incomplete
+    _worker_parser = parser
+    if http_cache_path:
+        _worker_http_cache = http_cache.HttpCache(http_cache_path)
+        Finalize(_worker_http_cache, _worker_http_cache.close, exitpriority=5)
+    _worker_session = melee_http.create_session(cache=_worker_http_cache)
+    cache = scrape_cache.PageCache(cache_path) if cache_path else None
+    # One browser (or HTTP session) per worker, reused for all of its tournaments
+    _worker_melee = melee_scraper.MeleeSession(engine=engine, http_session=_worker_session, cache=cache)
+    # Pool workers don't run atexit handlers, multiprocessing finalizers do
+    Finalize(_worker_melee, _worker_melee.close, exitpriority=10)
+    if cache is not None:
+        Finalize(cache, cache.close, exitpriority=5)
+
+def _process_tournament(link, data=None):
+    # Runs in a worker process: fetch the hub page (unless it was crawled) and scrape Melee, but never touch the database
+    before = _worker_http_cache.counters() if _worker_http_cache else {}
+    if data is None:
+        data = scrape_tournament_page(link["link"], _worker_session, _worker_parser)
+    scrape_melee_results(data, _worker_melee, _worker_retry_incomplete)
+    # Report this task's share of the worker's cache counters to the main process
+    after = _worker_http_cache.counters() if _worker_http_cache else {}
+    return data, {name: after[name] - before[name] for name in after}
+
+def crawl_tournament_pages(links, concurrency, rate, cache=None, parser=hub_parsers.DEFAULT_PARSER):
+    """Fetch the tournament pages of `links` concurrently; return the parsed pages by link and the failed links."""
+    import hub_crawler
+    crawler = hub_crawler.HubCrawler(concurrency=concurrency, rate=rate, cache=cache, parser=parser)
+    pages = {}
+    failed = []
+    for link, data, error in crawler.crawl(links):
+        if error is not None:
+            print(f" Failed {link['name']} on {link['date']}: {error}")
+            failed.append(link)
         else:
-            print(f" Invalid Melee link: {data['melee_link']}")
+            pages[link["link"]] = data
+    print(f"Crawled {len(pages)} tournament pages ({crawler.stats()})")
+    return pages, failed
+
+def run_serial(conn, links, engine, session, cache_path=None, incremental=False, pages=None,
+               parser=hub_parsers.DEFAULT_PARSER):
+    from tqdm import tqdm
+    cache = scrape_cache.PageCache(cache_path) if cache_path else None
+    processed = []
+    failed = []
+    with melee_scraper.MeleeSession(engine=engine, http_session=session, cache=cache) as melee:
+        for link in tqdm(links, desc="Tournaments", unit="tournament", bar_format='{l_bar}{bar:30}{r_bar}{bar:-30b}'):
+            # Same steps and failure handling as a pool worker: nothing is saved for a failed tournament
+            try:
+                if pages is not None:
+                    data = pages[link["link"]]
+                else:
+                    data = scrape_tournament_page(link["link"], session, parser)
+                scrape_melee_results(data, melee, retry_incomplete=incremental)
+            except Exception as e:
+                print(f" Failed {link['name']} on {link['date']}: {e}")
+                failed.append(link)
+                continue
+            processed.append(link)
+            save_tournament(conn, link, data, len(processed), len(links))
+            if incremental:
+                save_hub_link(conn, link, data)
+    if cache is not None:
+        cache.close()
+    return processed, failed
+
+def run_pool(conn, links, engine, workers, cache_path=None, http_cache_path=None, http_counters=None,
+             incremental=False, pages=None, parser=hub_parsers.DEFAULT_PARSER):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from tqdm import tqdm
+    processed = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(engine, cache_path, http_cache_path, incremental, parser)) as pool:
+        futures = {pool.submit(_process_tournament, link, (pages or {}).get(link["link"])): link for link in links}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Tournaments", unit="tournament", bar_format='{l_bar}{bar:30}{r_bar}{bar:-30b}'):
+            link = futures[future]
+            try:
+                data, counters = future.result()
+            except Exception as e:
+                print(f" Failed {link['name']} on {link['date']}: {e}")
+                failed.append(link)
+                continue
+            processed.append(link)
+            if http_counters is not None:
+                for name, count in counters.items():
+                    http_counters[name] += count
+            save_tournament(conn, link, data, len(processed), len(links))
+            if incremental:
+                save_hub_link(conn, link, data)
+    return processed, failed
+
+if __name__ == "__main__":
+    args = parse_args()
+    import http_cache
+    import melee_http
+    cache = http_cache.HttpCache(args.http_cache) if args.http_cache else None
+    session = melee_http.create_session(cache=cache)
+    conn = sqlite3.connect("swu_meta.db")
+    # Country codes seen by earlier runs come from the database (see locations.py)
+    normalize = LocationNormalizer(conn)
+    if args.incremental:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='hub_links'").fetchone() is None:
+            print("The hub_links table is missing, run migrate.py first.")
+            sys.exit(1)
+        high_water = load_hub_state(conn)[0]
+        links = incremental_links(conn, session, args.start_date, args.end_date, args.parser, normalize)
+    else:
+        links = fetch_tournament_links(
+            date=args.date,
+            start_date=args.start_date,
+            end_date=args.end_date,
+            session=session,
+            parser=args.parser,
+            normalize=normalize
+        )
+
+    start_time = time.perf_counter()
+    pages = None
+    crawl_failed = []
+    if args.crawl_concurrency > 0:
+        pages, crawl_failed = crawl_tournament_pages(links, args.crawl_concurrency, args.crawl_rate, cache, args.parser)
+        links = [link for link in links if link["link"] in pages]
+    if args.workers > 1:
+        # Workers open the cache file themselves and report their counters per tournament
+        http_counters = cache.counters() if cache else None
+        processed, failed = run_pool(conn, links, args.engine, args.workers, args.cache, args.http_cache, http_counters,
+                                     args.incremental, pages, args.parser)
+    else:
+        processed, failed = run_serial(conn, links, args.engine, session, args.cache, args.incremental, pages,
+                                       args.parser)
+        http_counters = cache.counters() if cache else None
+    failed += crawl_failed
+    elapsed = time.perf_counter() - start_time
+    if args.incremental:
+        mark = next_high_water_mark(high_water, processed, failed)
+        if mark:
+            save_high_water_mark(conn, mark)
+    conn.close()
+    session.close()
+
+    rate = len(processed) / elapsed * 60 if elapsed > 0 else 0
+    print(f"Processed {len(processed)} tournaments ({len(failed)} failed) in {elapsed:.1f}s - {rate:.1f} tournaments/min")
+    if cache is not None:
+        print(f"HTTP cache: {cache.stats(http_counters)}")
+        cache.close()
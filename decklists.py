@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""decklists.py
+Expand the decklists linked from the standings into the `cards` and `deck_cards` tables.
+`fetch` reads every distinct `decks.decklink` that hasn't been expanded yet, once
+per link however many decks share it, with the concurrent, rate limited
+`HubCrawler` of hub_crawler.py. With `--http-cache` the pages are kept in the
+HTTP cache (see http_cache.py, decklists are kept for 30 days), so a rerun
+doesn't download them again. The card list of every page is hashed: decks with
+an identical list share one set of `deck_cards` rows (see the `decklists` table
+and the `all_deck_cards` view of migration 0006), and `decks.content_hash` marks
+the deck as done. Pages without a card list are left for the next run.
+
+`--fixtures DIR` reads `DIR/<decklist id>.html` files instead of fetching, so the
+parsing and loading can be checked offline against stored pages.
+
+`query` answers card-inclusion questions ("how many top-8 decks ran card X")
+from `CardIndex`, an in-memory inverted index from every card to the distinct
+decklists containing it, and from those to the results they were played in.
+
+Decklist pages are read from Melee's decklist markup: section titles
+(`decklist-category-title`, e.g. "Ground Units (12)") followed by records with
+a quantity (`decklist-record-quantity`) and a card name
+(`decklist-record-name`). Pages without it are read as a plain text export, one
+"3 Card Name" line per card under section title lines. Cards are named
+"Name, Subtitle" or "Name | Subtitle"; a "Sideboard" section holds the
+sideboard.
+Usage
+-------
+    python decklists.py fetch [--db swu_meta.db] [--concurrency N] [--rate R] [--http-cache [FILE]]
+                              [--fixtures DIR] [--limit N]
+    python decklists.py query CARD [CARD ...] [--db swu_meta.db] [--top 8] [--sideboard]
+                              [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from html import unescape
+
+import numpy as np
+
+DEFAULT_DB = "swu_meta.db"
+COMMIT_EVERY = 500  # Decklists written per transaction
+
+_section_count = re.compile(r"\s*\(\d+\)\s*$")
+_card_line = re.compile(r"^(\d+)\s*x?\s+(.+)$")
+# The decklist elements are leaves apart from inline markup, so their text ends at the element's end tag
+_field = re.compile(r'<(\w+)[^>]*\bclass="[^"]*\bdecklist-(category-title|record-quantity|record-name)\b[^"]*"[^>]*>'
+                    r'(.*?)</\1\s*>', re.S)
+_export = re.compile(r"<(textarea|pre)\b[^>]*>(.*?)</\1\s*>", re.S | re.I)
+_tag = re.compile(r"<[^>]*>")
+
+def page_records(body):
+    """Return the (section, quantity, name) records of Melee's decklist markup."""
+    records = []
+    section = ""
+    quantity = None
+    for _, field, inner in _field.findall(body):
+        text = " ".join(unescape(_tag.sub("", inner)).split())
+        if field == "category-title":
+            section = _section_count.sub("", text)
+        elif field == "record-quantity":
+            quantity = int(text) if text.isdigit() else None
+        elif quantity is not None and text:
+            records.append((section, quantity, text))
+            quantity = None
+    return records
+
+def parse_text(text):
+    """Return the (section, quantity, name) records of a plain text decklist export."""
+    records = []
+    section = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _card_line.match(line)
+        if match:
+            records.append((section, int(match.group(1)), match.group(2).strip()))
+        else:
+            section = _section_count.sub("", line.rstrip(":"))
+    return records
+
+def split_card_name(name):
+    for separator in (" | ", ", "):
+        if separator in name:
+            title, subtitle = name.split(separator, 1)
+            return title.strip(), subtitle.strip()
+    return name.strip(), None
+
+def parse_decklist(body):
+    """Return the cards of a decklist page as sorted (name, subtitle, type, count, sideboard) tuples."""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    records = (page_records(body)
+               or parse_text("\n".join(unescape(text) for _, text in _export.findall(body)))
+               or parse_text(body if "<" not in body else ""))
+    cards = {}
+    for section, quantity, name in records:
+        sideboard = int(section.lower().startswith("sideboard"))
+        title, subtitle = split_card_name(name)
+        card_type = "Card" if sideboard or not section else section
+        key = (title, subtitle, sideboard)
+        if key in cards:
+            cards[key][1] += quantity
+        else:
+            cards[key] = [card_type, quantity]
+    return sorted((title, subtitle, card_type, count, sideboard)
+                  for (title, subtitle, sideboard), (card_type, count) in cards.items())
+
+def content_hash(cards):
+    """Hash of a card list; the card types don't take part, so a list hashes the same however it was sectioned."""
+    digest = hashlib.sha1()
+    for title, subtitle, _, count, sideboard in sorted(cards, key=lambda card: (card[4], card[0], card[1] or "")):
+        digest.update(f"{sideboard}\t{count}\t{title}\t{subtitle or ''}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def fixture_name(link):
+    return link.rstrip("/").split("/")[-1] + ".html"
+
+def read_fixtures(directory, links):
+    """Same (link, cards, error) results as the crawler, from `<decklist id>.html` files."""
+    for link in links:
+        try:
+            with open(os.path.join(directory, fixture_name(link["link"])), "rb") as f:
+                yield link, parse_decklist(f.read()), None
+        except Exception as e:
+            yield link, None, e
+
+def pending_decklinks(conn, limit=None):
+    """Return (decklink, [deck ids]) of every link with decks that haven't been expanded yet."""
+    rows = conn.execute(
+        """
+        SELECT decklink, group_concat(deck_id) FROM decks
+         WHERE content_hash IS NULL AND decklink LIKE 'http%'
+         GROUP BY decklink ORDER BY MIN(deck_id)
+        """ + ("" if limit is None else f" LIMIT {int(limit)}")
+    ).fetchall()
+    return [(link, sorted(int(deck_id) for deck_id in deck_ids.split(","))) for link, deck_ids in rows]
+
+class DecklistStore:
+    """Writes parsed decklists to `cards`/`deck_cards`, one set of rows per distinct card list."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.cards = {(name, subtitle): card_id
+                      for card_id, name, subtitle in conn.execute("SELECT card_id, name, subtitle FROM cards")}
+        self.lists = dict(conn.execute("SELECT content_hash, deck_id FROM decklists"))
+        self.stored = 0  # New card lists
+        self.shared = 0  # Decks whose list was already stored
+        self.decks = 0
+
+    def card_id(self, name, subtitle, card_type):
+        key = (name, subtitle)
+        if key not in self.cards:
+            self.cards[key] = self.conn.execute("INSERT INTO cards (name, subtitle, type) VALUES (?, ?, ?)",
+                                                (name, subtitle, card_type)).lastrowid
+        return self.cards[key]
+
+    def store(self, deck_ids, cards):
+        # Uncommitted; the caller commits every COMMIT_EVERY decklists
+        digest = content_hash(cards)
+        if digest in self.lists:
+            self.shared += len(deck_ids)
+        else:
+            owner = deck_ids[0]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO deck_cards (deck_id, card_id, count, sideboard) VALUES (?, ?, ?, ?)",
+                [(owner, self.card_id(name, subtitle, card_type), count, sideboard)
+                 for name, subtitle, card_type, count, sideboard in cards])
+            self.conn.execute("INSERT INTO decklists (content_hash, deck_id, cards) VALUES (?, ?, ?)",
+                              (digest, owner, sum(card[3] for card in cards)))
+            self.lists[digest] = owner
+            self.stored += 1
+            self.shared += len(deck_ids) - 1
+        self.conn.executemany("UPDATE decks SET content_hash = ? WHERE deck_id = ?",
+                              [(digest, deck_id) for deck_id in deck_ids])
+        self.decks += len(deck_ids)
+
+def ingest(conn, results, deck_ids):
+    """Store the (link, cards, error) results of a crawl; return the links that failed."""
+    store = DecklistStore(conn)
+    failed = []
+    written = 0
+    for link, cards, error in results:
+        if error is None and not cards:
+            error = ValueError("no cards found")
+        if error is not None:
+            failed.append((link["link"], error))
+            continue
+        store.store(deck_ids[link["link"]], cards)
+        written += 1
+        if written % COMMIT_EVERY == 0:
+            conn.commit()
+    conn.commit()
+    return store, failed
+
+def fetch(conn, concurrency, rate, cache=None, fixtures=None, limit=None):
+    pending = pending_decklinks(conn, limit)
+    deck_ids = dict(pending)
+    links = [{"link": link} for link, _ in pending]
+    if fixtures is not None:
+        return ingest(conn, read_fixtures(fixtures, links), deck_ids)
+
+    from hub_crawler import HubCrawler  # httpx is only needed when fetching
+
+    class DecklistCrawler(HubCrawler):
+        label = "Decklists"
+
+        def parse(self, body):
+            return parse_decklist(body)
+
+    crawler = DecklistCrawler(concurrency=concurrency, rate=rate, cache=cache)
+    store, failed = ingest(conn, crawler.crawl(links), deck_ids)
+    print(f"Crawler: {crawler.stats()}")
+    return store, failed
+
+class CardIndex:
+    """Inverted index from cards to the distinct decklists containing them, and to their results.
+
+    Decklists are dense integer codes; every card has the sorted codes of the
+    lists with it in the main deck and in the sideboard, and every result row
+    the code of its deck's list (-1 if it wasn't expanded). A query intersects
+    the code arrays of its cards and masks the results with them.
+    """
+    def __init__(self, conn):
+        codes = {}
+        main = {}
+        side = {}
+        for content_hash, card_id, sideboard in conn.execute(
+                "SELECT l.content_hash, dc.card_id, dc.sideboard FROM decklists l "
+                "JOIN deck_cards dc ON dc.deck_id = l.deck_id ORDER BY l.content_hash"):
+            code = codes.setdefault(content_hash, len(codes))
+            (side if sideboard else main).setdefault(card_id, []).append(code)
+        self.lists = len(codes)
+        self.main = {card_id: np.unique(np.array(found, dtype=np.int64)) for card_id, found in main.items()}
+        self.side = {card_id: np.unique(np.array(found, dtype=np.int64)) for card_id, found in side.items()}
+        self.names = {}
+        for card_id, name, subtitle in conn.execute("SELECT card_id, name, subtitle FROM cards"):
+            for key in ({name.lower(), f"{name}, {subtitle}".lower()} if subtitle else {name.lower()}):
+                self.names.setdefault(key, []).append(card_id)
+
+        rows = conn.execute(
+            "SELECT r.result, COALESCE(t.date, ''), d.content_hash FROM results r "
+            "JOIN tournaments t ON t.tournament_id = r.tournament_id "
+            "LEFT JOIN decks d ON d.deck_id = r.deck_id").fetchall()
+        self.placement = np.array([row[0] for row in rows], dtype=np.int64)
+        self.date = np.array([row[1] for row in rows], dtype=str)
+        self.list = np.array([codes.get(row[2], -1) for row in rows], dtype=np.int64)
+
+    def card_ids(self, name):
+        """Ids of the cards called "Name" or "Name, Subtitle" (any case)."""
+        return self.names.get(name.strip().lower(), [])
+
+    def lists_with(self, names, sideboard=False):
+        """Codes of the decklists containing every one of `names` (in the main deck, or anywhere)."""
+        found = None
+        for name in names:
+            postings = [self.main.get(card_id) for card_id in self.card_ids(name)]
+            if sideboard:
+                postings += [self.side.get(card_id) for card_id in self.card_ids(name)]
+            postings = [codes for codes in postings if codes is not None]
+            codes = np.unique(np.concatenate(postings)) if postings else np.array([], dtype=np.int64)
+            found = codes if found is None else np.intersect1d(found, codes, assume_unique=True)
+        return found if found is not None else np.array([], dtype=np.int64)
+
+    def query(self, names, top=8, sideboard=False, start_date=None, end_date=None):
+        """Count the results, and the top `top` finishes, played with and without the cards."""
+        mask = self.list >= 0
+        if start_date:
+            mask &= self.date >= start_date
+        if end_date:
+            mask &= self.date <= end_date
+        with_cards = mask & np.isin(self.list, self.lists_with(names, sideboard))
+        in_top = self.placement <= top
+        return {
+            "decklists": int(len(self.lists_with(names, sideboard))),
+            "results": int(mask.sum()),
+            "results_with": int(with_cards.sum()),
+            "top": int((mask & in_top).sum()),
+            "top_with": int((with_cards & in_top).sum()),
+        }
+
+def _share(part, whole):
+    return f"{100 * part / whole:.1f}%" if whole else "-"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expand decklists into cards and query card inclusion.")
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = commands.add_parser("fetch", parents=[database], help="Fetch and store the card lists of new decks")
+    fetch_parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight (default: 8)")
+    fetch_parser.add_argument("--rate", type=float, default=5.0, help="Requests per second (default: 5)")
+    fetch_parser.add_argument("--http-cache", nargs="?", const="http_cache.db", default=None,
+                              help="Keep the pages in this HTTP cache file (default: http_cache.db)")
+    fetch_parser.add_argument("--fixtures", help="Read <decklist id>.html files from this directory instead of fetching")
+    fetch_parser.add_argument("--limit", type=int, help="Only expand this many decklinks")
+    query_parser = commands.add_parser("query", parents=[database], help="Results played with every one of the given cards")
+    query_parser.add_argument("cards", nargs="+", help='Card as "Name" or "Name, Subtitle"')
+    query_parser.add_argument("--top", type=int, default=8, help="Finishes counted as top finishes (default: 8)")
+    query_parser.add_argument("--sideboard", action="store_true", help="Also count cards in the sideboard")
+    query_parser.add_argument("--start-date", help="YYYY-MM-DD")
+    query_parser.add_argument("--end-date", help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    with closing(sqlite3.connect(args.db)) as conn:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='decklists'").fetchone() is None:
+            print("The decklists table is missing, run migrate.py first.")
+            sys.exit(1)
+        if args.command == "fetch":
+            cache = None
+            if args.http_cache:
+                from http_cache import HttpCache
+                cache = HttpCache(args.http_cache)
+            start = time.perf_counter()
+            try:
+                store, failed = fetch(conn, args.concurrency, args.rate, cache, args.fixtures, args.limit)
+            finally:
+                if cache is not None:
+                    cache.close()
+            for link, error in failed[:10]:
+                print(f"{link}: {error}")
+            print(f"Stored {store.stored} new card lists for {store.decks} decks ({store.shared} shared an existing "
+                  f"list), {len(failed)} failed, in {time.perf_counter() - start:.1f}s")
+        else:
+            start = time.perf_counter()
+            index = CardIndex(conn)
+            loaded = time.perf_counter() - start
+            missing = [name for name in args.cards if not index.card_ids(name)]
+            if missing:
+                print(f"Unknown cards: {', '.join(missing)}")
+                sys.exit(1)
+            start = time.perf_counter()
+            counts = index.query(args.cards, args.top, args.sideboard, args.start_date, args.end_date)
+            elapsed = time.perf_counter() - start
+            print(f"{counts['decklists']} of {index.lists} decklists contain {' + '.join(args.cards)}")
+            print(f"Results: {counts['results_with']} of {counts['results']} ({_share(counts['results_with'], counts['results'])})")
+            print(f"Top {args.top}: {counts['top_with']} of {counts['top']} ({_share(counts['top_with'], counts['top'])})")
+            print(f"Index loaded in {loaded * 1000:.0f} ms, query in {elapsed * 1000:.1f} ms")
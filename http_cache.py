@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""http_cache.py
+Persistent HTTP response cache for the scrapers.
+`CachingAdapter` is a `requests` transport adapter: mounted on a session (see
+`melee_http.create_session(cache=...)`) it keeps connection pooling and retries,
+and answers GET requests from an `HttpCache` stored in a local SQLite file.
+
+Which URLs are cached, and for how long a stored response is used without asking
+the server again, is decided by `TTL_RULES` (first matching pattern wins; URLs
+matching no rule always go to the network). Once a response is older than its
+TTL it is revalidated with `If-None-Match`/`If-Modified-Since`, so an unchanged
+page costs a `304 Not Modified` instead of a full download. The file is bounded
+to `max_bytes`; the least recently used responses are evicted first.
+Usage
+-------
+    python http_cache.py [http_cache.db] [--clear]
+"""
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DEFAULT_HTTP_CACHE = "http_cache.db"
+MAX_BYTES = 256 * 1024 * 1024
+
+DAY = 24 * 60 * 60
+
+# (URL pattern, seconds a stored response is used without revalidation)
+TTL_RULES = [
+    # The results listing gains rows every day: always revalidate
+    (r"^https?://(www\.)?swu-competitivehub\.com/tournaments-results/?(\?.*)?$", 0),
+    # Tournament detail pages rarely change once the results are posted
+    (r"^https?://(www\.)?swu-competitivehub\.com/", 7 * DAY),
+    # A decklist never changes after the event
+    (r"^https?://(www\.)?melee\.gg/Decklist/View/", 30 * DAY),
+]
+
+# Headers describing the transfer rather than the (already decoded) body
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "responses" (
+    "url"           TEXT PRIMARY KEY,
+    "status"        INTEGER NOT NULL,
+    "headers"       TEXT NOT NULL,
+    "body"          BLOB NOT NULL,
+    "etag"          TEXT,
+    "last_modified" TEXT,
+    "fetched_at"    REAL NOT NULL,
+    "last_used"     REAL NOT NULL,
+    "size"          INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_responses_last_used" ON "responses" ("last_used");
+"""
+
+def ttl_for(url, rules=TTL_RULES):
+    """Return the TTL (seconds) of a URL, or None if it must not be cached."""
+    for pattern, ttl in rules:
+        if re.match(pattern, url):
+            return ttl
+    return None
+
+class HttpCache:
+    """SQLite store of GET responses with LRU eviction and hit/miss counters."""
+    def __init__(self, path=DEFAULT_HTTP_CACHE, max_bytes=MAX_BYTES, rules=TTL_RULES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rules = rules
+        # Worker processes may share one cache file; wait for each other's writes
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.hits = 0         # Served without contacting the server
+        self.revalidated = 0  # Server answered 304 Not Modified
+        self.misses = 0       # Downloaded in full
+        self.evictions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def ttl(self, url):
+        return ttl_for(url, self.rules)
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, etag, last_modified, fetched_at FROM responses WHERE url=?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified, fetched_at = row
+        return {"status": status, "headers": json.loads(headers), "body": body, "etag": etag,
+                "last_modified": last_modified, "fetched_at": fetched_at}
+
+    def store(self, url, response):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in HOP_HEADERS}
+        body = response.content
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (url, status, headers, body, etag, last_modified, fetched_at, last_used, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, response.status_code, json.dumps(headers), body, response.headers.get("ETag"),
+                 response.headers.get("Last-Modified"), now, now, len(body))
+            )
+        self.evict()
+
+    def touch(self, url, revalidated=False):
+        now = time.time()
+        with self.lock, self.conn:
+            if revalidated:
+                self.conn.execute("UPDATE responses SET fetched_at=?, last_used=? WHERE url=?", (now, now, url))
+            else:
+                self.conn.execute("UPDATE responses SET last_used=? WHERE url=?", (now, url))
+
+    def evict(self):
+        """Drop the least recently used responses until the cache fits in max_bytes."""
+        with self.lock, self.conn:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            doomed = []
+            for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((url,))
+                total -= size
+            self.conn.executemany("DELETE FROM responses WHERE url=?", doomed)
+            self.evictions += len(doomed)
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def counters(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses, "evictions": self.evictions}
+
+    def stats(self, counters=None):
+        counters = counters or self.counters()
+        return (f"{counters['hits']} hits, {counters['revalidated']} revalidated, "
+                f"{counters['misses']} misses, {counters['evictions']} evicted")
+
+def cached_response(request, entry):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"]
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.reason = "OK"
+    response.from_cache = True
+    return response
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter answering cacheable GET requests from an `HttpCache`."""
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        ttl = self.cache.ttl(request.url) if request.method == "GET" else None
+        if ttl is None:
+            return super().send(request, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        if entry is not None and time.time() - entry["fetched_at"] < ttl:
+            self.cache.hits += 1
+            self.cache.touch(request.url)
+            return cached_response(request, entry)
+
+        if entry is not None:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()  # Hand the connection back to the pool
+            self.cache.revalidated += 1
+            self.cache.touch(request.url, revalidated=True)
+            return cached_response(request, entry)
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.store(request.url, response)
+        return response
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the HTTP response cache.")
+    parser.add_argument("cache", nargs="?", default=DEFAULT_HTTP_CACHE, help=f"Cache file (default: {DEFAULT_HTTP_CACHE})")
+    parser.add_argument("--clear", action="store_true", help="Drop every stored response")
+    args = parser.parse_args()
+
+    with HttpCache(args.cache) as cache:
+        if args.clear:
+            cache.clear()
+            print("Cleared the HTTP cache.")
+        count, size = cache.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        print(f"{count} responses, {size / 1024 / 1024:.1f} MiB (limit {cache.max_bytes / 1024 / 1024:.0f} MiB)")
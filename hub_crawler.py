@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""hub_crawler.py
+Fetch SWU Competitive Hub tournament pages concurrently.
+`comp_hub_scraper.py` reads one tournament page at a time with a blocking request,
+so a full-history backfill spends most of its time waiting on round-trips. This
+crawler fetches the pages with an asynchronous `httpx` client instead:
+
+- at most `concurrency` requests are in flight at any time,
+- every host has a token bucket allowing `rate` requests per second (with bursts of
+  up to `burst` requests), so the hub isn't hammered,
+- 429 and 5xx answers and connection errors are retried with exponential backoff
+  (honouring `Retry-After`), up to `retries` times.
+
+The pages are parsed with `comp_hub_scraper.parse_tournament_page`, so the results
+feed the same tournament and placement logic as the serial loop. With an
+`HttpCache` (see http_cache.py) fresh pages are served from the cache and stale
+ones are revalidated with conditional requests, exactly like the `requests`
+adapter does.
+Usage
+-------
+    python comp_hub_scraper.py --crawl-concurrency 8 [--crawl-rate 5]
+    python hub_crawler.py <hub_tournament_url> [...] [--concurrency N] [--rate R] [--parser html.parser|lxml|stream]
+"""
+import argparse
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+from tqdm import tqdm
+
+from comp_hub_scraper import parse_tournament_page
+from hub_parsers import DEFAULT_PARSER, PARSERS
+
+CONCURRENCY = 8   # Requests in flight
+RATE = 5.0        # Requests per second and host
+RETRIES = 4       # Extra attempts after a 429/5xx answer or a connection error
+BACKOFF = 0.5     # Seconds before the first retry, doubled for every further one
+MAX_BACKOFF = 30  # Never wait longer than this between two attempts
+TIMEOUT = 30      # Seconds per request
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, and up to `burst` at once."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def retry_after(response):
+    """Return the delay requested by a Retry-After header in seconds, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+class HubCrawler:
+    """Concurrent, rate limited fetcher of hub tournament pages.
+
+        crawler = HubCrawler(concurrency=8, rate=5)
+        for link, data, error in crawler.crawl(links):
+            ...
+
+    Subclasses fetch other pages by overriding `parse` (see decklists.py).
+    """
+    label = "Hub pages"  # Progress bar description
+    def __init__(self, concurrency=CONCURRENCY, rate=RATE, burst=None, retries=RETRIES, backoff=BACKOFF,
+                 cache=None, timeout=TIMEOUT, parser=DEFAULT_PARSER):
+        self.concurrency = concurrency
+        self.rate = rate  # None or 0 disables rate limiting
+        self.burst = burst or concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache  # Optional http_cache.HttpCache
+        self.timeout = timeout
+        self.parser = parser  # See hub_parsers.py
+        self.buckets = {}
+        self.requests = 0  # Requests sent, retries included
+        self.retried = 0   # Attempts repeated after a 429/5xx answer or a connection error
+
+    def bucket(self, url):
+        if not self.rate:
+            return None
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    async def fetch(self, client, url, headers=None):
+        """GET a URL, retrying 429/5xx answers and connection errors with exponential backoff."""
+        attempt = 0
+        while True:
+            bucket = self.bucket(url)
+            if bucket is not None:
+                await bucket.acquire()
+            response = None
+            async with self.semaphore:
+                self.requests += 1
+                try:
+                    response = await client.get(url, headers=headers)
+                except httpx.TransportError:
+                    if attempt >= self.retries:
+                        raise
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return response
+            if attempt >= self.retries:
+                response.raise_for_status()
+
+            # Wait outside the semaphore so the other requests keep going
+            delay = retry_after(response) if response is not None else None
+            if delay is None:
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(min(delay, MAX_BACKOFF))
+
+    async def fetch_page(self, client, url):
+        """Return the body of a page, going through the HTTP cache if there is one."""
+        ttl = self.cache.ttl(url) if self.cache is not None else None
+        if ttl is None:
+            return (await self.fetch(client, url)).content
+
+        entry = self.cache.lookup(url)
+        if entry is not None and time.time() - entry["fetched_at"] < ttl:
+            self.cache.hits += 1
+            self.cache.touch(url)
+            return entry["body"]
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = await self.fetch(client, url, headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated += 1
+            self.cache.touch(url, revalidated=True)
+            return entry["body"]
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        return response.content
+
+    def parse(self, body):
+        return parse_tournament_page(body, self.parser)
+
+    async def crawl_one(self, client, link):
+        try:
+            return link, self.parse(await self.fetch_page(client, link["link"])), None
+        except Exception as e:
+            return link, None, e
+
+    async def crawl_async(self, links, progress=True):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.buckets = {}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True) as client:
+            tasks = [asyncio.create_task(self.crawl_one(client, link)) for link in links]
+            results = []
+            for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc=self.label, unit="page",
+                             disable=not progress, bar_format='{l_bar}{bar:30}{r_bar}{bar:-30b}'):
+                results.append(await task)
+        return results
+
+    def crawl(self, links, progress=True):
+        """Fetch and parse the tournament pages of `links` (dicts with a "link" key).
+
+        Returns (link, data, error) tuples in completion order; `data` is the dict
+        returned by `parse_tournament_page`, or None if the page couldn't be
+        fetched, in which case `error` holds the exception.
+        """
+        return asyncio.run(self.crawl_async(links, progress))
+
+    def stats(self):
+        return f"{self.requests} requests, {self.retried} retried"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch hub tournament pages concurrently.")
+    parser.add_argument("urls", nargs="+", help="SWU Competitive Hub tournament page URLs")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help=f"Requests in flight (default: {CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=RATE, help=f"Requests per second and host (default: {RATE})")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER, help="HTML parsing backend (see hub_parsers.py)")
+    args = parser.parse_args()
+
+    crawler = HubCrawler(concurrency=args.concurrency, rate=args.rate, parser=args.parser)
+    start = time.perf_counter()
+    for link, data, error in crawler.crawl([{"link": url} for url in args.urls]):
+        if error is not None:
+            print(f"{link['link']}: failed ({error})")
+        else:
+            print(f"{link['link']}: {data['melee_link']}, {len(data['results'])} placements")
+    print(f"{len(args.urls)} pages in {time.perf_counter() - start:.1f}s ({crawler.stats()})")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""hub_parsers.py
+HTML parsing backends for the SWU Competitive Hub pages.
+Only three elements of a hub page are ever read: the `#tableTournaments` listing,
+the `#tableResults` placements and the `a#link_text-238-135` Melee link. Every
+backend extracts just those and returns the table rows as lists of `Cell`s, which
+comp_hub_scraper.py turns into tournaments and placements with the same code
+whatever the backend:
+
+- `html.parser`: BeautifulSoup with Python's parser, walking the whole document
+  (the original behaviour, and the default).
+- `lxml`: lxml's C parser builds the tree and only the target elements are looked
+  up by id and walked.
+- `stream`: a `html.parser.HTMLParser` subclass that collects the target elements
+  while it reads and stops at the end of the last one it needs, without building
+  a tree.
+
+A cell's text matches BeautifulSoup's `get_text(strip=True)`: every text node is
+stripped and the pieces are joined; comments and script/style contents are left
+out.
+Usage
+-------
+    python comp_hub_scraper.py --parser lxml
+    python -m benchmarks.bench_hub_parsers [listing.html ...]
+"""
+from collections import namedtuple
+from html.parser import HTMLParser
+
+PARSERS = ("html.parser", "lxml", "stream")
+DEFAULT_PARSER = "html.parser"
+
+LISTING_TABLE = "tableTournaments"
+RESULTS_TABLE = "tableResults"
+MELEE_LINK = "link_text-238-135"
+
+SKIPPED_TAGS = {"script", "style", "template"}
+
+# `href` is the first link of the cell, `img` the alt text of its first image ("" without
+# alt); both are None if the cell has no such element
+Cell = namedtuple("Cell", ["text", "href", "img"])
+
+def _unicode(html):
+    if isinstance(html, bytes):
+        from bs4.dammit import UnicodeDammit
+        return UnicodeDammit(html, is_html=True).unicode_markup
+    return html
+
+# html.parser: the original BeautifulSoup walk
+
+def _soup(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser")
+
+def _soup_cell(td):
+    link = td.find("a", href=True)
+    img = td.find("img")
+    return Cell(td.get_text(strip=True), link["href"] if link else None, img.get("alt", "") if img else None)
+
+def _soup_rows(soup, table_id):
+    table = soup.find("table", id=table_id)
+    if not table:
+        return []
+    tbody = table.find("tbody")
+    if not tbody:
+        return []
+    return [[_soup_cell(td) for td in row.find_all("td")] for row in tbody.find_all("tr")]
+
+def _soup_page(html):
+    soup = _soup(html)
+    link = soup.find("a", id=MELEE_LINK)
+    return (link.get("href") if link else None), _soup_rows(soup, RESULTS_TABLE)
+
+# lxml: C parser, then only the target elements are walked
+
+def _lxml_strings(element):
+    if isinstance(element.tag, str) and element.tag not in SKIPPED_TAGS and element.text:
+        yield element.text
+    if isinstance(element.tag, str) and element.tag in SKIPPED_TAGS:
+        return
+    for child in element:
+        yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+def _lxml_cell(td):
+    link = td.find(".//a[@href]")
+    img = td.find(".//img")
+    text = "".join(string.strip() for string in _lxml_strings(td))
+    return Cell(text, link.get("href") if link is not None else None, img.get("alt", "") if img is not None else None)
+
+def _lxml_document(html):
+    import lxml.html
+    return lxml.html.document_fromstring(_unicode(html))
+
+def _lxml_rows(document, table_id):
+    tables = document.xpath("//table[@id=$id]", id=table_id)
+    if not tables:
+        return []
+    tbody = tables[0].find(".//tbody")
+    if tbody is None:
+        return []
+    return [[_lxml_cell(td) for td in row.iter("td")] for row in tbody.iter("tr")]
+
+def _lxml_page(html):
+    document = _lxml_document(html)
+    links = document.xpath("//a[@id=$id]", id=MELEE_LINK)
+    return (links[0].get("href") if links else None), _lxml_rows(document, RESULTS_TABLE)
+
+# stream: no tree, stop once the needed elements have been read
+
+class _StopParsing(Exception):
+    pass
+
+class _TableStream(HTMLParser):
+    """Collects the rows of the first tbody of one table, and optionally one link by id.
+
+    Like BeautifulSoup's `find_all`, every `tr` inside the tbody is a row, those of
+    tables nested in a cell included, and every `td` inside a row is a cell of it;
+    a cell's text includes the text of the cells nested in it.
+    """
+    def __init__(self, table_id, link_id=None):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.link_id = link_id
+        self.link_found = link_id is None
+        self.link = None
+        self.table_done = False
+        self.table_depth = 0    # Nesting of tables inside the target table
+        self.tbody = None       # Table depth of the first tbody while it is open, "done" once it is closed
+        self.rows = []          # Lists of [text pieces, href, img] cells
+        self.open_rows = []
+        self.open_cells = []
+        self.skipping = 0       # Inside script/style
+
+    def parse(self, html):
+        try:
+            self.feed(_unicode(html))
+            self.close()
+        except _StopParsing:
+            pass
+        return [[Cell("".join(piece.strip() for piece in pieces), href, img) for pieces, href, img in row]
+                for row in self.rows]
+
+    def _check_done(self):
+        if self.table_done and self.link_found:
+            raise _StopParsing()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        if not self.link_found and tag == "a" and ("id", self.link_id) in attrs:
+            self.link = dict(attrs).get("href")
+            self.link_found = True
+            self._check_done()
+        if tag == "table":
+            if self.table_depth:
+                self.table_depth += 1
+            elif not self.table_done and ("id", self.table_id) in attrs:
+                self.table_depth = 1
+            return
+        if not self.table_depth:
+            return
+        if tag == "tbody" and self.tbody is None:
+            self.tbody = self.table_depth
+        elif not isinstance(self.tbody, int):
+            return
+        elif tag == "tr":
+            row = []
+            self.rows.append(row)
+            self.open_rows.append(row)
+        elif tag == "td" and self.open_rows:
+            cell = [[], None, None]
+            for row in self.open_rows:
+                row.append(cell)
+            self.open_cells.append(cell)
+        elif self.open_cells:
+            attributes = dict(attrs)
+            for cell in self.open_cells:
+                if tag == "a" and cell[1] is None and attributes.get("href") is not None:
+                    cell[1] = attributes["href"]
+                elif tag == "img" and cell[2] is None:
+                    cell[2] = attributes.get("alt") or ""
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in SKIPPED_TAGS:
+            self.skipping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skipping:
+            self.skipping -= 1
+        if not self.table_depth:
+            return
+        if tag == "table":
+            self.table_depth -= 1
+            if not self.table_depth:
+                self._close_body()
+                self.table_done = True
+                self._check_done()
+        elif tag == "tbody" and self.tbody == self.table_depth:
+            self._close_body()
+        elif tag == "td" and self.open_cells:
+            self.open_cells.pop()
+        elif tag == "tr" and self.open_rows:
+            self.open_rows.pop()
+
+    def handle_data(self, data):
+        if not self.skipping:
+            for cell in self.open_cells:
+                cell[0].append(data)
+
+    def _close_body(self):
+        if self.tbody is not None:
+            self.tbody = "done"
+        self.open_rows = []
+        self.open_cells = []
+
+def _stream_page(html):
+    stream = _TableStream(RESULTS_TABLE, MELEE_LINK)
+    rows = stream.parse(html)
+    return stream.link, rows
+
+def listing_rows(html, parser=DEFAULT_PARSER):
+    """Return the rows of the `#tableTournaments` listing as lists of `Cell`s."""
+    if parser == "html.parser":
+        return _soup_rows(_soup(html), LISTING_TABLE)
+    if parser == "lxml":
+        return _lxml_rows(_lxml_document(html), LISTING_TABLE)
+    if parser == "stream":
+        return _TableStream(LISTING_TABLE).parse(html)
+    raise ValueError(f"Unknown parser {parser!r}, expected one of {', '.join(PARSERS)}.")
+
+def tournament_page(html, parser=DEFAULT_PARSER):
+    """Return the Melee link (or None) and the `#tableResults` rows of a tournament page."""
+    if parser == "html.parser":
+        return _soup_page(html)
+    if parser == "lxml":
+        return _lxml_page(html)
+    if parser == "stream":
+        return _stream_page(html)
+    raise ValueError(f"Unknown parser {parser!r}, expected one of {', '.join(PARSERS)}.")
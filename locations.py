@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""locations.py
+Normalize Competitive Hub locations (country names) to ISO2 codes.
+`LocationNormalizer` converts with country_converter like before, but builds the
+converter only once, on the first name it hasn't seen, and remembers every
+answer. With a database connection the answers are also kept in the
+`country_codes` table (created by `python migrate.py`), so later runs look names
+up there and only import country_converter when a new location appears.
+Usage
+-------
+    python locations.py [--db swu_meta.db] [NAME ...]
+"""
+import argparse
+import sqlite3
+
+TABLE = "country_codes"
+
+class LocationNormalizer:
+    """Memoizing country name -> ISO2 converter.
+
+        normalize = LocationNormalizer(conn)
+        normalize("United States")  # "US"
+    """
+    def __init__(self, conn=None):
+        self.conn = conn if conn is not None and has_table(conn) else None
+        self.converter = None
+        self.codes = {}
+        if self.conn is not None:
+            self.codes.update(self.conn.execute(f"SELECT name, iso2 FROM {TABLE}"))
+        self.conversions = 0  # Names that had to go through country_converter
+
+    def __call__(self, name):
+        return self.normalize(name)
+
+    def normalize(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = self.convert(name)
+            self.codes[name] = code
+        return code
+
+    def convert(self, name):
+        if self.converter is None:
+            # Loading country_converter parses its whole country table: only do it when needed
+            import country_converter as coco
+            self.converter = coco.CountryConverter()
+        self.conversions += 1
+        code = self.converter.convert(names=name, to="ISO2")
+        # Ambiguous names come back as a list; keep those in memory only
+        if self.conn is not None and isinstance(code, str):
+            with self.conn:
+                self.conn.execute(f"INSERT OR REPLACE INTO {TABLE} (name, iso2) VALUES (?, ?)", (name, code))
+        return code
+
+def has_table(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (TABLE,)).fetchone() is not None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up or list the stored country codes.")
+    parser.add_argument("names", nargs="*", help="Country names to convert")
+    parser.add_argument("--db", default="swu_meta.db", help="SQLite database (default: swu_meta.db)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    normalize = LocationNormalizer(conn)
+    if normalize.conn is None:
+        print(f"The {TABLE} table is missing, run migrate.py first; nothing will be stored.")
+    if args.names:
+        for name in args.names:
+            print(f"{name}: {normalize(name)}")
+    else:
+        for name, code in sorted(normalize.codes.items()):
+            print(f"{name or '(empty)'}: {code}")
+    conn.close()
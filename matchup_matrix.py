@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""matchup_matrix.py
+Leader/base matchup win rates served from a materialized matrix.
+
+Every match in the `matches` table is folded, once from each player's side, into
+`matchup_buckets` rows keyed by (leader, base, opposing leader, opposing base,
+week, tournament level). Range queries then only sum a handful of buckets instead
+of joining matches, decks and tournaments again.
+
+`refresh` is incremental: it looks for tournaments whose match count or match
+checksum differs from the one recorded in `matchup_tournaments` (new events, events
+whose pairings were reloaded, corrected results or reassigned decks, and events
+whose matches were deleted) and rebuilds only the (week, level) buckets those
+tournaments fall into. The checksum covers every column the buckets are built from,
+including the leader and base of both decks. `--full` drops and rebuilds the whole
+matrix, e.g. after tournament dates or levels were edited. The tables are created by
+`python migrate.py`.
+
+Dates in a query are rounded to whole weeks (Monday to Sunday), the bucket size.
+Usage
+-------
+    python matchup_matrix.py refresh [--full] [--db swu_meta.db]
+    python matchup_matrix.py query --leader NAME [--base NAME] [--vs-leader NAME] [--vs-base NAME]
+                                   [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD] [--level LEVEL ...]
+                                   [--db swu_meta.db]
+
+Leaders can be given as "Name", "Name, Subtitle" or their nickname, bases as name
+or nickname. A name shared by several leaders (e.g. "Han Solo") selects all of them.
+"""
+import argparse
+import sqlite3
+from contextlib import closing
+
+DEFAULT_DB = "swu_meta.db"
+
+# Monday of the week a date falls into
+WEEK_SQL = "date({column}, 'weekday 0', '-6 days')"
+
+# Every match seen from both players' sides, with the tournament's week and level
+MATCH_SIDES_SQL = f"""
+    SELECT m.tournament_id, m.deck1_id AS deck_id, m.deck2_id AS opp_deck_id,
+           m.player1_wins AS game_wins, m.player2_wins AS game_losses, m.draws AS game_draws
+      FROM matches m
+    UNION ALL
+    SELECT m.tournament_id, m.deck2_id, m.deck1_id, m.player2_wins, m.player1_wins, m.draws
+      FROM matches m
+"""
+
+BUCKET_COLUMNS = ["matches", "wins", "losses", "draws", "game_wins", "game_losses", "game_draws"]
+
+# Columns of a match (and of its decks) the buckets depend on
+CHECKSUM_COLUMNS = ["m.match_id", "d1.leader_id", "d1.base_id", "d2.leader_id", "d2.base_id",
+                    "m.player1_wins", "m.player2_wins", "m.draws"]
+
+def _row_hash(columns, prime=2147483647, multiplier=1000003):
+    # Polynomial hash kept below 2**31 at every step, so SQLite never overflows into REAL
+    expression = f"COALESCE({columns[0]}, 0)"
+    for column in columns[1:]:
+        expression = f"(({expression}) * {multiplier} + COALESCE({column}, 0) + 1) % {prime}"
+    return expression
+
+# Match count and checksum of every tournament with matches
+TOURNAMENT_CHECKSUMS_SQL = f"""
+    SELECT m.tournament_id, COUNT(*) AS match_count, SUM({_row_hash(CHECKSUM_COLUMNS)}) AS checksum
+      FROM matches m
+      LEFT JOIN decks d1 ON d1.deck_id = m.deck1_id
+      LEFT JOIN decks d2 ON d2.deck_id = m.deck2_id
+     GROUP BY m.tournament_id
+"""
+
+def refresh(conn, full=False):
+    """Fold new or changed tournaments into the matrix.
+
+    Returns the number of tournaments refreshed and of buckets rebuilt.
+    """
+    with conn:
+        if full:
+            conn.execute("DELETE FROM matchup_buckets;")
+            conn.execute("DELETE FROM matchup_tournaments;")
+
+        conn.execute("DROP TABLE IF EXISTS temp.changed_tournaments;")
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE changed_tournaments AS
+            SELECT c.tournament_id, c.match_count, c.checksum
+              FROM ({TOURNAMENT_CHECKSUMS_SQL}) c
+              LEFT JOIN matchup_tournaments mt ON mt.tournament_id = c.tournament_id
+             WHERE mt.match_count IS NOT c.match_count OR mt.checksum IS NOT c.checksum
+            UNION ALL
+            SELECT mt.tournament_id, 0, NULL
+              FROM matchup_tournaments mt
+             WHERE mt.match_count > 0
+               AND NOT EXISTS (SELECT 1 FROM matches m WHERE m.tournament_id = mt.tournament_id);
+            """
+        )
+        conn.execute("DROP TABLE IF EXISTS temp.affected_buckets;")
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE affected_buckets AS
+            SELECT DISTINCT {WEEK_SQL.format(column='t.date')} AS week, COALESCE(t.level, '') AS level
+              FROM changed_tournaments c
+              JOIN tournaments t ON t.tournament_id = c.tournament_id
+             WHERE {WEEK_SQL.format(column='t.date')} IS NOT NULL;
+            """
+        )
+
+        # Rebuild the affected buckets from every tournament in them, not just the changed ones
+        conn.execute(
+            """
+            DELETE FROM matchup_buckets
+             WHERE (week, level) IN (SELECT week, level FROM affected_buckets);
+            """
+        )
+        conn.execute(
+            f"""
+            INSERT INTO matchup_buckets
+                (leader_id, base_id, opp_leader_id, opp_base_id, week, level,
+                 matches, wins, losses, draws, game_wins, game_losses, game_draws)
+            SELECT d.leader_id, d.base_id, od.leader_id, od.base_id,
+                   a.week, a.level,
+                   COUNT(*),
+                   SUM(s.game_wins > s.game_losses),
+                   SUM(s.game_wins < s.game_losses),
+                   SUM(s.game_wins = s.game_losses),
+                   SUM(s.game_wins), SUM(s.game_losses), SUM(s.game_draws)
+              FROM ({MATCH_SIDES_SQL}) s
+              JOIN tournaments t ON t.tournament_id = s.tournament_id
+              JOIN affected_buckets a
+                ON a.week = {WEEK_SQL.format(column='t.date')} AND a.level = COALESCE(t.level, '')
+              JOIN decks d ON d.deck_id = s.deck_id
+              JOIN decks od ON od.deck_id = s.opp_deck_id
+             GROUP BY d.leader_id, d.base_id, od.leader_id, od.base_id, a.week, a.level;
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO matchup_tournaments (tournament_id, match_count, checksum)
+            SELECT tournament_id, match_count, checksum FROM changed_tournaments;
+            """
+        )
+        tournaments = conn.execute("SELECT COUNT(*) FROM changed_tournaments;").fetchone()[0]
+        buckets = conn.execute("SELECT COUNT(*) FROM affected_buckets;").fetchone()[0]
+        conn.execute("DROP TABLE temp.changed_tournaments;")
+        conn.execute("DROP TABLE temp.affected_buckets;")
+    return tournaments, buckets
+
+def _in(column, values, params):
+    if values is None:
+        return "1"
+    params.extend(values)
+    return f"{column} IN ({','.join(['?'] * len(values)) or 'NULL'})"
+
+def _filters(columns, leaders, bases, opp_leaders, opp_bases, start_date, end_date, levels):
+    params = []
+    clauses = [
+        _in(columns["leader"], leaders, params),
+        _in(columns["base"], bases, params),
+        _in(columns["opp_leader"], opp_leaders, params),
+        _in(columns["opp_base"], opp_bases, params),
+        _in(columns["level"], levels, params),
+    ]
+    if start_date:
+        clauses.append(f"{columns['week']} >= {WEEK_SQL.format(column='?')}")
+        params.append(start_date)
+    if end_date:
+        clauses.append(f"{columns['week']} <= {WEEK_SQL.format(column='?')}")
+        params.append(end_date)
+    return " AND ".join(clauses), params
+
+def query_matrix(conn, leaders=None, bases=None, opp_leaders=None, opp_bases=None, start_date=None, end_date=None,
+                 levels=None):
+    """Sum the buckets per opposing archetype.
+
+    Filters are lists of ids (None means no filter). Returns rows of
+    (opp_leader_id, opp_base_id, matches, wins, losses, draws, game_wins, game_losses, game_draws).
+    """
+    columns = {"leader": "leader_id", "base": "base_id", "opp_leader": "opp_leader_id",
+               "opp_base": "opp_base_id", "level": "level", "week": "week"}
+    where, params = _filters(columns, leaders, bases, opp_leaders, opp_bases, start_date, end_date, levels)
+    sums = ", ".join(f"SUM({column})" for column in BUCKET_COLUMNS)
+    return conn.execute(
+        f"""
+        SELECT opp_leader_id, opp_base_id, {sums}
+          FROM matchup_buckets
+         WHERE {where}
+         GROUP BY opp_leader_id, opp_base_id
+         ORDER BY SUM(matches) DESC, opp_leader_id, opp_base_id;
+        """,
+        params,
+    ).fetchall()
+
+def naive_query(conn, leaders=None, bases=None, opp_leaders=None, opp_bases=None, start_date=None, end_date=None,
+                levels=None):
+    """Same result as `query_matrix`, computed by joining matches, decks and tournaments."""
+    columns = {"leader": "d.leader_id", "base": "d.base_id", "opp_leader": "od.leader_id",
+               "opp_base": "od.base_id", "level": "COALESCE(t.level, '')",
+               "week": WEEK_SQL.format(column="t.date")}
+    where, params = _filters(columns, leaders, bases, opp_leaders, opp_bases, start_date, end_date, levels)
+    return conn.execute(
+        f"""
+        SELECT od.leader_id, od.base_id,
+               COUNT(*),
+               SUM(s.game_wins > s.game_losses),
+               SUM(s.game_wins < s.game_losses),
+               SUM(s.game_wins = s.game_losses),
+               SUM(s.game_wins), SUM(s.game_losses), SUM(s.game_draws)
+          FROM ({MATCH_SIDES_SQL}) s
+          JOIN tournaments t ON t.tournament_id = s.tournament_id
+          JOIN decks d ON d.deck_id = s.deck_id
+          JOIN decks od ON od.deck_id = s.opp_deck_id
+         WHERE {WEEK_SQL.format(column='t.date')} IS NOT NULL AND {where}
+         GROUP BY od.leader_id, od.base_id
+         ORDER BY COUNT(*) DESC, od.leader_id, od.base_id;
+        """,
+        params,
+    ).fetchall()
+
+def find_leaders(conn, text):
+    """Return the ids of the leaders matching "Name", "Name, Subtitle" or a nickname."""
+    if text is None:
+        return None
+    name, _, subtitle = (part.strip() for part in text.partition(","))
+    if subtitle:
+        rows = conn.execute("SELECT leader_id FROM leaders WHERE name = ? AND subtitle = ?;", (name, subtitle))
+    else:
+        rows = conn.execute("SELECT leader_id FROM leaders WHERE name = ? OR nickname = ?;", (name, name))
+    ids = [row[0] for row in rows]
+    if not ids:
+        raise SystemExit(f"Unknown leader {text!r}.")
+    return ids
+
+def find_bases(conn, text):
+    """Return the ids of the bases matching a name or nickname."""
+    if text is None:
+        return None
+    ids = [row[0] for row in conn.execute("SELECT base_id FROM bases WHERE name = ? OR nickname = ?;", (text, text))]
+    if not ids:
+        raise SystemExit(f"Unknown base {text!r}.")
+    return ids
+
+def _archetype_names(conn):
+    leaders = {leader_id: f"{name}, {subtitle}" for leader_id, name, subtitle
+               in conn.execute("SELECT leader_id, name, subtitle FROM leaders;")}
+    bases = dict(conn.execute("SELECT base_id, name FROM bases;").fetchall())
+    return leaders, bases
+
+def print_matrix(conn, rows):
+    leaders, bases = _archetype_names(conn)
+    if not rows:
+        print("No matches found.")
+        return
+    total = [sum(row[i] for row in rows) for i in range(2, 9)]
+    print(f"{'Opponent':<60} {'Matches':>8} {'W-L-D':>14} {'Win %':>7} {'Game %':>7}")
+    for opp_leader, opp_base, matches, wins, losses, draws, game_wins, game_losses, game_draws in rows + [(None, None, *total)]:
+        if opp_leader is None:
+            label = "All opponents"
+        else:
+            label = f"{leaders.get(opp_leader, opp_leader)} - {bases.get(opp_base, opp_base)}"
+        games = game_wins + game_losses + game_draws
+        win_rate = 100 * wins / matches if matches else 0
+        game_rate = 100 * game_wins / games if games else 0
+        print(f"{label:<60} {matches:>8} {f'{wins}-{losses}-{draws}':>14} {win_rate:>6.1f}% {game_rate:>6.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leader/base matchup matrix.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = commands.add_parser("refresh", help="Fold new tournaments into the matrix")
+    refresh_parser.add_argument("--full", action="store_true", help="Rebuild the whole matrix")
+
+    query_parser = commands.add_parser("query", help="Win rates of an archetype against its opponents")
+    query_parser.add_argument("--leader", required=True, help="Leader name, 'Name, Subtitle' or nickname")
+    query_parser.add_argument("--base", help="Base name or nickname")
+    query_parser.add_argument("--vs-leader", help="Only this opposing leader")
+    query_parser.add_argument("--vs-base", help="Only this opposing base")
+    query_parser.add_argument("--start-date", help="First date to include (YYYY-MM-DD, rounded to its week)")
+    query_parser.add_argument("--end-date", help="Last date to include (YYYY-MM-DD, rounded to its week)")
+    query_parser.add_argument("--level", action="append", help="Tournament level to include (repeatable)")
+    args = parser.parse_args()
+
+    with closing(sqlite3.connect(args.db)) as conn:
+        if args.command == "refresh":
+            tournaments, buckets = refresh(conn, args.full)
+            print(f"Refreshed {tournaments} tournaments, rebuilt {buckets} week/level buckets.")
+        else:
+            rows = query_matrix(
+                conn,
+                leaders=find_leaders(conn, args.leader),
+                bases=find_bases(conn, args.base),
+                opp_leaders=find_leaders(conn, args.vs_leader),
+                opp_bases=find_bases(conn, args.vs_base),
+                start_date=args.start_date,
+                end_date=args.end_date,
+                levels=args.level,
+            )
+            print_matrix(conn, rows)
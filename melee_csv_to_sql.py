@@ -6,20 +6,35 @@ decks, leaders, bases, and results. The CSV files are expected to be in a specif
 format, with columns for player names, leaders, bases, deck links, and results.
 Usage
 -------
-    python melee_csv_to_sql.py
+    python melee_csv_to_sql.py [--bulk] [--db swu_meta.db]
 
 It expects the CSV files to be located in a folder named `csv` in the current directory.
-It will process all files matching the pattern `*_standings*.csv` in that folder.
+It will process all files matching the pattern `*_standings*.csv` in that folder, and all
+`*_pairings*.csv` files into the `matches` table (created by `migrate.py`).
 The database file is named `swu_meta.db` by default, but you can change the `DB_FILE` variable
-if your database file has a different name.
+or pass `--db` if your database file has a different name. Create it from `base_db.sql`
+and run `python migrate.py` so the lookup indexes the loader relies on exist.
+
+With `--bulk` the files are loaded by `BulkLoader`, which looks players, leaders, bases
+and decks up in memory and writes each file in one transaction instead of committing
+after every statement. Both paths reuse a player through an exact name or a recorded
+alias only (see player_identity.py); with `--bulk` the names that only match a known
+player after normalization are listed as alias candidates. Both paths report the
+number of rows loaded per second.
 """
 
+import argparse
+import csv
+import math
 import os
 import sqlite3
-import pandas as pd
+import time
 import glob
 
+from player_identity import PlayerIndex, lookup_player
+
 DB_FILE = "swu_meta.db"  # Change if your DB file is named differently
+PAIRINGS_BATCH_SIZE = 5000  # Matches written per executemany call
 
 def get_or_create(conn, table, where_clause, insert_dict):
     # Try to get the row, else insert and return the new id
@@ -62,12 +77,8 @@ def insert_tournament(conn, name, date, link):
     return cur.fetchone()[0]
 
 def get_player_by_name(conn, player_name):
-    cur = conn.cursor()
-    cur.execute("SELECT player_id FROM players WHERE name=?", (player_name,))
-    row = cur.fetchone()
-    if row:
-        return row[0]
-    return None
+    # Same rule as BulkLoader.player_id: the exact name, else a recorded alias
+    return lookup_player(conn, player_name)
 
 def insert_player(conn, name):
     cur = conn.cursor()
@@ -123,6 +134,8 @@ def result_exists(conn, tournament_id, player_db_id):
     return cur.fetchone() is not None
 
 def process_csv(conn, csv_file):
+    # Only the row-by-row path needs pandas; --bulk and the scraper sinks load without it
+    import pandas as pd
     # print(f"Processing {csv_file}")
     df = pd.read_csv(csv_file)
     # Try to extract tournament info from filename or CSV
@@ -173,9 +186,266 @@ def process_csv(conn, csv_file):
 
         insert_result(conn, tournament_db_id, deck_id, int(result), player_db_id)
 
+def _missing(value):
+    # NaN from pandas, "" from rows streamed by the scrapers (see melee_sinks.SqliteSink)
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+RESULTS_INSERT = "INSERT INTO results (tournament_id, deck_id, result, player_id) VALUES (?, ?, ?, ?)"
+MATCHES_INSERT = """INSERT OR IGNORE INTO matches
+    (tournament_id, round, table_number, player1_id, player2_id, deck1_id, deck2_id,
+     player1_wins, player2_wins, draws)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+class BulkLoader:
+    """Standings loader that resolves ids in memory and commits once per file.
+
+    Players, leaders, bases, decks and the (tournament, player) pairs that already
+    have a result are read from the database once. Rows missing from those lookups
+    are inserted as they appear, without committing, and all results of a file are
+    written with a single `executemany` inside the file's transaction.
+
+    Unlike `process_csv` it never inserts a second copy of an existing deck, so the
+    `results` rows are the same but `decks` holds no duplicates. Players are looked
+    up through `player_identity.PlayerIndex` like `get_player_by_name` does: by
+    exact name or recorded alias. A name that only differs from a known player in
+    case, accents or spacing gets a new player, since two entrants of one event can
+    have such names, and is kept in `alias_candidates` with the player it matched.
+
+    Standings of a tournament that isn't in the database get a blank tournament,
+    like `process_csv` does, but pairings files need the tournament of their
+    standings: without it they are skipped and listed in `skipped`.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows_loaded = 0
+        self.files_loaded = 0
+        self.alias_candidates = []  # (name, id of the player it matches after normalization)
+        self.skipped = []  # Pairings files whose tournament isn't in the database
+        self.reload()
+
+    def reload(self):
+        cur = self.conn.cursor()
+        self.players = PlayerIndex.load(self.conn)
+        # Iterate newest first so the lowest id wins for duplicate names, like the SELECTs in process_csv
+        self.leaders = {(name, subtitle): leader_id for leader_id, name, subtitle
+                        in cur.execute("SELECT leader_id, name, subtitle FROM leaders ORDER BY leader_id DESC")}
+        self.bases = {name: base_id for base_id, name
+                      in cur.execute("SELECT base_id, name FROM bases ORDER BY base_id DESC")}
+        self.decks = {(leader_id, base_id, decklink): deck_id for deck_id, leader_id, base_id, decklink
+                      in cur.execute("SELECT deck_id, leader_id, base_id, decklink FROM decks ORDER BY deck_id DESC")}
+        self.results = set(cur.execute("SELECT tournament_id, player_id FROM results"))
+
+    def _insert(self, sql, params):
+        return self.conn.execute(sql, params).lastrowid
+
+    def player_id(self, name):
+        # SQLite stores non-text names in the TEXT column as their string form
+        key = name if isinstance(name, str) else str(name)
+        player_id = self.players.lookup(key)
+        if player_id is None:
+            candidate = self.players.resolve(key)
+            player_id = self._insert("INSERT INTO players (name) VALUES (?)", (name,))
+            if candidate is not None:
+                self.alias_candidates.append((key, candidate))
+            self.players.add(player_id, key)
+        return player_id
+
+    def leader_id(self, name, subtitle):
+        if (name, subtitle) not in self.leaders:
+            self.leaders[(name, subtitle)] = self._insert("INSERT INTO leaders (name, subtitle) VALUES (?, ?)", (name, subtitle))
+        return self.leaders[(name, subtitle)]
+
+    def base_id(self, name):
+        if name not in self.bases:
+            self.bases[name] = self._insert("INSERT INTO bases (name) VALUES (?)", (name,))
+        return self.bases[name]
+
+    def deck_id(self, leader_id, base_id, decklink):
+        key = (leader_id, base_id, decklink)
+        if key not in self.decks:
+            self.decks[key] = self._insert("INSERT INTO decks (leader_id, base_id, decklink) VALUES (?, ?, ?)", key)
+        return self.decks[key]
+
+    def resolve_deck(self, leader, base, decklink):
+        # Same rules as process_csv: "-" marks an unknown leader or base
+        if _missing(leader) or leader == "-" or _missing(base):
+            return None
+        leader_name = leader.strip().split(", ")[0]
+        leader_subtitle = leader.strip().split(", ")[1]
+        if leader_name == "-" or leader_subtitle == "-" or base == "-":
+            return None
+        return self.deck_id(self.leader_id(leader_name, leader_subtitle), self.base_id(base),
+                            None if _missing(decklink) else decklink)
+
+    def tournament_id(self, melee_id, create=True):
+        """Return the id of the tournament of a Melee id; unknown ones get a blank tournament, or None without `create`."""
+        tournament_db_id = get_tournament_by_melee_id(self.conn, melee_id)
+        if tournament_db_id is None and create:
+            tournament_db_id = insert_tournament(self.conn, "", "", "")
+        return tournament_db_id
+
+    def standings_records(self, tournament_db_id, rows):
+        """Yield the `results` rows of standings rows (dicts keyed by the CSV headers)."""
+        for row in rows:
+            player_name = row.get("Username", row.get("Players/Teams", None))
+            result = row.get("Rank", None)
+            if _missing(player_name) or _missing(result):
+                continue
+
+            player_db_id = self.player_id(player_name)
+            if (tournament_db_id, player_db_id) in self.results:
+                continue
+
+            deck_id = self.resolve_deck(row.get("Leader", None), row.get("Base", None), row.get("Decklink", None))
+            self.results.add((tournament_db_id, player_db_id))
+            yield (tournament_db_id, deck_id, int(result), player_db_id)
+
+    def insert_results(self, records):
+        # Uncommitted: the caller commits once the whole file or table is in
+        records = list(records)
+        self.conn.executemany(RESULTS_INSERT, records)
+        return len(records)
+
+    def load_standings(self, csv_file):
+        melee_id = os.path.basename(csv_file).split("_")[0]
+        tournament_db_id = self.tournament_id(melee_id)
+
+        try:
+            with open(csv_file, newline="", encoding="utf-8") as f:
+                loaded = self.insert_results(self.standings_records(tournament_db_id, csv.DictReader(f)))
+            self.conn.commit()
+        except Exception:
+            # Drop the half-loaded file and the ids cached for its uncommitted rows
+            self.conn.rollback()
+            self.reload()
+            raise
+
+        self.rows_loaded += loaded
+        self.files_loaded += 1
+        return loaded
+
+    def _match_player(self, username, displayname):
+        # Same fallback as the standings: the username, else the display name. "-" marks a bye
+        name = username if username not in ("", "-") else displayname
+        if name in ("", "-"):
+            return None
+        return self.player_id(name)
+
+    def pairings_records(self, tournament_db_id, rows):
+        """Yield the `matches` rows of pairings rows (dicts keyed by the CSV headers)."""
+        for row in rows:
+            player1_id = self._match_player(row.get("Player1_username", ""), row.get("Player1_displayname", ""))
+            if player1_id is None:
+                continue
+            player2_id = self._match_player(row.get("Player2_username", ""), row.get("Player2_displayname", ""))
+            table = str(row.get("Table", ""))
+            yield (
+                tournament_db_id,
+                int(row["Round"]),
+                int(table) if table.isdigit() else None,
+                player1_id,
+                player2_id,
+                self.resolve_deck(row.get("Player1_leader"), row.get("Player1_base"), row.get("Player1_decklink")),
+                self.resolve_deck(row.get("Player2_leader"), row.get("Player2_base"), row.get("Player2_decklink")),
+                int(row.get("Player1_wins") or 0),
+                int(row.get("Player2_wins") or 0),
+                int(row.get("Draws") or 0)
+            )
+
+    def insert_matches(self, records):
+        # Uncommitted; rows already in `matches` are skipped and not counted
+        return self.conn.executemany(MATCHES_INSERT, records).rowcount
+
+    def load_pairings(self, csv_file, batch_size=PAIRINGS_BATCH_SIZE):
+        """Stream a `<id>_pairings.csv` file into `matches`, `batch_size` rows at a time."""
+        melee_id = os.path.basename(csv_file).split("_")[0]
+        tournament_db_id = self.tournament_id(melee_id, create=False)
+        if tournament_db_id is None:
+            self.skipped.append(csv_file)
+            return 0
+
+        loaded = 0
+        batch = []
+        try:
+            with open(csv_file, newline="", encoding="utf-8") as f:
+                for record in self.pairings_records(tournament_db_id, csv.DictReader(f)):
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        loaded += self.insert_matches(batch)
+                        batch = []
+            if batch:
+                loaded += self.insert_matches(batch)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self.reload()
+            raise
+
+        self.rows_loaded += loaded
+        self.files_loaded += 1
+        return loaded
+
+def bulk_load(conn, csv_files, pairings_files=()):
+    """Load the files with one BulkLoader; return it for its counts and alias candidates."""
+    loader = BulkLoader(conn)
+    for csv_file in csv_files:
+        loader.load_standings(csv_file)
+    for csv_file in pairings_files:
+        loader.load_pairings(csv_file)
+    return loader
+
+def report_alias_candidates(loader, limit=10):
+    if not loader.alias_candidates:
+        return
+    names = dict(loader.conn.execute("SELECT player_id, name FROM players"))
+    print(f"{len(loader.alias_candidates)} new players only match a known player after normalization:")
+    for name, player_id in loader.alias_candidates[:limit]:
+        print(f"  {name!r} ~ {names.get(player_id, player_id)!r}")
+    print("Record the confirmed ones with `python player_identity.py alias PLAYER_NAME ALIAS`.")
+
+def report_skipped(loader, limit=10):
+    if not loader.skipped:
+        return
+    print(f"Skipped {len(loader.skipped)} pairings files of tournaments missing from the database:")
+    for csv_file in loader.skipped[:limit]:
+        print(f"  {csv_file}")
+    print("Load their standings first.")
+
+def has_table(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load Melee.gg standings CSV files into the SQLite database.")
+    parser.add_argument("--db", default=DB_FILE, help=f"SQLite database file (default: {DB_FILE})")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Resolve ids in memory and write each file in a single transaction")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    conn = sqlite3.connect(DB_FILE)
+    args = parse_args()
+    conn = sqlite3.connect(args.db)
     # Process all *_standings.csv and *_standings_unified.csv files
-    for csv_file in glob.glob(os.path.join("csv", "*_standings*.csv")):
-        process_csv(conn, csv_file)
-    conn.close()
\ No newline at end of file
+    csv_files = glob.glob(os.path.join("csv", "*_standings*.csv"))
+    pairings_files = glob.glob(os.path.join("csv", "*_pairings*.csv"))
+    if pairings_files and not has_table(conn, "matches"):
+        print("Skipping pairings files: the matches table is missing, run migrate.py first.")
+        pairings_files = []
+    start_time = time.perf_counter()
+    if args.bulk:
+        loader = bulk_load(conn, csv_files, pairings_files)
+        rows = loader.rows_loaded
+        report_alias_candidates(loader)
+        report_skipped(loader)
+    else:
+        rows_before = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        for csv_file in csv_files:
+            process_csv(conn, csv_file)
+        rows = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - rows_before
+        if pairings_files:
+            loader = bulk_load(conn, [], pairings_files)
+            rows += loader.rows_loaded
+            report_skipped(loader)
+    elapsed = time.perf_counter() - start_time
+    conn.close()
+    rate = rows / elapsed if elapsed > 0 else 0
+    print(f"Loaded {rows} rows from {len(csv_files) + len(pairings_files)} files in {elapsed:.2f}s ({rate:.0f} rows/s)")
\ No newline at end of file
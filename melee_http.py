@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""melee_http.py
+Scrape Melee.gg standings and pairings without a browser.
+The standings and pairings tables on a Melee.gg tournament page are DataTables
+widgets that load their rows from paged JSON endpoints. This engine reads the round
+ids from the tournament page, requests those endpoints directly with a pooled
+`requests.Session` and converts the JSON into the same column layout as the
+Selenium scraper, so the CSV files it writes are identical. Each JSON page is
+handed to the sink (see `melee_sinks.py`) as soon as it has been converted.
+
+The endpoint paths and JSON field names are inferred from the widgets and have not
+been checked against recorded Melee.gg responses, so the engine is opt-in (the
+Selenium engine stays the default) and checks every response against the schema it
+assumes (`STANDINGS_FIELDS`, `MATCH_FIELDS`, ...). An endpoint that doesn't exist,
+an answer that isn't JSON or an entry missing one of those fields raises
+`UnexpectedResponse` instead of writing guessed values, and `MeleeSession` then
+scrapes the tournament with the browser.
+
+All endpoints are resolved against the scheme and host of the tournament URL, so
+pointing the engine at a local stub server that replays recorded responses is just
+a matter of passing a `http://127.0.0.1:<port>/Tournament/View/<id>` URL.
+Usage
+-------
+    python melee_scraper.py <tournament_url> --engine http [--mode standings|pairings|both]
+"""
+from itertools import chain
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+from http_cache import CachingAdapter
+from melee_sinks import CsvSink
+from melee_tables import (
+    STANDINGS_HEADERS,
+    MATCHES_HEADERS,
+    player_fields,
+    decklist_fields,
+    result_fields,
+    record_fields,
+    format_percentage
+)
+
+PAGE_SIZE = 250  # Rows requested per DataTables page
+TIMEOUT = 30     # Seconds per request
+
+STANDINGS_ENDPOINT = "/Standing/GetRoundStandings"
+MATCHES_ENDPOINT = "/Match/GetRoundMatches/{round_id}"
+
+# Fields the converters read, by JSON object; anything missing means the schema isn't the one assumed here
+PAGE_FIELDS = ("data",)
+STANDINGS_FIELDS = ("Rank", "Team", "Decklists", "MatchRecord", "GameRecord", "Points",
+                    "OpponentMatchWinPercentage", "TeamGameWinPercentage", "OpponentGameWinPercentage")
+MATCH_FIELDS = ("TableNumber", "Competitors", "ResultString")
+COMPETITOR_FIELDS = ("Team", "Decklists")
+TEAM_FIELDS = ("Players",)
+PLAYER_FIELDS = ("Username", "DisplayName")
+DECKLIST_FIELDS = ("DecklistId", "DecklistName")
+
+class UnexpectedResponse(Exception):
+    """Raised when Melee.gg doesn't answer in the endpoints and JSON schema this engine assumes."""
+
+def check_fields(value, fields, what):
+    if not isinstance(value, dict):
+        raise UnexpectedResponse(f"{what} is a {type(value).__name__}, not an object")
+    missing = [field for field in fields if field not in value]
+    if missing:
+        raise UnexpectedResponse(f"{what} has no {', '.join(missing)} (fields: {', '.join(sorted(value)) or 'none'})")
+
+def check_team(team, what):
+    if team is None:
+        return
+    check_fields(team, TEAM_FIELDS, what)
+    for player in team["Players"] or []:
+        check_fields(player, PLAYER_FIELDS, f"{what} player")
+
+def check_decklists(decklists, what):
+    for decklist in decklists or []:
+        check_fields(decklist, DECKLIST_FIELDS, what)
+
+def check_standings_entry(entry):
+    check_fields(entry, STANDINGS_FIELDS, "Standings entry")
+    check_team(entry["Team"], "Standings team")
+    check_decklists(entry["Decklists"], "Standings decklist")
+
+def check_match_entry(entry):
+    check_fields(entry, MATCH_FIELDS, "Match entry")
+    for competitor in entry["Competitors"] or []:
+        check_fields(competitor, COMPETITOR_FIELDS, "Match competitor")
+        check_team(competitor["Team"], "Match team")
+        check_decklists(competitor["Decklists"], "Match decklist")
+
+def create_session(pool_size=10, cache=None):
+    """Return a `requests.Session` with connection pooling and retries on 429/5xx.
+
+    With an `http_cache.HttpCache`, cacheable GET requests are answered from it.
+    """
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=None)
+    if cache is not None:
+        adapter = CachingAdapter(cache, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) swu_stats",
+        "X-Requested-With": "XMLHttpRequest"
+    })
+    return session
+
+def base_url_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def parse_round_selector(soup, container_id):
+    """Return the rounds of a round selector as a list of dicts (id, name, active)."""
+    rounds = []
+    container = soup.find(id=container_id)
+    if not container:
+        return rounds
+    for button in container.find_all("button"):
+        classes = button.get("class", [])
+        if "round-selector" not in classes or not button.get("data-id"):
+            continue
+        rounds.append({
+            "id": button["data-id"],
+            "name": button.get_text(strip=True),
+            "active": "active" in classes
+        })
+    return rounds
+
+def parse_table_headers(soup, table_id, default):
+    table = soup.find("table", id=table_id)
+    if table and table.find("thead"):
+        headers = [th.get_text(strip=True) for th in table.find("thead").find_all("th")]
+        if headers:
+            return headers
+    return list(default)
+
+def fetch_tournament_page(session, url):
+    response = session.get(url, timeout=TIMEOUT)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    return {
+        "standings_rounds": parse_round_selector(soup, "standings-round-selector-container"),
+        "pairings_rounds": parse_round_selector(soup, "pairings-round-selector-container"),
+        "standings_headers": parse_table_headers(soup, "tournament-standings-table", STANDINGS_HEADERS),
+        "matches_headers": parse_table_headers(soup, "tournament-pairings-table", MATCHES_HEADERS)
+    }
+
+def fetch_table_pages(session, endpoint_url, round_id, page_size=PAGE_SIZE):
+    """Yield the `data` list of every DataTables page of one round."""
+    start = 0
+    draw = 1
+    while True:
+        payload = {
+            "draw": draw,
+            "start": start,
+            "length": page_size,
+            "roundId": round_id,
+            "order[0][column]": 0,
+            "order[0][dir]": "asc",
+            "search[value]": "",
+            "search[regex]": "false"
+        }
+        response = session.post(endpoint_url, data=payload, timeout=TIMEOUT)
+        if response.status_code in (404, 405):
+            raise UnexpectedResponse(f"{urlsplit(endpoint_url).path} answered {response.status_code}")
+        response.raise_for_status()
+        try:
+            body = response.json()
+        except ValueError:
+            raise UnexpectedResponse(f"{urlsplit(endpoint_url).path} didn't answer with JSON") from None
+        check_fields(body, PAGE_FIELDS, "Table page")
+        data = body["data"] or []
+        if not data:
+            return
+        yield data
+        start += len(data)
+        total = body.get("recordsFiltered", body.get("recordsTotal"))
+        if (total is not None and start >= int(total)) or len(data) < page_size:
+            return
+        draw += 1
+
+def _players_of(team):
+    return (team or {}).get("Players") or []
+
+def _player_cells(base_url, player):
+    if not player:
+        return ["", ""]
+    href = f"{base_url}/Profile/Index/{player.get('Username') or ''}"
+    return player_fields(href, player.get("DisplayName") or "")
+
+def _decklist_cells(base_url, decklists):
+    if not decklists or not decklists[0].get("DecklistId"):
+        return ["-", "-", "-"]
+    decklist = decklists[0]
+    href = f"{base_url}/Decklist/View/{decklist['DecklistId']}"
+    return decklist_fields(href, decklist.get("DecklistName") or "")
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+def standings_row(base_url, entry, headers):
+    """Convert one standings JSON entry into the cells of a standings CSV row."""
+    check_standings_entry(entry)
+    players = _players_of(entry.get("Team"))
+    cells = []
+    for header in headers:
+        if header == "Rank":
+            cells += [_text(entry.get("Rank"))]
+        elif header == "Players/Teams":
+            cells += _player_cells(base_url, players[0] if players else None)
+        elif header == "Decklist":
+            cells += _decklist_cells(base_url, entry.get("Decklists"))
+        elif header == "Match Record":
+            cells += record_fields(_text(entry.get("MatchRecord")))
+        elif header == "Game Record":
+            cells += record_fields(_text(entry.get("GameRecord")))
+        elif header == "Points":
+            cells += [_text(entry.get("Points"))]
+        elif header.startswith("OMW"):
+            cells += [format_percentage(entry.get("OpponentMatchWinPercentage"))]
+        elif header.startswith("TGW"):
+            cells += [format_percentage(entry.get("TeamGameWinPercentage"))]
+        elif header.startswith("OGW"):
+            cells += [format_percentage(entry.get("OpponentGameWinPercentage"))]
+        else:
+            cells += [""]
+    return cells
+
+def match_row(base_url, entry, headers, round):
+    """Convert one pairings JSON entry into the cells of a pairings CSV row."""
+    check_match_entry(entry)
+    competitors = entry.get("Competitors") or []
+    cells = [str(round)]
+    players = []
+    for header in headers:
+        if header == "Table":
+            cells += [_text(entry.get("TableNumber"))]
+        elif header == "Players/Teams":
+            players = []
+            for competitor in competitors[:2]:
+                team_players = _players_of(competitor.get("Team"))
+                players += _player_cells(base_url, team_players[0] if team_players else None)
+            while len(players) < 4:
+                players += ["-", "-"]
+            cells += players
+        elif header == "Decklists":
+            for competitor in competitors[:2]:
+                cells += _decklist_cells(base_url, competitor.get("Decklists"))
+            cells += ["-", "-", "-"] * (2 - len(competitors[:2]))
+        elif header == "Result":
+            cells += result_fields(_text(entry.get("ResultString")), players)
+        else:
+            cells += [""]
+    return cells
+
+def standings_pages(session, base_url, rounds, index, headers):
+    """Return the index of the latest round up to `index` with results and an iterator over its row pages."""
+    endpoint_url = base_url + STANDINGS_ENDPOINT
+    while index >= 0:
+        pages = fetch_table_pages(session, endpoint_url, rounds[index]["id"])
+        first = next(pages, None)
+        if first is not None:
+            return index, (standings_rows(base_url, data, headers) for data in chain([first], pages))
+        index -= 1
+    return index, None
+
+def standings_rows(base_url, data, headers):
+    return [standings_row(base_url, entry, headers) for entry in data]
+
+def pairings_pages(session, base_url, rounds, headers):
+    """Yield the rows of every pairings round page by page, up to the first round without pairings."""
+    for round_number, round_info in enumerate(rounds, start=1):
+        endpoint_url = base_url + MATCHES_ENDPOINT.format(round_id=round_info["id"])
+        empty = True
+        for data in fetch_table_pages(session, endpoint_url, round_info["id"]):
+            empty = False
+            yield [match_row(base_url, entry, headers, round_number) for entry in data]
+        if empty:
+            return
+
+def write_table(sink, tournament, table, output_file, headers, pages):
+    """Hand every page of a table to the sink; return False if the sink couldn't save it."""
+    sink.start(tournament, table, output_file)
+    try:
+        written = False
+        for rows in pages:
+            sink.write_page(headers, rows)
+            written = True
+        if not written:
+            # Still let the sink know the columns of the empty table
+            sink.write_page(headers, [])
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.finish()
+
+def scrape_tournament(url, mode="standings", session=None, sink=None):
+    if mode is None:
+        mode = "standings"
+    if sink is None:
+        sink = CsvSink()
+
+    print(f"Melee link: {url}")
+
+    own_session = session is None
+    if own_session:
+        session = create_session()
+    base_url = base_url_of(url)
+
+    try:
+        page = fetch_tournament_page(session, url)
+        tournament = url.split('/')[-1]
+        output_file = f"{tournament}_{mode}.csv"
+
+        if(mode == "standings" or mode == "both"):
+            rounds = page["standings_rounds"]
+            if not rounds:
+                raise UnexpectedResponse("The tournament page has no standings round selector")
+            # Start from the active round like the browser does and walk back until a round has results
+            index = next((i for i, r in enumerate(rounds) if r["active"]), len(rounds) - 1)
+            headers = page["standings_headers"]
+            index, pages = standings_pages(session, base_url, rounds, index, headers)
+            if pages is None:
+                return
+            if index != len(rounds) - 1:
+                output_file = f"{tournament}_{mode}_incomplete.csv"
+
+            if not write_table(sink, tournament, "standings", output_file, headers, pages):
+                return
+
+        if(mode == "pairings" or mode == "both"):
+            headers = page["matches_headers"]
+            if not page["pairings_rounds"]:
+                raise UnexpectedResponse("The tournament page has no pairings round selector")
+            write_table(sink, tournament, "pairings", output_file, headers,
+                        pairings_pages(session, base_url, page["pairings_rounds"], headers))
+    finally:
+        if own_session:
+            session.close()
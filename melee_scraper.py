@@ -5,40 +5,301 @@ This script fetches tournament data from Melee.gg, including standings and pairi
 and saves the results in CSV files. It can scrape either standings, pairings, or both.
 Usage
 -------
-    python melee_scraper.py <tournament_url> [--mode standings|pairings|both]
+    python melee_scraper.py <tournament_url> [--mode standings|pairings|both] [--engine selenium|http]
+                            [--sink csv|sqlite|null] [--db swu_meta.db] [--page-length all|N]
+                            [--lean [--allow CATEGORY|PATTERN ...]] [--derive-standings]
 
 If no mode is specified, it defaults to scraping standings.
+With `--engine http` no browser is started: the rows are read from the JSON
+endpoints behind the DataTables widgets (see `melee_http.py`). The engine is
+experimental, its endpoints and JSON fields are unverified, so a tournament whose
+responses don't look as expected is scraped with the browser instead.
+
+With `--cache` every table page is checkpointed in a local SQLite file (see
+`scrape_cache.py`): a rerun after a crash resumes from the first missing page and
+finished events are exported from the cache without opening the browser. The cache
+holds the page snapshots, not the parsed rows, so a changed column parser applies
+to cached pages too.
+
+With `--page-length all` (or a number of rows) the DataTables API is used to show
+every row of a standings or pairings round on one page before it is read, so a
+round costs one extraction instead of a click, a redraw and an extraction per
+page. If the table refuses the length (the server caps it, or returns fewer rows
+than asked for), the largest length of the table's length menu is tried, and
+otherwise the table is paged through as usual. The pages saved are reported per
+tournament.
+
+With `--lean` Chrome runs with a lean profile: images, fonts, media and
+third-party trackers (see LEAN_BLOCKLIST) are blocked through the DevTools
+`Network.setBlockedURLs` command, GPU and extensions are disabled, and pages are
+handed over once their DOM is ready (eager page load) instead of after every
+resource has loaded. `--allow` keeps a category (e.g. `--allow fonts`) or every
+blocked pattern containing a string (e.g. `--allow hotjar`). Every Selenium
+scrape reports the bytes transferred, the requests blocked and the page-load
+time of the tournament, so the savings can be compared with and without it.
+
+With `--mode pairings --derive-standings` only the pairings are scraped and the
+standings, records and tiebreakers are computed from them (see
+`swiss_standings.py`) and written like scraped standings.
+
+To scrape many tournaments, use a `MeleeSession`, which keeps one browser open
+for all of them instead of starting Chrome for every URL.
 The tournament URL should be the full link to the Melee.gg tournament page.
 
 It will output two CSV files:
 - `<tournament_id>_standings.csv` for standings data
 - `<tournament_id>_pairings.csv` for pairings data
+
+Rows are streamed to the output one table page at a time (see `melee_sinks.py`),
+so memory does not grow with the size of the event. With `--sink sqlite` they are
+loaded straight into the database instead of a CSV file, and `--sink null` only
+counts them.
 """
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+# Only the cheap parts of Selenium are imported here; the browser, wait and action
+# modules (and webdriver_manager) are imported once a browser is actually used, so
+# cached and http-engine scrapes don't pay for them
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import ElementClickInterceptedException
-from webdriver_manager.chrome import ChromeDriverManager
-import pandas as pd
+from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import InvalidSessionIdException
+from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException
+from melee_tables import (
+    player_fields,
+    decklist_fields,
+    result_fields,
+    record_fields
+)
+from scrape_cache import PageCache, DEFAULT_CACHE
+from melee_sinks import CsvSink, SqliteSink, NullSink, DerivedStandingsSink
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import math
 import time
 import argparse
-import re
+import sys
+
+# URL patterns the lean profile blocks, by category; the scraper only reads text and links
+LEAN_BLOCKLIST = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*"],
+    "fonts": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.m4a*"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*adservice.google.*", "*connect.facebook.net*", "*hotjar.com*", "*clarity.ms*",
+        "*static.cloudflareinsights.com*", "*quantserve.com*", "*scorecardresearch.com*",
+    ],
+}
 
-# Setup Selenium with Chrome (headless for efficiency)
-options = Options()
-options.headless = True  # Set to False for debugging (see the browser)
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-dev-shm-usage")
+class LeanProfile:
+    """Chrome settings that skip everything the scraper doesn't read.
+
+    `allow` lists categories of LEAN_BLOCKLIST to keep loading, or strings: every
+    blocked pattern containing one of them is let through.
+    """
+    def __init__(self, allow=()):
+        self.allow = list(allow)
+
+    def blocked_categories(self):
+        return [category for category in LEAN_BLOCKLIST if category not in self.allow]
+
+    def blocked_urls(self):
+        return [pattern for category in self.blocked_categories() for pattern in LEAN_BLOCKLIST[category]
+                if not any(allowed in pattern for allowed in self.allow)]
+
+def chrome_options(lean=None):
+    from selenium.webdriver.chrome.options import Options
+    # Setup Selenium with Chrome (headless for efficiency)
+    options = Options()
+    options.headless = True  # Set to False for debugging (see the browser)
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    # Network events for the traffic report (see traffic_report)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if lean is not None:
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        if "images" in lean.blocked_categories():
+            options.add_argument("--blink-settings=imagesEnabled=false")
+        # The tables are waited for explicitly, so don't wait for images, fonts and ads to load
+        options.page_load_strategy = "eager"
+    return options
+
+def apply_lean_profile(driver, lean):
+    # Blocked requests fail in the browser before anything is sent
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": lean.blocked_urls()})
+
+def traffic_report(driver):
+    """Return the bytes received, requests and blocked requests since the last call, or None."""
+    if driver is None:
+        return None
+    try:
+        entries = driver.get_log("performance")
+    except WebDriverException:
+        return None
+    traffic = {"bytes": 0, "requests": 0, "blocked": 0}
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            traffic["bytes"] += message["params"].get("encodedDataLength", 0)
+            traffic["requests"] += 1
+        elif message["method"] == "Network.loadingFailed":
+            traffic["requests"] += 1
+            if message["params"].get("blockedReason"):
+                traffic["blocked"] += 1
+    return traffic
+
+RESTART_AFTER_PAGES = 500  # Restart a long-lived browser after this many table pages
+
+STANDINGS_TABLE = "tournament-standings-table"
+PAIRINGS_TABLE = "tournament-pairings-table"
+
+_driver_path = None
+
+class ScrapeError(Exception):
+    """Raised when a Melee.gg page can't be scraped."""
+
+class WaitPolicy:
+    """Timeouts (in seconds) for the condition-based waits of a scrape."""
+    def __init__(self, page_timeout=30, redraw_timeout=15, load_timeout=10,
+                 cookie_timeout=5, poll_frequency=0.05):
+        self.page_timeout = page_timeout        # Tournament page and round buttons
+        self.redraw_timeout = redraw_timeout    # Table redraw after a page or round switch
+        self.load_timeout = load_timeout        # Lazily rendered rows becoming complete
+        self.cookie_timeout = cookie_timeout    # Cookie consent button
+        self.poll_frequency = poll_frequency
+
+class PhaseTimer:
+    """Accumulates wall time per phase of a scrape (navigation, wait, parse).
+
+    Phases can be nested; time spent in an inner phase is only counted there.
+    """
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._nested = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._nested.pop()
+            elapsed = time.perf_counter() - start
+            self.totals[name] += elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def report(self):
+        total = sum(self.totals.values())
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1]))
+        return f"{total:.1f}s total ({phases})"
+
+class ScrapeContext:
+    """Browser handle and progress of a single tournament scrape.
+
+    Each scrape owns its context, so several scrapes can run at the same time
+    in one process, each with its own driver.
+    """
+    def __init__(self, driver, policy=None, extraction="dom", cache=None, sink=None, page_length=None):
+        self.driver = driver
+        self.extraction = extraction  # "dom" (one call per cell) or "script" (one call per page)
+        self.page_length = page_length  # Rows per table page to ask DataTables for, -1 for all; None keeps its default
+        self.cache = cache  # Optional scrape_cache.PageCache for page checkpoints
+        self.sink = sink or CsvSink()  # Receives the rows page by page (see melee_sinks.py)
+        self.tournament = None
+        # Initialize ActionChains for mouse scroll simulation (no driver when served from the cache)
+        self.actions = None
+        if driver is not None:
+            from selenium.webdriver.common.action_chains import ActionChains
+            self.actions = ActionChains(driver)
+        self.policy = policy or WaitPolicy()
+        self.timer = PhaseTimer()
+        self.rows = 0  # Rows handed to the sink so far
+        self.pages = 0  # Table pages loaded so far
+        self.timeouts = 0  # Waits that ran into their timeout
+        self.default_lengths = {}  # Table id -> page length DataTables started with
+        self.pages_avoided = 0  # Pages not loaded thanks to page_length
+        self.lengths_refused = 0  # Rounds paged through because page_length was refused
+        self.page_load = None  # Seconds driver.get took for the tournament page
+
+    def wait(self, timeout):
+        from selenium.webdriver.support.ui import WebDriverWait
+        return WebDriverWait(self.driver, timeout, poll_frequency=self.policy.poll_frequency)
+
+# XPath lookups the column parsers make inside a cell
+PLAYER_LINK_XPATH = ".//div[contains(@class, 'match-table-player-container')]/a"
+TEAMS_XPATH = ".//div[contains(@class, 'match-table-teams-container')]/div[contains(@class, 'match-table-team-container')]"
+DECKLIST_TEAMS_XPATH = "./div[contains(@class, 'match-table-teams-container')]/div[contains(@class, 'match-table-team-container')]"
+CELL_XPATHS = [PLAYER_LINK_XPATH, TEAMS_XPATH, DECKLIST_TEAMS_XPATH]
+
+# Captures a whole table in one WebDriver call: header texts, and for every row the
+# first cell matching each column XPath together with the results of CELL_XPATHS
+# inside it (two levels deep, enough for team container -> player link).
+SNAPSHOT_TABLE_SCRIPT = """
+const [tableId, columnXPaths, cellXPaths] = arguments;
+const select = (context, path) => {
+    const result = document.evaluate(path, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) {
+        nodes.push(result.snapshotItem(i));
+    }
+    return nodes;
+};
+// Like WebElement.text: non-breaking spaces as spaces, every line trimmed, no blank lines
+const text = (node) => (node.innerText || "").replace(/\u00a0/g, " ").split("\\n")
+    .map(line => line.trim()).filter(line => line).join("\\n");
+const snapshot = (node, depth, paths) => {
+    const found = {};
+    if (depth < 2) {
+        for (const path of paths) {
+            found[path] = select(node, path).map(child => snapshot(child, depth + 1, paths));
+        }
+    }
+    return {text: text(node), href: node.href === undefined ? null : node.href, found: found};
+};
+const wrapper = "//div[@id='" + tableId + "_wrapper']/div[contains(@class, 'dataTables_scroll')]";
+const headerRow = select(document, wrapper + "/div[contains(@class, 'dataTables_scrollHead')]//thead/tr")[0];
+const tbody = select(document, wrapper + "/div[contains(@class, 'dataTables_scrollBody')]//tbody")[0];
+const headers = headerRow ? Array.from(headerRow.querySelectorAll("th")).map(text) : [];
+const rows = tbody ? Array.from(tbody.querySelectorAll("tr")).map(row => {
+    const found = {};
+    for (const path of columnXPaths) {
+        found[path] = select(row, path).slice(0, 1).map(cell => snapshot(cell, 0, cellXPaths));
+    }
+    return {text: text(row), href: null, found: found};
+}) : [];
+return {headers: headers, rows: rows};
+"""
 
-standings_data = []
-matches_data = []
+# DataTables state of a table: page length, pages, rows matching and rows drawn, and
+# the numeric lengths of its length menu. null if the table isn't a DataTable
+PAGE_INFO_SCRIPT = """
+const [tableId] = arguments;
+const $ = window.jQuery;
+if (!$ || !$.fn.dataTable || !$.fn.dataTable.isDataTable('#' + tableId)) {
+    return null;
+}
+const api = $('#' + tableId).DataTable();
+const info = api.page.info();
+const menu = api.settings()[0].aLengthMenu || [];
+const lengths = (Array.isArray(menu[0]) ? menu[0] : menu).filter(length => typeof length === "number");
+return {length: info.length, pages: info.pages, records: info.recordsDisplay,
+        rows: api.rows({page: "current"}).count(), lengths: lengths};
+"""
 
-global driver, actions
+# Redraw a table from its first page with another page length. A refused request
+# must not open an alert box, which would block every later WebDriver call
+SET_PAGE_LENGTH_SCRIPT = """
+const [tableId, length] = arguments;
+const $ = window.jQuery;
+$.fn.dataTable.ext.errMode = "none";
+$('#' + tableId).DataTable().page.len(length).draw();
+"""
 
 # Custom Parsing Functions
 def parse_misc(cell, players):
@@ -47,15 +308,15 @@ def parse_misc(cell, players):
 def parse_player(cell, players):
     # Example: Extract player name, handle any extra details if needed
     try:
-        player_container = cell.find_element(By.XPATH, ".//div[contains(@class, 'match-table-player-container')]/a")
-        return [player_container.get_attribute("href").split("/")[-1].strip(), player_container.text.strip()]
+        player_container = cell.find_element(By.XPATH, PLAYER_LINK_XPATH)
+        return player_fields(player_container.get_attribute("href"), player_container.text)
     except NoSuchElementException:
         return ["", ""]
 
 def parse_teams(cell, players):
     players = []
     try:
-        player_containers = cell.find_elements(By.XPATH, ".//div[contains(@class, 'match-table-teams-container')]/div[contains(@class, 'match-table-team-container')]")
+        player_containers = cell.find_elements(By.XPATH, TEAMS_XPATH)
         player_container1 = player_containers[0]
         players += parse_player(player_container1, None)
         if(len(player_containers) > 1):
@@ -68,46 +329,20 @@ def parse_teams(cell, players):
         return ["", "", "", ""]
     
 def parse_result(cell, players):
-    match = re.match("(.+) won ([0-3]-[0-3]-[0-3])", cell.text.strip())
-    if match:
-        if players[1] == match.group(1):
-            return match.group(2).split("-")
-        elif players[3] == match.group(1):
-            scores = match.group(2).split("-")
-            score1 = scores[0]
-            scores[0] = scores[1]
-            scores[1] = score1
-            return scores
-    else:
-        match = re.match("(.+) was assigned a bye", cell.text.strip())
-        if match:
-            return [2,0,0]
-        else:
-            match = re.match("([0-3]-[0-3]-[0-3]) Draw", cell.text.strip())
-            if match:
-                return match.group(1).split("-")
-            
-    return [0,0,0]
+    return result_fields(cell.text, players)
     
 def parse_decklist(cell, players):
     try:
-        player_container = cell.find_element(By.XPATH, ".//div[contains(@class, 'match-table-player-container')]/a")
+        player_container = cell.find_element(By.XPATH, PLAYER_LINK_XPATH)
     except NoSuchElementException:
         return ["-", "-", "-"]
-    deck = player_container.text.strip().split(" - ")
-    if len(deck) == 2:
-        leader = deck[0]
-        base = deck[1]
-        deck_link = player_container.get_attribute("href")
-        return [leader, base, deck_link]
-    else:
-        return ["-", "-", "-"]
+    return decklist_fields(player_container.get_attribute("href"), player_container.text)
 
 
 def parse_decklists(cell, players):
     try:
         deck_data = []
-        decks = cell.find_elements(By.XPATH, "./div[contains(@class, 'match-table-teams-container')]/div[contains(@class, 'match-table-team-container')]")
+        decks = cell.find_elements(By.XPATH, DECKLIST_TEAMS_XPATH)
         deck_data += parse_decklist(decks[0], None)
         if (len(decks) > 1):
             deck_data += parse_decklist(decks[1], None)
@@ -118,14 +353,7 @@ def parse_decklists(cell, players):
         return ["-", "-", "-","-", "-", "-"]
 
 def parse_record(cell, players):
-    raw_text = cell.text.strip()
-    if "-" in raw_text:
-        try:
-            wins, losses, draws = map(int, raw_text.split("-"))
-            return [wins, losses, draws]
-        except ValueError:
-            return [0, 0, 0]  # Default for invalid format
-    return [0, 0, 0]  # Default if no standings_data
+    return record_fields(cell.text)
 
 # Dictionary mapping column classes to parsing functions
 standings_column_parsers = {
@@ -147,11 +375,57 @@ matches_column_parsers = {
     "ResultString-column": parse_result
 }
 
+def processing_visible(driver, table_id):
+    # DataTables shows "<table id>_processing" while it fetches and draws a page
+    try:
+        return driver.find_element(By.ID, f"{table_id}_processing").is_displayed()
+    except (NoSuchElementException, StaleElementReferenceException):
+        return False
+
+def wait_for_processing(ctx, table_id):
+    with ctx.timer.phase("wait"):
+        try:
+            ctx.wait(ctx.policy.redraw_timeout).until(lambda driver: not processing_visible(driver, table_id))
+        except TimeoutException:
+            ctx.timeouts += 1
+
+def table_snapshot(ctx, table_id):
+    # Page info text and first row element, taken before a click to detect the redraw
+    try:
+        info = ctx.driver.find_element(By.ID, f"{table_id}_info").text
+    except NoSuchElementException:
+        info = None
+    rows = ctx.driver.find_elements(By.XPATH, f"//div[@id='{table_id}_wrapper']//div[contains(@class, 'dataTables_scrollBody')]//tbody/tr")
+    return info, (rows[0] if rows else None)
+
+def wait_for_redraw(ctx, table_id, snapshot):
+    from selenium.webdriver.support import expected_conditions as EC
+    info_before, first_row = snapshot
+
+    def redrawn(driver):
+        if processing_visible(driver, table_id):
+            return False
+        if first_row is not None and EC.staleness_of(first_row)(driver):
+            return True
+        if info_before is not None:
+            try:
+                return driver.find_element(By.ID, f"{table_id}_info").text != info_before
+            except NoSuchElementException:
+                return False
+        return first_row is None
+
+    with ctx.timer.phase("wait"):
+        try:
+            ctx.wait(ctx.policy.redraw_timeout).until(redrawn)
+        except TimeoutException:
+            ctx.timeouts += 1
+
 # Function to forcefully close the cookie popup
-def close_cookie_popup():
+def close_cookie_popup(ctx):
+    from selenium.webdriver.support import expected_conditions as EC
     try:
         # Attempt to click the "Necessary cookies only" button directly
-        cookie_button = WebDriverWait(driver, 5).until(
+        cookie_button = ctx.wait(ctx.policy.cookie_timeout).until(
             EC.element_to_be_clickable((By.XPATH, '//button[contains(text(), "Necessary cookies only")]'))
         )
         cookie_button.click()
@@ -160,7 +434,7 @@ def close_cookie_popup():
 
     # Try removing the popup directly using JavaScript
     try:
-        driver.execute_script("""
+        ctx.driver.execute_script("""
             document.querySelectorAll('.cookies__modal').forEach(el => {
                 el.remove();
             });
@@ -169,207 +443,351 @@ def close_cookie_popup():
         print("Failed to remove cookie popup.")
         raise e
 
-def split_standings_headers(headers):
-    new_headers = []
-    for header in headers:
-        if header == "Players/Teams":
-            new_headers.append("Username")
-            new_headers.append("Players/Teams")
-        elif header == "Decklist":
-            new_headers.append("Leader")
-            new_headers.append("Base")
-            new_headers.append("Decklink")
-        elif header == "Match Record":
-            new_headers.append("Match Wins")
-            new_headers.append("Match Losses")
-            new_headers.append("Match Draws")
-        elif header == "Game Record":
-            new_headers.append("Game Wins")
-            new_headers.append("Game Losses")
-            new_headers.append("Game Draws")
-        else:
-            new_headers.append(header)
-    return new_headers
-
-def split_matches_headers(headers):
-    new_headers = ["Round"]
-    for header in headers:
-        if header == "Players/Teams":
-            new_headers.append("Player1_username")
-            new_headers.append("Player1_displayname")
-            new_headers.append("Player2_username")
-            new_headers.append("Player2_displayname")
-        elif header == "Decklists":
-            new_headers.append("Player1_leader")
-            new_headers.append("Player1_base")
-            new_headers.append("Player1_decklink")
-            new_headers.append("Player2_leader")
-            new_headers.append("Player2_base")
-            new_headers.append("Player2_decklink")
-        elif header == "Result":
-            new_headers.append("Player1_wins")
-            new_headers.append("Player2_wins")
-            new_headers.append("Draws")
-        else:
-            new_headers.append(header)
-    return new_headers
-    
+def column_xpath(td_class):
+    return ".//td[contains(@class, '" + td_class + "')]"
+
+class CellSnapshot:
+    """Plain-data stand-in for a table row or cell WebElement.
+
+    Built from the JSON returned by SNAPSHOT_TABLE_SCRIPT, it answers the same
+    `text`, `get_attribute("href")` and XPath lookups the column parsers make,
+    without a round-trip to chromedriver for each of them. Its `text` is the
+    element's `innerText` with every line trimmed, while WebElement.text is
+    WebDriver's own rendering of the visible text; the two agree on Melee's
+    table cells as far as benchmarks/bench_extraction.py has compared them, but
+    can differ for hidden or oddly styled content.
+    """
+    def __init__(self, data):
+        self.text = data["text"]
+        self._href = data["href"]
+        self._found = data["found"]
+
+    def get_attribute(self, name):
+        return self._href if name == "href" else None
+
+    def find_elements(self, by, value):
+        return [CellSnapshot(node) for node in self._found.get(value, [])]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matches {value}")
+        return elements[0]
+
+def element_snapshot(element, paths, depth=0):
+    # What SNAPSHOT_TABLE_SCRIPT returns for a node, read with one WebDriver call per lookup
+    found = {}
+    if depth < 2:
+        for path in paths:
+            found[path] = [element_snapshot(child, paths, depth + 1) for child in element.find_elements(By.XPATH, path)]
+    return {"text": element.text, "href": element.get_attribute("href"), "found": found}
+
+def row_snapshot(row, column_xpaths):
+    found = {path: [element_snapshot(cell, CELL_XPATHS) for cell in row.find_elements(By.XPATH, path)[:1]]
+             for path in column_xpaths}
+    return {"text": row.text, "href": None, "found": found}
+
+def table_rows(ctx, table_id, column_parsers):
+    """Return the header texts, the body rows and the snapshot of a DataTables table.
+
+    The snapshot (the SNAPSHOT_TABLE_SCRIPT data of the page) is what the cache
+    stores; with the dom extraction it is only taken when there is a cache.
+    """
+    column_xpaths = [column_xpath(td_class) for td_class in column_parsers]
+    if ctx.extraction == "script":
+        table = ctx.driver.execute_script(SNAPSHOT_TABLE_SCRIPT, table_id, column_xpaths, CELL_XPATHS)
+        return [header.strip() for header in table["headers"]], [CellSnapshot(row) for row in table["rows"]], table
+
+    headerRow = ctx.driver.find_element(By.XPATH, f"//div[@id='{table_id}_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollHead')]//thead/tr")
+    headers = [th.text.strip() for th in headerRow.find_elements(By.TAG_NAME, "th")]
+    tbody = ctx.driver.find_element(By.XPATH, f"//div[@id='{table_id}_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollBody')]//tbody")
+    rows = tbody.find_elements(By.TAG_NAME, "tr")
+    if ctx.cache is None:
+        return headers, rows, None
+    table = {"headers": headers, "rows": [row_snapshot(row, column_xpaths) for row in rows]}
+    return headers, [CellSnapshot(row) for row in table["rows"]], table
+
+def parse_standings_rows(rows):
+    """Run the standings column parsers over table rows (WebElements or CellSnapshots)."""
+    data = []
+    for row in rows:
+        cell_texts = []
+        found_columns = []
+        for td_class, parser in standings_column_parsers.items():
+            if td_class in found_columns:
+                continue
+            try:
+                cell = row.find_element(By.XPATH, column_xpath(td_class))
+                cell_texts += parser(cell, None)
+                found_columns.append(td_class)
+            except NoSuchElementException as e:
+                continue
+        data.append(cell_texts)
+    return data
+
+def parse_matches_rows(rows, round):
+    """Run the pairings column parsers over table rows (WebElements or CellSnapshots) of a round."""
+    data = []
+    for row in rows:
+        cell_texts = [str(round)]
+        found_columns = []
+        players = []
+        for td_class, parser in matches_column_parsers.items():
+            if td_class in found_columns:
+                continue
+            try:
+                cell = row.find_element(By.XPATH, column_xpath(td_class))
+                res = parser(cell, players)
+                cell_texts += res
+                if td_class == "Teams-column":
+                    players = res
+                found_columns.append(td_class)
+            except NoSuchElementException as e:
+                continue
+        data.append(cell_texts)
+    return data
+
+def parse_page(table, round, headers, rows):
+    """Return the headers and CSV rows of a page snapshot read back from the cache."""
+    rows = [CellSnapshot(row) for row in rows]
+    if table == "standings":
+        return [header.strip() for header in headers], parse_standings_rows(rows)
+    return [header.strip() for header in headers], parse_matches_rows(rows, round)
+
+def parse_pages(table, pages):
+    for round, headers, rows in pages:
+        yield parse_page(table, round, headers, rows)
+
+def complete(data):
+    # Lazily rendered rows have empty cells until they are scrolled into view
+    return not any(cell == "" for row in data for cell in row)
+
 # Function to extract table standings_data with fresh table capture
-def extract_standings_table_data():
-    new_data = None
-    new_headers = None
-    try:
-        headerRow = driver.find_element(By.XPATH, "//div[@id='tournament-standings-table_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollHead')]//thead/tr")
-        new_headers = [th.text.strip() for th in headerRow.find_elements(By.TAG_NAME, "th")]
-
-        new_data = []
-
-        tbody = driver.find_element(By.XPATH, "//div[@id='tournament-standings-table_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollBody')]//tbody")
-        rows = tbody.find_elements(By.TAG_NAME, "tr")
-        for row in rows:
-            cell_texts = []
-            found_columns = []
-            for td_class, parser in standings_column_parsers.items():
-                if td_class in found_columns:
-                    continue
-                try:
-                    tmp_cell = row.find_element(By.XPATH, ".//td[contains(@class, '" + td_class + "')]")
-                    cell = tmp_cell
-                    cell_texts += parser(cell, None)
-                    found_columns.append(td_class)
-                except NoSuchElementException as e:
-                    continue
-
-            # If any cell is empty, we need to scroll more
-            if any(cell == "" for cell in cell_texts):
-                return None, None  # Incomplete rows detected
-
-            new_data.append(cell_texts)
-
-        return new_headers, new_data
-    except Exception as e:
-        # print("exception")
-        # print(e)
-        # return None, None
-        raise e
+def extract_standings_table_data(ctx):
+    new_headers, rows, snapshot = table_rows(ctx, STANDINGS_TABLE, standings_column_parsers)
+    new_data = parse_standings_rows(rows)
+    if not complete(new_data):
+        return None, None, None  # Incomplete rows detected, we need to scroll more
+    return new_headers, new_data, snapshot
 
 # Function to extract table matches_data with fresh table capture
-def extract_matches_table_data(round):
-    new_data = None
-    new_headers = None
-    try:
-        headerRow = driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollHead')]//thead/tr")
-        new_headers = [th.text.strip() for th in headerRow.find_elements(By.TAG_NAME, "th")]
-
-        new_data = []
-
-        tbody = driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_wrapper']/div[contains(@class, 'dataTables_scroll')]/div[contains(@class, 'dataTables_scrollBody')]//tbody")
-        rows = tbody.find_elements(By.TAG_NAME, "tr")
-        for row in rows:
-            cell_texts = [str(round)]
-            found_columns = []
-            players = []
-            for td_class, parser in matches_column_parsers.items():
-                if td_class in found_columns:
-                    continue
-                try:
-                    cell = row.find_element(By.XPATH, ".//td[contains(@class, '" + td_class + "')]")
-                    res = parser(cell, players)
-                    cell_texts += res
-                    if td_class == "Teams-column":
-                        players = res
-                    found_columns.append(td_class)
-                except NoSuchElementException as e:
-                    continue
-
-            # If any cell is empty, we need to scroll more
-            if any(cell == "" for cell in cell_texts):
-                return None, None  # Incomplete rows detected
-
-            new_data.append(cell_texts)
-
-        return new_headers, new_data
-    except Exception as e:
-        # print("exception")
-        # print(e)
-        #return None, None
-        raise e
-
-def load_standings_from_page(headers):
-    global standings_data
-    # Keep trying until all rows are fully loaded
-    actions.move_to_element(driver.find_element(By.ID, "standings-round-selector-container")).perform()
-    attempts = 0
-    max_attempts = 30  # To prevent infinite loop
-    new_headers = None
-    new_data = None
+def extract_matches_table_data(ctx, round):
+    new_headers, rows, snapshot = table_rows(ctx, PAIRINGS_TABLE, matches_column_parsers)
+    new_data = parse_matches_rows(rows, round)
+    if not complete(new_data):
+        return None, None, None  # Incomplete rows detected, we need to scroll more
+    return new_headers, new_data, snapshot
+
+def wait_for_complete_rows(ctx, extract):
+    # Rows are rendered lazily, so scroll like a real user until every cell has text
+    result = [None, None, None]
+    def rows_complete(driver):
+        with ctx.timer.phase("parse"):
+            result[:] = extract()
+        if result[0] and result[1]:
+            return True
+        # Use ActionsChains to scroll like a real user
+        ctx.actions.scroll_by_amount(0, 100).perform()
+        return False
 
-    time.sleep(1)  # Allow time for the next page to load
+    with ctx.timer.phase("wait"):
+        try:
+            ctx.wait(ctx.policy.load_timeout).until(rows_complete)
+        except TimeoutException:
+            ctx.timeouts += 1
+    return result
 
-    while attempts < max_attempts:
-        new_headers, new_data = extract_standings_table_data()
-        if new_headers and new_data:
-            break
+def page_info(ctx, table_id):
+    try:
+        return ctx.driver.execute_script(PAGE_INFO_SCRIPT, table_id)
+    except WebDriverException:
+        return None
+
+def set_page_length(ctx, table_id, length):
+    snapshot = table_snapshot(ctx, table_id)
+    ctx.driver.execute_script(SET_PAGE_LENGTH_SCRIPT, table_id, length)
+    wait_for_redraw(ctx, table_id, snapshot)
+    return page_info(ctx, table_id)
+
+def shows_all_rows(info, length):
+    # The server may cap the length or answer with an error: then fewer rows are drawn
+    expected = info["records"] if length == -1 else min(length, info["records"])
+    return info["length"] == length and info["rows"] == expected
+
+def expand_page_length(ctx, table_id):
+    """Show the round on as few pages as the table allows; return the pages this saves.
+
+    Tries ctx.page_length, then the lengths of the table's length menu that are
+    larger than its default, largest first. If the table refuses all of them it
+    is set back to its default length, to be paged through as usual.
+    """
+    info = page_info(ctx, table_id)
+    if info is None:
+        return 0
+    default = ctx.default_lengths.setdefault(table_id, info["length"])
+    default_pages = math.ceil(info["records"] / default) if default > 0 else 1
+    if info["pages"] > 1:
+        lengths = [ctx.page_length] + sorted((length for length in info["lengths"] if length > default), reverse=True)
+        for length in dict.fromkeys(lengths):
+            if length == info["length"] or (length != -1 and length <= default):
+                continue
+            info = set_page_length(ctx, table_id, length)
+            if info is None:
+                return 0
+            if shows_all_rows(info, length):
+                break
+        else:
+            ctx.lengths_refused += 1
+            if info["length"] != default:
+                set_page_length(ctx, table_id, default)
+            return 0
+    # The length set for an earlier round is usually kept, so count against the default
+    saved = max(default_pages - max(info["pages"], 1), 0)
+    ctx.pages_avoided += saved
+    return saved
+
+def cached_page(ctx, table, round, page):
+    if ctx.cache is None:
+        return None
+    snapshot = ctx.cache.page(ctx.tournament, table, round, page)
+    if snapshot is None:
+        return None
+    return parse_page(table, round, *snapshot)
+
+def cached_pages(ctx, table, round):
+    return parse_pages(table, ctx.cache.iter_pages(ctx.tournament, table, round))
+
+def checkpoint_page(ctx, table, round, page, snapshot):
+    if ctx.cache is not None and snapshot is not None and snapshot["rows"]:
+        ctx.cache.save_page(ctx.tournament, table, round, page, snapshot["headers"], snapshot["rows"])
+
+def finish_round(ctx, table, round, pages):
+    if ctx.cache is not None:
+        ctx.cache.finish_round(ctx.tournament, table, round, pages)
+
+def round_cached(ctx, table, round):
+    return ctx.cache is not None and ctx.cache.round_complete(ctx.tournament, table, round)
+
+def load_standings_from_page(ctx, round=0, page=1):
+    """Return the headers and rows of the standings page currently shown."""
+    cached = cached_page(ctx, "standings", round, page)
+    if cached is not None:
+        return cached
 
-        # Use ActionsChains to scroll like a real user
-        actions.scroll_by_amount(0, 100).perform()
-        time.sleep(0.1)
-        attempts += 1
+    # Keep trying until all rows are fully loaded
+    ctx.actions.move_to_element(ctx.driver.find_element(By.ID, "standings-round-selector-container")).perform()
+    wait_for_processing(ctx, STANDINGS_TABLE)
 
-    if new_data is not None:
-        standings_data.extend(new_data)
+    new_headers, new_data, snapshot = wait_for_complete_rows(ctx, lambda: extract_standings_table_data(ctx))
 
-    if headers == []:
-        headers = new_headers
-    
     if not new_data:
-        driver.quit()
-        exit(1)
-        
-    return headers
+        raise ScrapeError("Could not load any rows from the page")
 
-def load_matches_from_page(headers, round):
-    global matches_data
-    # Keep trying until all rows are fully loaded
-    actions.move_to_element(driver.find_element(By.ID, "pairings-round-selector-container")).perform()
-    attempts = 0
-    max_attempts = 30  # To prevent infinite loop
-    new_headers = None
-    new_data = None
-
-    time.sleep(1)  # Allow time for the next page to load
+    ctx.pages += 1
+    checkpoint_page(ctx, "standings", round, page, snapshot)
+    return new_headers, new_data
 
-    while attempts < max_attempts:
-        new_headers, new_data = extract_matches_table_data(round)
-        if new_headers and new_data:
-            break
+def load_matches_from_page(ctx, round, page=1):
+    """Return the headers and rows of the pairings page currently shown."""
+    cached = cached_page(ctx, "pairings", round, page)
+    if cached is not None:
+        return cached
 
-        # Use ActionsChains to scroll like a real user
-        actions.scroll_by_amount(0, 100).perform()
-        time.sleep(0.1)
-        attempts += 1
+    # Keep trying until all rows are fully loaded
+    ctx.actions.move_to_element(ctx.driver.find_element(By.ID, "pairings-round-selector-container")).perform()
+    wait_for_processing(ctx, PAIRINGS_TABLE)
 
-    if new_data is not None:
-        matches_data.extend(new_data)
+    new_headers, new_data, snapshot = wait_for_complete_rows(ctx, lambda: extract_matches_table_data(ctx, round))
 
-    if headers == []:
-        headers = new_headers
-    
     if not new_data:
-        driver.quit()
-        exit(1)
-        
-    return headers
+        raise ScrapeError("Could not load any rows from the page")
+
+    ctx.pages += 1
+    checkpoint_page(ctx, "pairings", round, page, snapshot)
+    return new_headers, new_data
+
+def standings_pages(ctx, round):
+    """Yield (headers, rows) for every page of the standings round currently shown."""
+    if round_cached(ctx, "standings", round):
+        yield from cached_pages(ctx, "standings", round)
+        return
+
+    if ctx.page_length is not None and cached_page(ctx, "standings", round, 1) is None:
+        # Not with a partly cached round, whose pages were stored at another length
+        with ctx.timer.phase("navigation"):
+            expand_page_length(ctx, STANDINGS_TABLE)
+    page = 0
+    page_number = 1
+    while page_number != -1:
+        page += 1
+        yield load_standings_from_page(ctx, round, page)
+        with ctx.timer.phase("navigation"):
+            page_number = switch_standings_to_next_page(ctx)
+    finish_round(ctx, "standings", round, page)
+
+def pairings_pages(ctx):
+    """Yield (headers, rows) for every page of every pairings round, starting at round 1."""
+    with ctx.timer.phase("navigation"):
+        switch_matches_to_first_round(ctx)
+    round_number = 1
+    while round_number != -1:
+        if round_cached(ctx, "pairings", round_number):
+            # Every page of this round is cached, go straight to the next round
+            yield from cached_pages(ctx, "pairings", round_number)
+        else:
+            if ctx.page_length is not None and cached_page(ctx, "pairings", round_number, 1) is None:
+                with ctx.timer.phase("navigation"):
+                    expand_page_length(ctx, PAIRINGS_TABLE)
+            page = 0
+            page_number = 1
+            while page_number != -1:
+                page += 1
+                yield load_matches_from_page(ctx, round_number, page)
+                with ctx.timer.phase("navigation"):
+                    page_number = switch_matches_to_next_page(ctx)
+            finish_round(ctx, "pairings", round_number, page)
+        with ctx.timer.phase("navigation"):
+            if not switch_matches_to_next_round(ctx):
+                break
+            switch_matches_to_first_page(ctx)
+        if not check_matches_for_round_has_pairings(ctx):
+            round_number = -1
+        else:
+            round_number += 1
+
+def write_table(ctx, table, output_file, pages):
+    """Hand every page of a table to the sink; return False if the sink couldn't save it."""
+    ctx.sink.start(ctx.tournament, table, output_file)
+    try:
+        for headers, rows in pages:
+            ctx.sink.write_page(headers, rows)
+            ctx.rows += len(rows)
+    except BaseException:
+        ctx.sink.abort()
+        raise
+    return ctx.sink.finish()
 
 # Function to check if a round has results
-def check_standings_for_round_has_results():
+def check_standings_for_round_has_results(ctx):
     try:
-        table_wrapper = driver.find_element(By.XPATH, './/*[@id="tournament-standings-table_wrapper"]')
+        table_wrapper = ctx.driver.find_element(By.XPATH, './/*[@id="tournament-standings-table_wrapper"]')
         table_wrapper.find_element(By.XPATH, ".//*[contains(@class, 'dataTables_scroll')]//td[contains(@class, 'dataTables_empty')]")
         return False
     except NoSuchElementException:
         return True
 
+def standings_complete(ctx):
+    # The event is over once its last standings round is the active one and has results
+    selector_container = ctx.driver.find_element(By.ID, "standings-round-selector-container")
+    all_buttons = selector_container.find_elements(By.XPATH, ".//button[contains(@class, 'round-selector')]")
+    return bool(all_buttons) and elementHasClass(all_buttons[-1], "active") and check_standings_for_round_has_results(ctx)
+
+def active_round_index(buttons):
+    for i, button in enumerate(buttons):
+        if elementHasClass(button, "active"):
+            return i
+    return len(buttons) - 1
+
 def elementHasClass(element, className):
     classes = element.get_attribute("class")
     for c in classes.split(" "):
@@ -379,30 +797,32 @@ def elementHasClass(element, className):
     return False
 
 # Function to switch to the previous round if no results
-def switch_standings_to_previous_round():
-    selector_container = driver.find_element(By.ID, "standings-round-selector-container")
+def switch_standings_to_previous_round(ctx):
+    selector_container = ctx.driver.find_element(By.ID, "standings-round-selector-container")
     active_button = selector_container.find_element(By.CLASS_NAME, "active")
     all_buttons = selector_container.find_elements(By.XPATH, "//div[@id='standings-round-selector-container']/button[contains(@class, 'round-selector')]")
 
     for i, button in enumerate(all_buttons):
         if button == active_button and i > 0:  # Find the button to the left
             previous_button = all_buttons[i - 1]
-            driver.execute_script("arguments[0].click();", previous_button)
-            time.sleep(3)  # Allow time for the page to load
+            snapshot = table_snapshot(ctx, STANDINGS_TABLE)
+            ctx.driver.execute_script("arguments[0].click();", previous_button)
+            wait_for_redraw(ctx, STANDINGS_TABLE, snapshot)
             return True
     
     return False
 
-def switch_standings_to_next_page():
+def switch_standings_to_next_page(ctx):
     # Check for next page button
     try:
-        next_button = driver.find_element(By.XPATH, "//div[@id='tournament-standings-table_wrapper']//*[contains(@class, 'paginate_button') and contains(@class, 'next')]")
-        actions.move_to_element(next_button).perform()
+        next_button = ctx.driver.find_element(By.XPATH, "//div[@id='tournament-standings-table_wrapper']//*[contains(@class, 'paginate_button') and contains(@class, 'next')]")
+        ctx.actions.move_to_element(next_button).perform()
         if "disabled" in next_button.get_attribute("class"):
             return -1
+        snapshot = table_snapshot(ctx, STANDINGS_TABLE)
         next_button.click()
-        time.sleep(2)  # Allow time for the next page to load
-        driver.execute_script("window.scrollTo(0, 0)")  # Scroll down by 500 pixels
+        wait_for_redraw(ctx, STANDINGS_TABLE, snapshot)
+        ctx.driver.execute_script("window.scrollTo(0, 0)")  # Scroll back to the top of the page
     except NoSuchElementException as e:
         return -1
     except ElementClickInterceptedException as e:
@@ -410,104 +830,291 @@ def switch_standings_to_next_page():
         
 #############################################################################################
 # Function to check if a round has pairings
-def check_matches_for_round_has_pairings():
+def check_matches_for_round_has_pairings(ctx):
     try:
-        table_wrapper = driver.find_element(By.XPATH, './/*[@id="tournament-matches-table_wrapper"]')
+        table_wrapper = ctx.driver.find_element(By.XPATH, './/*[@id="tournament-matches-table_wrapper"]')
         empty_row = table_wrapper.find_element(By.XPATH, ".//*[contains(@class, 'dataTables_scroll')]//td[contains(@class, 'dataTables_empty')]")
         return False
     except NoSuchElementException:
         return True
 
 # Function to switch to the first round
-def switch_matches_to_first_round():
-    #selector_container = driver.find_element(By.ID, "pairings-round-selector-container")
-    WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.XPATH, ".//div[@id='pairings-round-selector-container']/button[contains(text(), 'Round 1')]"))).click()
-    
-    time.sleep(2)  # Allow time for the page to load
+def switch_matches_to_first_round(ctx):
+    from selenium.webdriver.support import expected_conditions as EC
+    #selector_container = ctx.driver.find_element(By.ID, "pairings-round-selector-container")
+    first_button = ctx.wait(ctx.policy.page_timeout).until(EC.element_to_be_clickable((By.XPATH, ".//div[@id='pairings-round-selector-container']/button[contains(text(), 'Round 1')]")))
+    if elementHasClass(first_button, "active"):
+        return  # Already showing round 1, clicking won't redraw the table
+    snapshot = table_snapshot(ctx, PAIRINGS_TABLE)
+    first_button.click()
+    wait_for_redraw(ctx, PAIRINGS_TABLE, snapshot)
     return
 
 # Function to switch to the next round if no results
-def switch_matches_to_next_round():
-    active_button = driver.find_element(By.XPATH, "//div[@id='pairings-round-selector-container']/button[contains(@class, 'round-selector') and contains(@class, 'active')]")
-    all_buttons = driver.find_elements(By.XPATH, "//div[@id='pairings-round-selector-container']/button[contains(@class, 'round-selector')]")
+def switch_matches_to_next_round(ctx):
+    from selenium.webdriver.support import expected_conditions as EC
+    active_button = ctx.driver.find_element(By.XPATH, "//div[@id='pairings-round-selector-container']/button[contains(@class, 'round-selector') and contains(@class, 'active')]")
+    all_buttons = ctx.driver.find_elements(By.XPATH, "//div[@id='pairings-round-selector-container']/button[contains(@class, 'round-selector')]")
 
     active_button_found = False
     for i, button in enumerate(all_buttons):
         if button == active_button:  # Find the button to the Right
             active_button_found = True
         elif active_button_found:
-            actions.move_to_element(button).perform()
-            WebDriverWait(driver, 20).until(EC.element_to_be_clickable(button)).click()
-            time.sleep(2)  # Allow time for the page to load
+            ctx.actions.move_to_element(button).perform()
+            snapshot = table_snapshot(ctx, PAIRINGS_TABLE)
+            ctx.wait(ctx.policy.page_timeout).until(EC.element_to_be_clickable(button)).click()
+            wait_for_redraw(ctx, PAIRINGS_TABLE, snapshot)
             return True
     return False
 
-def switch_matches_to_next_page():
+def switch_matches_to_next_page(ctx):
     # Check for next page button
     try:
-        next_button = driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_paginate']//*[contains(@class, 'paginate_button') and contains(@class, 'next')]")
-        actions.move_to_element(next_button).perform()
+        next_button = ctx.driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_paginate']//*[contains(@class, 'paginate_button') and contains(@class, 'next')]")
+        ctx.actions.move_to_element(next_button).perform()
         if "disabled" in next_button.get_attribute("class"):
             return -1
+        snapshot = table_snapshot(ctx, PAIRINGS_TABLE)
         next_button.click()
-        time.sleep(2)  # Allow time for the next page to load
-        driver.execute_script("window.scrollTo(0, 0)")  # Scroll to top of page
+        wait_for_redraw(ctx, PAIRINGS_TABLE, snapshot)
+        ctx.driver.execute_script("window.scrollTo(0, 0)")  # Scroll to top of page
     except NoSuchElementException as e:
         return -1
     except ElementClickInterceptedException as e:
         return -1
 
-def switch_matches_to_first_page():
+def switch_matches_to_first_page(ctx):
     # Check for page 1 button
     try:
-        first_button = driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_paginate']/span/a[contains(@class, 'paginate_button')]")
-        actions.move_to_element(first_button).perform()
+        first_button = ctx.driver.find_element(By.XPATH, "//div[@id='tournament-pairings-table_paginate']/span/a[contains(@class, 'paginate_button')]")
+        ctx.actions.move_to_element(first_button).perform()
+        if elementHasClass(first_button, "current"):
+            return  # Already on the first page, clicking won't redraw the table
+        snapshot = table_snapshot(ctx, PAIRINGS_TABLE)
         first_button.click()
-        time.sleep(2)  # Allow time for the next page to load
+        wait_for_redraw(ctx, PAIRINGS_TABLE, snapshot)
     except NoSuchElementException as e:
         return -1
     except ElementClickInterceptedException as e:
         return -1
         
-def scrape_tournament(url, mode="standings"):
-    if mode is None:
-        mode = "standings"
-
-    global standings_data, matches_data
-    standings_data = []
-    matches_data = []
+def get_driver_path():
+    # Resolve (and download if needed) chromedriver only once per process
+    global _driver_path
+    if _driver_path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+class MeleeSession:
+    """Long-lived scraping session serving any number of tournaments.
+
+    With the selenium engine one browser is launched on the first scrape and
+    reused afterwards; the cookie consent is only dismissed once per browser.
+    Once `restart_after` table pages were read the browser is restarted before
+    the next scrape to bound Chrome's memory growth. When the browser session is
+    lost during a scrape it is restarted and the scrape is retried once; other
+    errors (timeouts, missing elements) are raised.
+    With the http engine the session wraps a pooled `requests.Session` instead;
+    a tournament whose responses don't match the schema melee_http.py assumes is
+    scraped with the browser.
+    With a `page_length` (-1 for all rows) every round is shown on as few pages
+    as the tables allow before it is read. With a `lean` LeanProfile the browser
+    skips images, fonts, media and trackers.
+    With a `cache` (scrape_cache.PageCache) every table page is checkpointed, an
+    interrupted scrape resumes from the first missing page, and finished events
+    are written from the cache without starting the browser.
+    Rows are handed page by page to the `sink` (melee_sinks.py), which writes the
+    CSV files by default.
+
+        with MeleeSession() as session:
+            for url in urls:
+                session.scrape(url, "standings")
+    """
+    def __init__(self, engine="selenium", restart_after=RESTART_AFTER_PAGES, http_session=None, wait_policy=None,
+                 extraction="dom", cache=None, sink=None, page_length=None, lean=None):
+        self.engine = engine
+        self.page_length = page_length
+        self.lean = lean
+        self.cache = cache
+        self.sink = sink or CsvSink()
+        self.extraction = extraction
+        self.restart_after = restart_after
+        self.wait_policy = wait_policy or WaitPolicy()
+        self.http_session = http_session
+        self.owns_http_session = http_session is None
+        self.driver = None
+        self.cookies_closed = False
+        self.pages_since_start = 0
+        self.restarts = 0
+        self.http_fallbacks = 0  # Tournaments the http engine handed to the browser
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        service = Service(get_driver_path())
+        self.driver = webdriver.Chrome(service=service, options=chrome_options(self.lean))
+        if self.lean is not None:
+            apply_lean_profile(self.driver, self.lean)
+        self.cookies_closed = False
+        self.pages_since_start = 0
+
+    def stop(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass  # The browser is already gone
+            self.driver = None
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def alive(self):
+        """Whether the browser still answers; False once its session is lost."""
+        try:
+            self.driver.title
+        except WebDriverException:
+            return False
+        return True
 
-    print(f"Melee link: {url}")
+    def close(self):
+        self.stop()
+        if self.http_session is not None and self.owns_http_session:
+            self.http_session.close()
+            self.http_session = None
+
+    def scrape(self, url, mode="standings"):
+        if mode is None:
+            mode = "standings"
+
+        if self.cache is not None:
+            ctx = scrape_from_cache(self.cache, url, mode, self.sink)
+            if ctx is not None:
+                return ctx
+
+        if self.engine == "http":
+            import melee_http
+            if self.http_session is None:
+                self.http_session = melee_http.create_session()
+            # Same kind of result as a browser scrape; the counts come from the sink
+            ctx = ScrapeContext(None, sink=self.sink)
+            ctx.tournament = url.split('/')[-1]
+            pages, rows = self.sink.pages, self.sink.rows
+            try:
+                with ctx.timer.phase("navigation"):
+                    melee_http.scrape_tournament(url, mode, session=self.http_session, sink=self.sink)
+            except melee_http.UnexpectedResponse as e:
+                # The endpoints and JSON fields are unverified; don't trust them once they look different
+                print(f"Unexpected Melee.gg response ({e}), scraping with the browser instead.")
+                self.http_fallbacks += 1
+            else:
+                ctx.pages, ctx.rows = self.sink.pages - pages, self.sink.rows - rows
+                return ctx
 
-    global driver, actions
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+        print(f"Melee link: {url}")
 
-    # Initialize ActionChains for mouse scroll simulation
-    actions = ActionChains(driver)
+        if self.driver is None:
+            self.start()
+        elif self.restart_after and self.pages_since_start >= self.restart_after:
+            self.restart()
+        try:
+            ctx = self._scrape_once(url, mode)
+        except WebDriverException as e:
+            if not isinstance(e, InvalidSessionIdException) and self.alive():
+                raise
+            print(f"Browser session lost ({e.msg}), restarting and retrying.")
+            self.restart()
+            ctx = self._scrape_once(url, mode)
+
+        self.pages_since_start += ctx.pages
+        return ctx
+
+    def _scrape_once(self, url, mode):
+        ctx = ScrapeContext(self.driver, self.wait_policy, self.extraction, self.cache, self.sink, self.page_length)
+        scrape_with_context(ctx, url, mode, close_cookies=not self.cookies_closed)
+        self.cookies_closed = True
+        return ctx
+
+def scrape_tournament(url, mode="standings", engine="selenium", session=None, wait_policy=None, extraction="dom",
+                      cache=None, sink=None, page_length=None, lean=None):
+    with MeleeSession(engine=engine, http_session=session, wait_policy=wait_policy, extraction=extraction,
+                      cache=cache, sink=sink, page_length=page_length, lean=lean) as melee:
+        melee.scrape(url, mode)
+
+def scrape_from_cache(cache, url, mode, sink=None):
+    """Hand a finished, fully cached tournament to the sink; return None if it isn't cached."""
+    tournament = url.split('/')[-1]
+    tables = [table for table in ("standings", "pairings") if mode == table or mode == "both"]
+    if not all(cache.finished(tournament, table) for table in tables):
+        return None
+
+    print(f"Melee link: {url} (from cache)")
+    ctx = ScrapeContext(None, cache=cache, sink=sink)
+    ctx.tournament = tournament
+    output_file = f"{tournament}_{mode}.csv"
+    for table in tables:
+        if not write_table(ctx, table, output_file, parse_pages(table, cache.iter_pages(tournament, table))):
+            break
+    return ctx
 
-    driver.get(url)
+def scrape_with_context(ctx, url, mode, close_cookies=True):
+    try:
+        scrape_tables(ctx, url, mode, close_cookies)
+    finally:
+        print(f"Timing: {ctx.timer.report()}, {ctx.pages} pages, {ctx.rows} rows, {ctx.timeouts} wait timeouts")
+        if ctx.page_length is not None:
+            print(f"Page length: {ctx.pages_avoided} pages avoided, {ctx.lengths_refused} rounds paged through "
+                  f"because the length was refused")
+        traffic = traffic_report(ctx.driver)
+        if traffic is not None:
+            page_load = f"{ctx.page_load:.1f}s" if ctx.page_load is not None else "-"
+            print(f"Traffic: {traffic['bytes'] / 1024:.0f} KiB in {traffic['requests']} requests, "
+                  f"{traffic['blocked']} blocked, page load {page_load}")
+        if ctx.cache is not None:
+            print(f"Cache: {ctx.cache.stats()}")
+
+def scrape_tables(ctx, url, mode, close_cookies=True):
+    from selenium.webdriver.support import expected_conditions as EC
+    with ctx.timer.phase("navigation"):
+        start = time.perf_counter()
+        ctx.driver.get(url)
+        ctx.page_load = time.perf_counter() - start
 
     # Ensure the cookie popup is closed
-    close_cookie_popup()
+    if close_cookies:
+        close_cookie_popup(ctx)
 
     # Wait for the main standings table to load using the precise XPath
-    WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located((By.XPATH, '//*[@id="tournament-standings-table"]'))
-    )
+    with ctx.timer.phase("navigation"):
+        ctx.wait(ctx.policy.page_timeout).until(
+            EC.presence_of_element_located((By.XPATH, '//*[@id="tournament-standings-table"]'))
+        )
 
-    output_file = f"{url.split('/')[-1]}_{mode}.csv"
+    ctx.tournament = url.split('/')[-1]
+    output_file = f"{ctx.tournament}_{mode}.csv"
+    # Tables of a running event are dropped from the cache once read, so the next run reads them again
+    final = ctx.cache is not None and standings_complete(ctx)
 
     if(mode == "standings" or mode == "both"):
         # Ensure we are on a round with results
-        while not check_standings_for_round_has_results():
+        while not check_standings_for_round_has_results(ctx):
             output_file = f"{url.split('/')[-1]}_{mode}_incomplete.csv"
-            time.sleep(1)
-            if not switch_standings_to_previous_round():
-                return
+            with ctx.timer.phase("navigation"):
+                if not switch_standings_to_previous_round(ctx):
+                    return
         # Switch to the last round if not already there
         # Check that the last button of parent with id standings-round-selector-container has class "active"
-        selector_container = driver.find_element(By.ID, "standings-round-selector-container")
+        selector_container = ctx.driver.find_element(By.ID, "standings-round-selector-container")
         all_buttons = selector_container.find_elements(By.XPATH, ".//button[contains(@class, 'round-selector')]")
         if all_buttons:
             last_button = all_buttons[-1]
@@ -515,62 +1122,77 @@ def scrape_tournament(url, mode="standings"):
                 #create that file if it doesn't exist and make it empty
                 output_file = f"{url.split('/')[-1]}_{mode}_incomplete.csv"
         else:
-            driver.quit()
-            exit(1)
+            raise ScrapeError("No standings rounds found")
 
-        headers = []
-        page_number = 1
-        while page_number != -1:
-            headers = load_standings_from_page(headers)
-            page_number = switch_standings_to_next_page()
-
-        headers = split_standings_headers(headers)
-        # Convert to DataFrame for easy handling
-        try:
-            df = pd.DataFrame(standings_data, columns=headers)
-        except ValueError as e:
-            print("Error creating DataFrame. Check if the headers match the data.")
+        standings_round = active_round_index(all_buttons)
+        saved = write_table(ctx, "standings", output_file, standings_pages(ctx, standings_round))
+        if ctx.cache is not None:
+            ctx.cache.finish_table(ctx.tournament, "standings", final)
+        if not saved:
             return
 
-        # Save the standings_data to a CSV file (optional)
-        df.to_csv(output_file, index=False)
-        
-        print("Saved standings as \"" + output_file + "\"")
-
     if(mode == "pairings" or mode == "both"):
-        switch_matches_to_first_round()
-        headers = []
-        round_number = 1
-        while round_number != -1:
-            page_number = 1
-            while page_number != -1:
-                headers = load_matches_from_page(headers, round_number)
-                page_number = switch_matches_to_next_page()
-            if not switch_matches_to_next_round():
-                break
-            switch_matches_to_first_page()
-            if not check_matches_for_round_has_pairings():
-                round_number = -1
-            else:
-                round_number += 1
+        write_table(ctx, "pairings", output_file, pairings_pages(ctx))
+        if ctx.cache is not None:
+            ctx.cache.finish_table(ctx.tournament, "pairings", final)
 
-        headers = split_matches_headers(headers)
-        
-        # Convert to DataFrame for easy handling
-        df = pd.DataFrame(matches_data, columns=headers)
-
-        # Save the matches_data to a CSV file (optional)
-        df.to_csv(output_file, index=False)
-        
-        print("Saved pairings as \"" + output_file + "\"")
-
-    # Close the browser
-    driver.quit()
+def parse_page_length(value):
+    if value == "all":
+        return -1
+    length = int(value)
+    if length < 1:
+        raise argparse.ArgumentTypeError("the page length must be 'all' or a positive number")
+    return length
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Melee.gg Tournament Scraper")
     parser.add_argument("url", help="Melee.gg tournament URL")
     parser.add_argument("--mode", help="Scrape standings, pairings or both")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                        help="Drive a headless browser (default) or read Melee's JSON endpoints directly "
+                             "(experimental, falls back to the browser on unexpected responses)")
+    parser.add_argument("--wait-timeout", type=float, default=15,
+                        help="Seconds to wait for a table redraw before moving on (default: 15)")
+    parser.add_argument("--extraction", choices=["dom", "script"], default="dom",
+                        help="Read table cells one WebDriver call at a time (dom) or the whole page in one script call")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE, default=None,
+                        help=f"Checkpoint every page in this cache file and resume from it (default: {DEFAULT_CACHE})")
+    parser.add_argument("--sink", choices=["csv", "sqlite", "null"], default="csv",
+                        help="Write CSV files (default), load the rows straight into --db, or discard them")
+    parser.add_argument("--db", default="swu_meta.db", help="Database for --sink sqlite (default: swu_meta.db)")
+    parser.add_argument("--page-length", type=parse_page_length, default=None,
+                        help="Show 'all' rows (or this many) per table page instead of paging through the tables")
+    parser.add_argument("--lean", action="store_true",
+                        help="Block images, fonts, media and trackers, and don't wait for them to load")
+    parser.add_argument("--allow", action="append", default=[], metavar="CATEGORY|PATTERN",
+                        help=f"With --lean, keep loading a category ({', '.join(LEAN_BLOCKLIST)}) or matching URLs")
+    parser.add_argument("--derive-standings", action="store_true",
+                        help="With --mode pairings, also write the standings computed from the pairings")
     args = parser.parse_args()
-
-    scrape_tournament(args.url, args.mode)
\ No newline at end of file
+    if args.derive_standings and args.mode != "pairings":
+        parser.error("--derive-standings needs --mode pairings")
+
+    policy = WaitPolicy(redraw_timeout=args.wait_timeout, load_timeout=args.wait_timeout)
+    cache = PageCache(args.cache) if args.cache else None
+    conn = None
+    if args.sink == "sqlite":
+        import sqlite3
+        conn = sqlite3.connect(args.db)
+        sink = SqliteSink(conn)
+    elif args.sink == "null":
+        sink = NullSink()
+    else:
+        sink = CsvSink()
+    if args.derive_standings:
+        sink = DerivedStandingsSink(sink)
+    try:
+        scrape_tournament(args.url, args.mode, args.engine, wait_policy=policy, extraction=args.extraction, cache=cache,
+                          sink=sink, page_length=args.page_length, lean=LeanProfile(args.allow) if args.lean else None)
+    except ScrapeError as e:
+        print(f"Scrape failed: {e}")
+        sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.close()
+        if conn is not None:
+            conn.close()
\ No newline at end of file
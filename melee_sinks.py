@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""melee_sinks.py
+Destinations for the rows produced by the Melee.gg scrapers.
+Both engines hand every table page to a sink as soon as it has been read, so
+memory stays bounded by one page no matter how large the event is:
+
+    sink.start(tournament_id, "standings" | "pairings", output_file)
+    sink.write_page(headers, rows)  # once per page, `headers` as shown on Melee
+    sink.finish()                   # table complete; returns False if it couldn't be saved
+    sink.abort()                    # scrape failed, discard what was written
+
+- `CsvSink` writes the `<id>_<mode>.csv` files, identical to the DataFrame export
+  the scrapers used before. Rows go to a `.part` file that is renamed once the
+  table is complete, so a crashed scrape never leaves a truncated CSV behind.
+- `SqliteSink` loads the rows straight into the database with the bulk loader of
+  melee_csv_to_sql.py, one transaction per table, without any CSV in between.
+- `NullSink` only counts rows, for benchmarking the scrapers themselves.
+- `DerivedStandingsSink` wraps any of them and follows every pairings table with
+  the standings computed from it (see swiss_standings.py), so an event only has
+  to be scraped in `pairings` mode.
+"""
+import csv
+import os
+
+from melee_tables import STANDINGS_HEADERS, split_standings_headers, split_matches_headers
+
+def split_headers(table, headers):
+    if table == "standings":
+        return split_standings_headers(headers)
+    return split_matches_headers(headers)
+
+class NullSink:
+    """Discards every row; keeps page and row counts."""
+    def __init__(self):
+        self.pages = 0
+        self.rows = 0
+
+    def start(self, tournament, table, output_file):
+        self.tournament = tournament
+        self.table = table
+        self.output_file = output_file
+
+    def write_page(self, headers, rows):
+        self.pages += 1
+        self.rows += len(rows)
+
+    def finish(self):
+        return True
+
+    def abort(self):
+        pass
+
+class CsvSink(NullSink):
+    """Writes each table to its CSV file, one page at a time."""
+    def start(self, tournament, table, output_file):
+        super().start(tournament, table, output_file)
+        self.columns = None
+        self.failed = False
+        self.part_file = output_file + ".part"
+        self.file = open(self.part_file, "w", newline="", encoding="utf-8")
+        # Same dialect as DataFrame.to_csv: minimal quoting, platform line endings
+        self.writer = csv.writer(self.file, lineterminator=os.linesep)
+
+    def write_page(self, headers, rows):
+        super().write_page(headers, rows)
+        if self.failed:
+            return
+        if self.columns is None:
+            self.columns = split_headers(self.table, headers)
+            self.writer.writerow(self.columns)
+        if any(len(row) != len(self.columns) for row in rows):
+            self.failed = True
+            return
+        self.writer.writerows(rows)
+
+    def finish(self):
+        if self.columns is None:
+            self.columns = split_headers(self.table, [])
+            self.writer.writerow(self.columns)
+        self.file.close()
+        if self.failed:
+            os.remove(self.part_file)
+            print("Error creating DataFrame. Check if the headers match the data.")
+            return False
+        os.replace(self.part_file, self.output_file)
+        print(f"Saved {self.table} as \"{self.output_file}\"")
+        return True
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.part_file):
+            os.remove(self.part_file)
+
+class SqliteSink(NullSink):
+    """Loads each table into the database, committing once it is complete.
+
+    Standings become `results` rows and pairings `matches` rows, exactly as if the
+    CSV files had been loaded with `melee_csv_to_sql.py --bulk`; the pairings of a
+    tournament that isn't in the database are not saved.
+    """
+    def __init__(self, conn, loader=None):
+        super().__init__()
+        from melee_csv_to_sql import BulkLoader
+        self.conn = conn
+        self.loader = loader or BulkLoader(conn)
+
+    def start(self, tournament, table, output_file):
+        super().start(tournament, table, output_file)
+        self.columns = None
+        self.loaded = 0
+        self.tournament_db_id = self.loader.tournament_id(tournament, create=table == "standings")
+
+    def write_page(self, headers, rows):
+        super().write_page(headers, rows)
+        if self.tournament_db_id is None:
+            return
+        if self.columns is None:
+            self.columns = split_headers(self.table, headers)
+        records = (dict(zip(self.columns, row)) for row in rows)
+        try:
+            if self.table == "standings":
+                self.loaded += self.loader.insert_results(self.loader.standings_records(self.tournament_db_id, records))
+            else:
+                self.loaded += self.loader.insert_matches(self.loader.pairings_records(self.tournament_db_id, records))
+        except Exception:
+            self.abort()
+            raise
+
+    def finish(self):
+        if self.tournament_db_id is None:
+            self.loader.skipped.append(self.output_file)
+            print(f"Skipped the {self.table} of tournament {self.tournament}: it isn't in the database")
+            return False
+        self.conn.commit()
+        self.loader.rows_loaded += self.loaded
+        self.loader.files_loaded += 1
+        print(f"Loaded {self.loaded} {self.table} rows of tournament {self.tournament} into the database")
+        return True
+
+    def abort(self):
+        # Drop the half-loaded table and the ids cached for its uncommitted rows
+        self.conn.rollback()
+        self.loader.reload()
+
+def write_whole_table(sink, tournament, table, output_file, headers, rows):
+    """Hand a table of rows to `sink` as a single page; return what its finish() returns."""
+    sink.start(tournament, table, output_file)
+    try:
+        sink.write_page(headers, rows)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.finish()
+
+class DerivedStandingsSink:
+    """Passes every table on to `sink`, and after a pairings table the standings derived from it.
+
+    The derived standings go to `<id>_standings.csv` (or the standings of the
+    database with a SqliteSink), as if they had been scraped. `rounds` limits
+    them to the first rounds, e.g. to leave out the top cut. A SqliteSink skips
+    the pairings of a tournament that isn't in the database; then the pairings and
+    their derived standings are written to CSV files instead, to be loaded with
+    melee_csv_to_sql.py once the tournament has been added.
+    """
+    def __init__(self, sink, rounds=None):
+        self.sink = sink
+        self.rounds = rounds
+        self.pairings = None
+
+    def __getattr__(self, name):
+        # Counters and settings of the wrapped sink
+        return getattr(self.sink, name)
+
+    def start(self, tournament, table, output_file):
+        self.tournament = tournament
+        self.table = table
+        self.output_file = output_file
+        self.headers = None
+        self.columns = None
+        # The whole table is needed for the tiebreakers, so pairings rows are kept
+        self.pairings = [] if table == "pairings" else None
+        self.sink.start(tournament, table, output_file)
+
+    def write_page(self, headers, rows):
+        if self.pairings is not None:
+            if self.columns is None:
+                self.headers = headers
+                self.columns = split_matches_headers(headers)
+            self.pairings.extend(rows)
+        self.sink.write_page(headers, rows)
+
+    def finish(self):
+        saved = self.sink.finish()
+        pairings, self.pairings = self.pairings, None
+        skipped = not saved and isinstance(self.sink, SqliteSink)
+        if pairings is None or not (saved or skipped):
+            return saved
+        from swiss_standings import standings_rows  # NumPy is only needed here
+        rows = standings_rows(self.columns or split_matches_headers([]), pairings, self.rounds)
+        if "_pairings" in self.output_file:
+            pairings_file = self.output_file
+            standings_file = self.output_file.replace("_pairings", "_standings")
+        else:
+            pairings_file = f"{self.tournament}_pairings.csv"
+            standings_file = f"{self.tournament}_standings.csv"
+        if saved:
+            return write_whole_table(self.sink, self.tournament, "standings", standings_file, STANDINGS_HEADERS, rows)
+        # Nothing of the tournament reached the database; keep both tables for a later load
+        fallback = CsvSink()
+        write_whole_table(fallback, self.tournament, "pairings", pairings_file, self.headers or [], pairings)
+        write_whole_table(fallback, self.tournament, "standings", standings_file, STANDINGS_HEADERS, rows)
+        print(f"Load them with melee_csv_to_sql.py once tournament {self.tournament} is in the database")
+        return False
+
+    def abort(self):
+        self.pairings = None
+        self.sink.abort()
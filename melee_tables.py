@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""melee_tables.py
+Column layout shared by every Melee.gg scraping engine.
+The Selenium scraper reads values out of the DataTables DOM while the HTTP engine
+reads them from the JSON the widget loads, but both end up with the same plain
+strings (cell text, link href, link text). The functions in this module turn those
+strings into the values written to the CSV files, so both engines produce the
+same `split_standings_headers`/`split_matches_headers` layout.
+"""
+import re
+
+# Header texts of the standings and pairings tables as shown on Melee.gg
+STANDINGS_HEADERS = [
+    "Rank",
+    "Players/Teams",
+    "Decklist",
+    "Match Record",
+    "Game Record",
+    "Points",
+    "OMW%",
+    "TGW%",
+    "OGW%"
+]
+
+MATCHES_HEADERS = [
+    "Table",
+    "Players/Teams",
+    "Decklists",
+    "Result"
+]
+
+def split_standings_headers(headers):
+    new_headers = []
+    for header in headers:
+        if header == "Players/Teams":
+            new_headers.append("Username")
+            new_headers.append("Players/Teams")
+        elif header == "Decklist":
+            new_headers.append("Leader")
+            new_headers.append("Base")
+            new_headers.append("Decklink")
+        elif header == "Match Record":
+            new_headers.append("Match Wins")
+            new_headers.append("Match Losses")
+            new_headers.append("Match Draws")
+        elif header == "Game Record":
+            new_headers.append("Game Wins")
+            new_headers.append("Game Losses")
+            new_headers.append("Game Draws")
+        else:
+            new_headers.append(header)
+    return new_headers
+
+def split_matches_headers(headers):
+    new_headers = ["Round"]
+    for header in headers:
+        if header == "Players/Teams":
+            new_headers.append("Player1_username")
+            new_headers.append("Player1_displayname")
+            new_headers.append("Player2_username")
+            new_headers.append("Player2_displayname")
+        elif header == "Decklists":
+            new_headers.append("Player1_leader")
+            new_headers.append("Player1_base")
+            new_headers.append("Player1_decklink")
+            new_headers.append("Player2_leader")
+            new_headers.append("Player2_base")
+            new_headers.append("Player2_decklink")
+        elif header == "Result":
+            new_headers.append("Player1_wins")
+            new_headers.append("Player2_wins")
+            new_headers.append("Draws")
+        else:
+            new_headers.append(header)
+    return new_headers
+
+def player_fields(href, text):
+    # The username is the last part of the profile link, the link text is the display name
+    return [href.split("/")[-1].strip(), text.strip()]
+
+def decklist_fields(href, text):
+    # Decklist links read "Leader, Subtitle - Base"
+    deck = text.strip().split(" - ")
+    if len(deck) == 2:
+        return [deck[0], deck[1], href]
+    return ["-", "-", "-"]
+
+def result_fields(text, players):
+    text = text.strip()
+    match = re.match("(.+) won ([0-3]-[0-3]-[0-3])", text)
+    if match:
+        if players[1] == match.group(1):
+            return match.group(2).split("-")
+        elif players[3] == match.group(1):
+            scores = match.group(2).split("-")
+            score1 = scores[0]
+            scores[0] = scores[1]
+            scores[1] = score1
+            return scores
+    else:
+        match = re.match("(.+) was assigned a bye", text)
+        if match:
+            return [2,0,0]
+        else:
+            match = re.match("([0-3]-[0-3]-[0-3]) Draw", text)
+            if match:
+                return match.group(1).split("-")
+
+    return [0,0,0]
+
+def record_fields(text):
+    raw_text = text.strip()
+    if "-" in raw_text:
+        try:
+            wins, losses, draws = map(int, raw_text.split("-"))
+            return [wins, losses, draws]
+        except ValueError:
+            return [0, 0, 0]  # Default for invalid format
+    return [0, 0, 0]  # Default if no data
+
+def format_percentage(value):
+    # Melee renders tiebreakers as percentages with two decimals, e.g. "62.50%"
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    return f"{float(value):.2f}%"
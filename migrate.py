@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""migrate.py
+Bring a SQLite database created from `base_db.sql` up to the current schema by
+applying the numbered migration scripts in `migrations/` (`0001_name.sql`,
+`0002_name.sql`, …) that have not been applied yet.
+
+Applied versions are recorded in a `schema_version` table. Each migration runs in
+its own transaction together with its `schema_version` row, so a failing script
+leaves the database at the previous version.
+
+`--check-plans` runs `EXPLAIN QUERY PLAN` on every lookup the loaders issue and
+fails if one of them falls back to a full table scan – run it after adding a
+query or changing an index.
+Usage
+-------
+    python migrate.py [path/to/database.sqlite] [--status] [--check-plans]
+
+If no path is supplied, the script defaults to the file `swu_meta.db` in the
+current working directory.
+"""
+import argparse
+import re
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_DB = "swu_meta.db"
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Lookups issued per row by the loaders (melee_csv_to_sql, comp_hub_scraper).
+# Each one must be answered through an index.
+LOADER_QUERIES = [
+    ("get_tournament_by_melee_id", "SELECT tournament_id FROM tournaments WHERE link=?"),
+    ("comp_hub tournament lookup", "SELECT tournament_id FROM tournaments WHERE date = ? AND name = ?"),
+    ("get_player_by_name", "SELECT player_id FROM players WHERE name=? ORDER BY player_id LIMIT 1"),
+    ("get_player_by_name alias", "SELECT player_id FROM player_aliases WHERE alias=? ORDER BY alias_id LIMIT 1"),
+    ("insert_leader", "SELECT leader_id FROM leaders WHERE name=? AND subtitle=?"),
+    ("insert_base", "SELECT base_id FROM bases WHERE name=?"),
+    ("insert_deck", "SELECT deck_id FROM decks WHERE leader_id=? AND base_id=? AND decklink=?"),
+    ("result_exists", "SELECT 1 FROM results WHERE tournament_id=? AND player_id=?"),
+]
+
+def available_migrations(directory=MIGRATIONS_DIR):
+    """Return (version, name, path) of every migration script, ordered by version."""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = re.fullmatch(r"(\d+)_(\w+)\.sql", path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    migrations.sort()
+    versions = [version for version, _name, _path in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration numbers in {directory}.")
+    return migrations
+
+def ensure_version_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "schema_version" (
+            "version"    INTEGER PRIMARY KEY,
+            "name"       TEXT NOT NULL,
+            "applied_at" TEXT NOT NULL
+        );
+        """
+    )
+    conn.commit()
+
+def current_version(conn):
+    ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version;").fetchone()
+    return row[0] or 0
+
+def migrate(conn, directory=MIGRATIONS_DIR):
+    """Apply every pending migration; return the versions that were applied."""
+    version = current_version(conn)
+    applied = []
+    for number, name, path in available_migrations(directory):
+        if number <= version:
+            continue
+        script = path.read_text(encoding="utf-8")
+        applied_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        try:
+            conn.executescript(
+                "BEGIN;\n"
+                f"{script}\n;"
+                f"INSERT INTO schema_version (version, name, applied_at) VALUES ({number}, '{name}', '{applied_at}');\n"
+                "COMMIT;"
+            )
+        except sqlite3.Error as exc:
+            if conn.in_transaction:
+                conn.rollback()
+            raise RuntimeError(f"Migration {path.name} failed: {exc}") from exc
+        print(f"Applied {path.name}")
+        applied.append(number)
+    return applied
+
+def full_scans(conn):
+    """Return (query name, plan detail) for every loader query that scans a table."""
+    scans = []
+    for name, query in LOADER_QUERIES:
+        params = [None] * query.count("?")
+        for _id, _parent, _unused, detail in conn.execute(f"EXPLAIN QUERY PLAN {query}", params):
+            # "SCAN t" reads the whole table, "SEARCH t USING [COVERING] INDEX …" doesn't
+            if detail.startswith("SCAN"):
+                scans.append((name, detail))
+    return scans
+
+def main(db_path, status_only, check_plans):
+    with closing(sqlite3.connect(db_path)) as conn:
+        if status_only:
+            version = current_version(conn)
+            pending = [path.name for number, _name, path in available_migrations() if number > version]
+            print(f"Schema version {version}; pending: {', '.join(pending) or 'none'}")
+            return 0
+
+        if not migrate(conn):
+            print(f"Schema is up to date (version {current_version(conn)}).")
+
+        if check_plans:
+            scans = full_scans(conn)
+            for name, detail in scans:
+                print(f"Full table scan in {name}: {detail}")
+            if scans:
+                return 1
+            print(f"All {len(LOADER_QUERIES)} loader queries use an index.")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("db", nargs="?", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    parser.add_argument("--status", action="store_true", help="Only print the current version and pending migrations")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="Fail if any loader query needs a full table scan")
+    args = parser.parse_args()
+    sys.exit(main(args.db, args.status, args.check_plans))
@@ -0,0 +1,68 @@
+-- Unique constraints and lookup indexes for the loader's hot queries.
+-- Duplicate leaders, bases and decks are merged into the row with the lowest id
+-- first, so the UNIQUE indexes can be created on existing databases.
+
+-- Leaders: repoint decks to the lowest leader_id per (name, subtitle)
+CREATE TEMP TABLE leader_map AS
+SELECT l.leader_id AS old_id, k.keep_id AS new_id
+  FROM leaders l
+  JOIN (SELECT name, subtitle, MIN(leader_id) AS keep_id FROM leaders GROUP BY name, subtitle) k
+    ON k.name IS l.name AND k.subtitle IS l.subtitle
+ WHERE l.leader_id <> k.keep_id;
+UPDATE decks SET leader_id = (SELECT new_id FROM leader_map WHERE old_id = decks.leader_id)
+ WHERE leader_id IN (SELECT old_id FROM leader_map);
+DELETE FROM leaders WHERE leader_id IN (SELECT old_id FROM leader_map);
+DROP TABLE leader_map;
+
+-- Bases: repoint decks to the lowest base_id per name
+CREATE TEMP TABLE base_map AS
+SELECT b.base_id AS old_id, k.keep_id AS new_id
+  FROM bases b
+  JOIN (SELECT name, MIN(base_id) AS keep_id FROM bases GROUP BY name) k
+    ON k.name = b.name
+ WHERE b.base_id <> k.keep_id;
+UPDATE decks SET base_id = (SELECT new_id FROM base_map WHERE old_id = decks.base_id)
+ WHERE base_id IN (SELECT old_id FROM base_map);
+DELETE FROM bases WHERE base_id IN (SELECT old_id FROM base_map);
+DROP TABLE base_map;
+
+-- Decks: INSERT OR IGNORE without a UNIQUE constraint left one copy per result.
+-- Repoint results and deck_cards to the lowest deck_id per (leader_id, base_id, decklink)
+CREATE TEMP TABLE deck_map AS
+SELECT d.deck_id AS old_id, k.keep_id AS new_id
+  FROM decks d
+  JOIN (SELECT leader_id, base_id, decklink, MIN(deck_id) AS keep_id
+          FROM decks GROUP BY leader_id, base_id, decklink) k
+    ON k.leader_id = d.leader_id AND k.base_id = d.base_id AND k.decklink IS d.decklink
+ WHERE d.deck_id <> k.keep_id;
+CREATE INDEX temp.idx_deck_map_old_id ON deck_map (old_id);
+UPDATE results SET deck_id = (SELECT new_id FROM deck_map WHERE old_id = results.deck_id)
+ WHERE deck_id IN (SELECT old_id FROM deck_map);
+UPDATE deck_cards SET deck_id = (SELECT new_id FROM deck_map WHERE old_id = deck_cards.deck_id)
+ WHERE deck_id IN (SELECT old_id FROM deck_map);
+DELETE FROM decks WHERE deck_id IN (SELECT old_id FROM deck_map);
+DROP TABLE deck_map;
+
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_leaders_name_subtitle" ON "leaders" (
+	"name",
+	"subtitle"
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_bases_name" ON "bases" (
+	"name"
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_decks_leader_base_link" ON "decks" (
+	"leader_id",
+	"base_id",
+	"decklink"
+);
+CREATE INDEX IF NOT EXISTS "idx_tournaments_link" ON "tournaments" (
+	"link"
+);
+CREATE INDEX IF NOT EXISTS "idx_tournaments_date_name" ON "tournaments" (
+	"date",
+	"name"
+);
+CREATE INDEX IF NOT EXISTS "idx_results_tournament_player" ON "results" (
+	"tournament_id",
+	"player_id"
+);
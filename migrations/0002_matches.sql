@@ -0,0 +1,35 @@
+-- Head-to-head results loaded from the `<id>_pairings.csv` files.
+-- A bye has no player2_id/deck2_id. Reloading a file is a no-op thanks to the
+-- UNIQUE constraint (a player plays at most one match per round).
+CREATE TABLE IF NOT EXISTS "matches" (
+	"match_id"	INTEGER,
+	"tournament_id"	INTEGER NOT NULL,
+	"round"	INTEGER NOT NULL,
+	"table_number"	INTEGER,
+	"player1_id"	INTEGER NOT NULL,
+	"player2_id"	INTEGER,
+	"deck1_id"	INTEGER,
+	"deck2_id"	INTEGER,
+	"player1_wins"	INTEGER NOT NULL DEFAULT 0,
+	"player2_wins"	INTEGER NOT NULL DEFAULT 0,
+	"draws"	INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY("match_id" AUTOINCREMENT),
+	UNIQUE("tournament_id","round","player1_id"),
+	FOREIGN KEY("deck1_id") REFERENCES "decks"("deck_id"),
+	FOREIGN KEY("deck2_id") REFERENCES "decks"("deck_id"),
+	FOREIGN KEY("player1_id") REFERENCES "players"("player_id"),
+	FOREIGN KEY("player2_id") REFERENCES "players"("player_id"),
+	FOREIGN KEY("tournament_id") REFERENCES "tournaments"("tournament_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_matches_tournament_round" ON "matches" (
+	"tournament_id",
+	"round"
+);
+CREATE INDEX IF NOT EXISTS "idx_matches_deck1_deck2" ON "matches" (
+	"deck1_id",
+	"deck2_id"
+);
+CREATE INDEX IF NOT EXISTS "idx_matches_deck2_deck1" ON "matches" (
+	"deck2_id",
+	"deck1_id"
+);
@@ -0,0 +1,35 @@
+-- Materialized leader/base matchup matrix (see matchup_matrix.py).
+-- One row per (deck archetype, opposing archetype, week, tournament level); every
+-- match is counted once from each side. `week` is the Monday of the tournament's
+-- week (YYYY-MM-DD) and `level` is tournaments.level ('' when unknown).
+CREATE TABLE IF NOT EXISTS "matchup_buckets" (
+	"leader_id"	INTEGER NOT NULL,
+	"base_id"	INTEGER NOT NULL,
+	"opp_leader_id"	INTEGER NOT NULL,
+	"opp_base_id"	INTEGER NOT NULL,
+	"week"	TEXT NOT NULL,
+	"level"	TEXT NOT NULL,
+	"matches"	INTEGER NOT NULL DEFAULT 0,
+	"wins"	INTEGER NOT NULL DEFAULT 0,
+	"losses"	INTEGER NOT NULL DEFAULT 0,
+	"draws"	INTEGER NOT NULL DEFAULT 0,
+	"game_wins"	INTEGER NOT NULL DEFAULT 0,
+	"game_losses"	INTEGER NOT NULL DEFAULT 0,
+	"game_draws"	INTEGER NOT NULL DEFAULT 0,
+	PRIMARY KEY("leader_id","base_id","opp_leader_id","opp_base_id","week","level")
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS "idx_matchup_buckets_opponent" ON "matchup_buckets" (
+	"opp_leader_id",
+	"opp_base_id"
+);
+CREATE INDEX IF NOT EXISTS "idx_matchup_buckets_week_level" ON "matchup_buckets" (
+	"week",
+	"level"
+);
+-- Tournaments already folded into the matrix and how many matches they had then
+CREATE TABLE IF NOT EXISTS "matchup_tournaments" (
+	"tournament_id"	INTEGER,
+	"match_count"	INTEGER NOT NULL,
+	PRIMARY KEY("tournament_id"),
+	FOREIGN KEY("tournament_id") REFERENCES "tournaments"("tournament_id")
+);
@@ -0,0 +1,25 @@
+-- State of `comp_hub_scraper.py --incremental` runs.
+-- Every Competitive Hub tournament that was processed, with the columns of its
+-- listing row so events whose Melee standings were still incomplete can be
+-- queued again without re-reading the listing. `complete` is 1 once the final
+-- standings CSV exists (or the event has no Melee link).
+CREATE TABLE IF NOT EXISTS "hub_links" (
+	"link"	TEXT NOT NULL,
+	"date"	TEXT,
+	"name"	TEXT,
+	"location"	TEXT,
+	"level"	TEXT,
+	"melee_link"	TEXT,
+	"complete"	INTEGER NOT NULL DEFAULT 0,
+	"processed_at"	TEXT NOT NULL,
+	PRIMARY KEY("link")
+);
+CREATE INDEX IF NOT EXISTS "idx_hub_links_complete" ON "hub_links" (
+	"complete"
+);
+-- Key/value state, e.g. the `high_water_date` of the newest processed listing row
+CREATE TABLE IF NOT EXISTS "hub_state" (
+	"key"	TEXT NOT NULL,
+	"value"	TEXT,
+	PRIMARY KEY("key")
+);
@@ -0,0 +1,8 @@
+-- Country names of the Competitive Hub listing and their ISO2 codes, as returned
+-- by country_converter (see locations.py). Filled on first sight of a name, so
+-- later runs don't need to load country_converter at all.
+CREATE TABLE IF NOT EXISTS "country_codes" (
+	"name"	TEXT NOT NULL,
+	"iso2"	TEXT NOT NULL,
+	PRIMARY KEY("name")
+);
@@ -0,0 +1,29 @@
+-- Card lists of the decks, filled by `decklists.py fetch`.
+-- Every fetched decklist gets the hash of its card list in `decks.content_hash`.
+-- Identical lists share one set of `deck_cards` rows, stored under the deck that
+-- `decklists` names for the hash; `all_deck_cards` expands them to every deck.
+ALTER TABLE "decks" ADD COLUMN "content_hash" TEXT;
+CREATE INDEX IF NOT EXISTS "idx_decks_content_hash" ON "decks" (
+	"content_hash"
+);
+CREATE TABLE IF NOT EXISTS "decklists" (
+	"content_hash"	TEXT NOT NULL,
+	"deck_id"	INTEGER NOT NULL,
+	"cards"	INTEGER NOT NULL,
+	PRIMARY KEY("content_hash"),
+	FOREIGN KEY("deck_id") REFERENCES "decks"("deck_id")
+);
+CREATE UNIQUE INDEX IF NOT EXISTS "idx_deck_cards_deck_card" ON "deck_cards" (
+	"deck_id",
+	"card_id",
+	"sideboard"
+);
+CREATE INDEX IF NOT EXISTS "idx_deck_cards_card" ON "deck_cards" (
+	"card_id",
+	"deck_id"
+);
+CREATE VIEW IF NOT EXISTS "all_deck_cards" AS
+SELECT d.deck_id, dc.card_id, dc.count, dc.sideboard
+  FROM decks d
+  JOIN decklists l ON l.content_hash = d.content_hash
+  JOIN deck_cards dc ON dc.deck_id = l.deck_id;
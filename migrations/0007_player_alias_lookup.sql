@@ -0,0 +1,7 @@
+-- Alias lookup of `player_identity.lookup_player` (run for every name the loader
+-- hasn't seen yet). UNIQUE(player_id, alias) starts with player_id and can't
+-- serve `WHERE alias=? ORDER BY alias_id`.
+CREATE INDEX IF NOT EXISTS "idx_player_aliases_alias" ON "player_aliases" (
+	"alias",
+	"alias_id"
+);
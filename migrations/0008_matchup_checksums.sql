@@ -0,0 +1,5 @@
+-- Checksum of the matches of every tournament folded into the matrix (see
+-- matchup_matrix.py), so corrected results and reassigned decks are picked up
+-- even when the match count stays the same. Tournaments recorded before this
+-- migration have none and are rebuilt by the next refresh.
+ALTER TABLE "matchup_tournaments" ADD COLUMN "checksum" INTEGER;
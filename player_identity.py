@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""player_identity.py
+Resolve player names to players across spelling variants.
+The same player shows up as "José Pérez" on the Competitive Hub, "jose perez" in
+one Melee event and "JosePerez" in another. `PlayerIndex` keeps every player name
+and every alias from the `player_aliases` table in memory, keyed by their
+normalized form (casefolded, accents stripped, whitespace collapsed), so exact and
+normalized lookups are one dict access each however many players there are.
+
+For names that still don't resolve, `candidates` suggests the closest known names
+by trigram similarity (Dice coefficient). The trigram postings are built on the
+first fuzzy lookup, and a lookup only scans the postings of the rarest trigrams
+of the query (prefix filtering) instead of every known name, so it stays in the
+milliseconds with hundreds of thousands of players.
+
+Both loaders of melee_csv_to_sql.py only reuse a player through an exact name
+or a recorded alias (`lookup` and `lookup_player`): two entrants whose names only
+match after normalization may be different people, so the loaders create a new
+player and report the name as an alias candidate. `alias` records the aliases
+once they are confirmed. unify_placements.py matches placements through the
+normalization and, with `--db`, through the aliases.
+Usage
+-------
+    python player_identity.py [--db swu_meta.db] suggest NAME [NAME ...]
+    python player_identity.py [--db swu_meta.db] alias PLAYER_NAME ALIAS [ALIAS ...]
+"""
+import argparse
+import re
+import sqlite3
+import unicodedata
+from collections import defaultdict
+
+NGRAM = 3
+THRESHOLD = 0.5  # Minimum Dice similarity of a fuzzy candidate
+
+_whitespace = re.compile(r"\s+")
+
+def normalize_name(name):
+    """Casefold, strip accents and collapse whitespace: "  José  PÉREZ " -> "jose perez"."""
+    decomposed = unicodedata.normalize("NFKD", str(name).casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _whitespace.sub(" ", stripped).strip()
+
+def ngrams(key, n=NGRAM):
+    """Return the set of n-grams of a normalized name, padded so short names still have some."""
+    padded = f"{' ' * (n - 1)}{key} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class PlayerIndex:
+    """In-memory index of player names and aliases by normalized name.
+
+    Ids are player ids when loaded from the database, but any hashable value works
+    (unify_placements.py indexes the names of one standings file).
+    """
+    def __init__(self, n=NGRAM):
+        self.n = n
+        self.exact = {}        # Name as stored -> id
+        self.normalized = {}   # Normalized name -> id; the first id added wins
+        self.keys_of = defaultdict(set)  # Id -> its normalized names
+        self.postings = None   # Trigram -> normalized names, built on the first fuzzy lookup
+        self.grams = {}        # Normalized name -> its trigrams
+
+    def __len__(self):
+        return len(self.normalized)
+
+    @classmethod
+    def load(cls, conn, n=NGRAM):
+        """Index the players (lowest id first) and the aliases of a database."""
+        index = cls(n)
+        for player_id, name in conn.execute("SELECT player_id, name FROM players ORDER BY player_id"):
+            index.add(player_id, name)
+        for player_id, alias in conn.execute("SELECT player_id, alias FROM player_aliases ORDER BY alias_id"):
+            index.add(player_id, alias)
+        return index
+
+    def add(self, player_id, name):
+        name = str(name)
+        self.exact.setdefault(name, player_id)
+        key = normalize_name(name)
+        if not key:
+            return
+        if key not in self.normalized:
+            self.normalized[key] = player_id
+            if self.postings is not None:
+                self._post(key)
+        self.keys_of[player_id].add(key)
+
+    def lookup(self, name):
+        """Return the id of the player of exactly this name or recorded alias, or None."""
+        return self.exact.get(str(name))
+
+    def resolve(self, name):
+        """Return the id of an exactly or normalized matching name, or None."""
+        name = str(name)
+        player_id = self.exact.get(name)
+        if player_id is None:
+            player_id = self.normalized.get(normalize_name(name))
+        return player_id
+
+    def _post(self, key):
+        grams = ngrams(key, self.n)
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings[gram].append(key)
+
+    def _build_postings(self):
+        self.postings = defaultdict(list)
+        for key in self.normalized:
+            self._post(key)
+
+    def candidates(self, name, limit=5, threshold=THRESHOLD):
+        """Return up to `limit` (similarity, id, normalized name) of the closest names, best first."""
+        if self.postings is None:
+            self._build_postings()
+        query = ngrams(normalize_name(name), self.n)
+        if not query:
+            return []
+        # A name with Dice similarity >= threshold shares at least `needed` trigrams with
+        # the query, so it must appear in one of the len(query) - needed + 1 rarest ones
+        needed = max(1, int(threshold * len(query) / (2 - threshold)))
+        rarest = sorted(query, key=lambda gram: len(self.postings.get(gram, ())))[:len(query) - needed + 1]
+        scored = []
+        seen = set()
+        for gram in rarest:
+            for key in self.postings.get(gram, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                grams = self.grams[key]
+                score = 2 * len(query & grams) / (len(query) + len(grams))
+                if score >= threshold:
+                    scored.append((score, self.normalized[key], key))
+        scored.sort(key=lambda candidate: (-candidate[0], candidate[2]))
+        return scored[:limit]
+
+def lookup_player(conn, name):
+    """`PlayerIndex.lookup` in SQL: the player of exactly this name, else of this recorded alias."""
+    row = conn.execute("SELECT player_id FROM players WHERE name=? ORDER BY player_id LIMIT 1", (name,)).fetchone()
+    if row is None:
+        row = conn.execute("SELECT player_id FROM player_aliases WHERE alias=? ORDER BY alias_id LIMIT 1",
+                           (name,)).fetchone()
+    return row[0] if row else None
+
+def add_aliases(conn, player_name, aliases):
+    """Record aliases of the player called `player_name`; return how many were new."""
+    row = conn.execute("SELECT player_id FROM players WHERE name=? ORDER BY player_id LIMIT 1", (player_name,)).fetchone()
+    if row is None:
+        raise ValueError(f"No player named {player_name!r}.")
+    with conn:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO player_aliases (player_id, alias) VALUES (?, ?)",
+                         [(row[0], alias) for alias in aliases])
+        return conn.total_changes - before
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up players by fuzzy name or record aliases.")
+    parser.add_argument("--db", default="swu_meta.db", help="SQLite database (default: swu_meta.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    suggest = commands.add_parser("suggest", help="Show the closest known players of each name")
+    suggest.add_argument("names", nargs="+")
+    suggest.add_argument("--limit", type=int, default=5)
+    alias = commands.add_parser("alias", help="Record other spellings of a player's name")
+    alias.add_argument("player_name")
+    alias.add_argument("aliases", nargs="+")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    if args.command == "alias":
+        added = add_aliases(conn, args.player_name, args.aliases)
+        print(f"Added {added} alias(es) to {args.player_name}.")
+    else:
+        index = PlayerIndex.load(conn)
+        names = dict(conn.execute("SELECT player_id, name FROM players"))
+        for name in args.names:
+            player_id = index.resolve(name)
+            if player_id is not None:
+                print(f"{name}: {names.get(player_id, player_id)} (id {player_id})")
+                continue
+            found = index.candidates(name, args.limit)
+            print(f"{name}: " + (", ".join(f"{names.get(player_id, key)} ({score:.2f})" for score, player_id, key in found)
+                                 or "no close match"))
+    conn.close()
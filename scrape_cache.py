@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""scrape_cache.py
+Checkpoint cache for Melee.gg table scrapes.
+Every table page the Selenium scraper reads is stored in a local SQLite file,
+keyed by (tournament, table, round, page), as soon as all of its rows are loaded. A rerun
+after a crash skips the pages (and whole rounds) that are already stored and
+resumes where the previous run stopped.
+
+Once a table has been read to the end it is marked as finished. Tables of a
+finished event (all standings rounds played, every pairings round read) are
+served straight from the cache: `MeleeSession` hands the stored pages to its
+sink (see melee_sinks.py) without starting a browser. Tables of events that were still running when they were
+scraped are dropped from the cache instead, so the next run reads them again.
+
+The cache stores the raw page snapshots (header texts, and the text, link and
+nested lookups of every cell, as returned by `SNAPSHOT_TABLE_SCRIPT` in
+melee_scraper.py), not the CSV rows. The column parsers run when pages are read
+back, so re-exports after a parser change don't touch the network either. Cache
+files of the older format, which held parsed rows, are emptied when opened.
+Usage
+-------
+    python melee_scraper.py <tournament_url> --cache [melee_cache.db]
+    python scrape_cache.py [melee_cache.db] [--clear TOURNAMENT_ID ...]
+"""
+import argparse
+import json
+import sqlite3
+
+DEFAULT_CACHE = "melee_cache.db"
+CACHE_VERSION = 1  # user_version of cache files holding page snapshots
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS "pages" (
+    "tournament" TEXT NOT NULL,
+    "table_name" TEXT NOT NULL,
+    "round"      INTEGER NOT NULL,
+    "page"       INTEGER NOT NULL,
+    "headers"    TEXT NOT NULL,
+    "rows"       TEXT NOT NULL,  -- Row snapshots, parsed by melee_scraper.parse_page
+    PRIMARY KEY("tournament", "table_name", "round", "page")
+);
+CREATE TABLE IF NOT EXISTS "rounds" (
+    "tournament" TEXT NOT NULL,
+    "table_name" TEXT NOT NULL,
+    "round"      INTEGER NOT NULL,
+    "pages"      INTEGER NOT NULL,
+    PRIMARY KEY("tournament", "table_name", "round")
+);
+CREATE TABLE IF NOT EXISTS "tables" (
+    "tournament" TEXT NOT NULL,
+    "table_name" TEXT NOT NULL,
+    "final"      INTEGER NOT NULL,
+    PRIMARY KEY("tournament", "table_name")
+);
+"""
+
+class PageCache:
+    """SQLite journal of scraped table pages.
+
+    Every write is committed right away, so a page survives a browser or
+    process crash as soon as `save_page` returns. `table_name` is "standings"
+    or "pairings"; standings use the index of the shown round as `round`.
+    """
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        # Worker processes may share one cache file; wait for each other's writes
+        self.conn = sqlite3.connect(path, timeout=30)
+        self._upgrade()
+        self.conn.executescript(SCHEMA)
+        self.hits = 0    # Pages served from the cache
+        self.writes = 0  # Pages stored
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _upgrade(self):
+        # Rows parsed by an older scraper can't be parsed again; forget them
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < CACHE_VERSION:
+                for name in ("pages", "rounds", "tables"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {name}")
+                self.conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+
+    def page(self, tournament, table, round, page):
+        """Return (headers, row snapshots) of a stored page, or None."""
+        row = self.conn.execute(
+            "SELECT headers, rows FROM pages WHERE tournament=? AND table_name=? AND round=? AND page=?",
+            (tournament, table, round, page)
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return json.loads(row[0]), json.loads(row[1])
+
+    def save_page(self, tournament, table, round, page, headers, rows):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (tournament, table_name, round, page, headers, rows) VALUES (?, ?, ?, ?, ?, ?)",
+                (tournament, table, round, page, json.dumps(headers), json.dumps(rows))
+            )
+        self.writes += 1
+
+    def round_complete(self, tournament, table, round):
+        """Return True if every page of the round is stored."""
+        row = self.conn.execute(
+            """
+            SELECT r.pages, COUNT(p.page)
+              FROM rounds r
+              LEFT JOIN pages p ON p.tournament = r.tournament AND p.table_name = r.table_name AND p.round = r.round
+             WHERE r.tournament=? AND r.table_name=? AND r.round=?
+             GROUP BY r.pages
+            """,
+            (tournament, table, round)
+        ).fetchone()
+        return row is not None and row[0] == row[1]
+
+    def iter_pages(self, tournament, table, round=None):
+        """Yield (round, headers, row snapshots) of the stored pages of a table (or one round), in order."""
+        query = "SELECT round, headers, rows FROM pages WHERE tournament=? AND table_name=?"
+        params = [tournament, table]
+        if round is not None:
+            query += " AND round=?"
+            params.append(round)
+        for round, headers, rows in self.conn.execute(query + " ORDER BY round, page", params):
+            self.hits += 1
+            yield round, json.loads(headers), json.loads(rows)
+
+    def finish_round(self, tournament, table, round, pages):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rounds (tournament, table_name, round, pages) VALUES (?, ?, ?, ?)",
+                (tournament, table, round, pages)
+            )
+
+    def finish_table(self, tournament, table, final):
+        """Mark a table as read to the end; tables of running events are dropped."""
+        if not final:
+            self.clear(tournament, table)
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tables (tournament, table_name, final) VALUES (?, ?, 1)",
+                (tournament, table)
+            )
+
+    def finished(self, tournament, table):
+        """Return True if the table of a finished event is stored in full."""
+        return self.conn.execute(
+            """
+            SELECT 1 FROM tables t
+             WHERE t.tournament=? AND t.table_name=? AND t.final=1
+               AND EXISTS (SELECT 1 FROM pages p WHERE p.tournament = t.tournament AND p.table_name = t.table_name)
+            """,
+            (tournament, table)
+        ).fetchone() is not None
+
+    def clear(self, tournament, table=None):
+        with self.conn:
+            for name in ("pages", "rounds", "tables"):
+                if table is None:
+                    self.conn.execute(f"DELETE FROM {name} WHERE tournament=?", (tournament,))
+                else:
+                    self.conn.execute(f"DELETE FROM {name} WHERE tournament=? AND table_name=?", (tournament, table))
+
+    def stats(self):
+        return f"{self.hits} cached pages used, {self.writes} pages stored"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the Melee.gg page cache.")
+    parser.add_argument("cache", nargs="?", default=DEFAULT_CACHE, help=f"Cache file (default: {DEFAULT_CACHE})")
+    parser.add_argument("--clear", nargs="+", metavar="TOURNAMENT_ID", help="Forget these tournaments")
+    args = parser.parse_args()
+
+    with PageCache(args.cache) as cache:
+        if args.clear:
+            for tournament in args.clear:
+                cache.clear(tournament)
+            print(f"Cleared {len(args.clear)} tournament(s).")
+        for tournament, table, pages, final in cache.conn.execute(
+            """
+            SELECT p.tournament, p.table_name, COUNT(*), COALESCE(t.final, 0)
+              FROM pages p
+              LEFT JOIN tables t ON t.tournament = p.tournament AND t.table_name = p.table_name
+             GROUP BY p.tournament, p.table_name
+             ORDER BY p.tournament, p.table_name
+            """
+        ):
+            print(f"{tournament:<12} {table:<10} {pages:5} pages  {'finished' if final else 'partial'}")
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""swiss_standings.py
+Standings derived from pairings: match and game records, points and the three
+Swiss tiebreakers (OMW%, TGW%, OGW%) of every player, computed with NumPy.
+
+`Pairings` keeps a pairings table (a `*_pairings.csv` file or the `matches` rows
+of a tournament) as one array entry per pairing: round, both players as dense
+integer codes, and the games each won. Every pairing is then counted from both
+players' sides and all records and tiebreakers are a handful of `np.bincount`
+sums over those arrays, so a 5,000-player, 15-round event takes milliseconds.
+
+The tiebreakers follow the usual Swiss rules:
+- A match win is worth 3 points, a draw 1. A bye is a match win (and the 2-0 in
+  games Melee records for it) but not an opponent.
+- MW% is points / (3 * matches) and GW% is game points / (3 * games), each
+  floored at 33%.
+- OMW% and OGW% average the MW% and GW% of a player's opponents. TGW% is the
+  player's own GW%.
+- Pairings without any games reported (the round in progress) are left out.
+- Ties are broken by points, OMW%, TGW% and OGW%, and then by username.
+
+The standings are written in the `split_standings_headers` layout of the
+scrapers, so with `melee_scraper.py --mode pairings --derive-standings` an event
+is only paged through once. `compare` checks derived standings against scraped
+ones, tiebreakers to within the 0.01% Melee shows.
+Usage
+-------
+    python swiss_standings.py derive <id>_pairings.csv [--output <id>_standings.csv] [--rounds N]
+    python swiss_standings.py derive --db swu_meta.db --tournament MELEE_ID [--output FILE] [--rounds N]
+    python swiss_standings.py compare <id>_pairings.csv <id>_standings.csv [--rounds N] [--show N]
+
+`compare` exits with status 1 if any player's values differ.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import numpy as np
+
+from melee_csv_to_sql import get_tournament_by_melee_id
+from melee_tables import (
+    MATCHES_HEADERS,
+    STANDINGS_HEADERS,
+    format_percentage,
+    split_matches_headers,
+    split_standings_headers,
+)
+
+DEFAULT_DB = "swu_meta.db"
+FLOOR = 0.33
+PERCENTAGE_TOLERANCE = 0.01 + 1e-9  # One unit of the last shown decimal
+PAIRINGS_COLUMNS = split_matches_headers(MATCHES_HEADERS)
+STANDINGS_COLUMNS = split_standings_headers(STANDINGS_HEADERS)
+NO_PLAYER = ("", "-")
+
+# The matches of a tournament as pairings rows; decks as "Leader, Subtitle" and base names
+MATCHES_QUERY = """
+    SELECT m.round, m.table_number, p1.name, p2.name,
+           l1.name || ', ' || l1.subtitle, b1.name, d1.decklink,
+           l2.name || ', ' || l2.subtitle, b2.name, d2.decklink,
+           m.player1_wins, m.player2_wins, m.draws
+      FROM matches m
+      JOIN players p1 ON p1.player_id = m.player1_id
+      LEFT JOIN players p2 ON p2.player_id = m.player2_id
+      LEFT JOIN decks d1 ON d1.deck_id = m.deck1_id
+      LEFT JOIN leaders l1 ON l1.leader_id = d1.leader_id
+      LEFT JOIN bases b1 ON b1.base_id = d1.base_id
+      LEFT JOIN decks d2 ON d2.deck_id = m.deck2_id
+      LEFT JOIN leaders l2 ON l2.leader_id = d2.leader_id
+      LEFT JOIN bases b2 ON b2.base_id = d2.base_id
+     WHERE m.tournament_id = ?
+     ORDER BY m.round, m.table_number, m.match_id
+"""
+
+def _player_key(username, displayname):
+    # Same fallback as the loader: the username, else the display name
+    name = username if username not in NO_PLAYER else displayname
+    return None if name in NO_PLAYER else name
+
+def percentage(value):
+    """Format a tiebreaker like Melee, e.g. 0.51875 -> "51.88%"."""
+    # Sums over the opponents in another order differ in the last bits; rounding those
+    # off first makes a value on a .xx5 boundary round the same way on every path
+    return format_percentage(round(100 * float(value), 6))
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+class Pairings:
+    """Columnar copy of a pairings table.
+
+    `player1`/`player2` are codes into `usernames`; `player2` is -1 for a bye.
+    `display_names` and `decks` hold the last value seen for every player.
+    """
+    def __init__(self, rows):
+        codes = {}
+        self.usernames = []
+        self.display_names = []
+        self.decks = []
+
+        def code(username, displayname, deck):
+            key = _player_key(username, displayname)
+            if key is None:
+                return -1
+            if key not in codes:
+                codes[key] = len(self.usernames)
+                self.usernames.append(key)
+                self.display_names.append(displayname)
+                self.decks.append(["-", "-", "-"])
+            player = codes[key]
+            if displayname not in NO_PLAYER:
+                self.display_names[player] = displayname
+            if deck[0] not in NO_PLAYER:
+                self.decks[player] = deck
+            return player
+
+        rounds, player1, player2, wins1, wins2, draws = [], [], [], [], [], []
+        for row in rows:
+            first = code(row.get("Player1_username") or "", row.get("Player1_displayname") or "",
+                         [row.get("Player1_leader") or "-", row.get("Player1_base") or "-",
+                          row.get("Player1_decklink") or "-"])
+            second = code(row.get("Player2_username") or "", row.get("Player2_displayname") or "",
+                          [row.get("Player2_leader") or "-", row.get("Player2_base") or "-",
+                           row.get("Player2_decklink") or "-"])
+            if first < 0:
+                first, second = second, -1
+            if first < 0:
+                continue
+            rounds.append(_int(row.get("Round")))
+            player1.append(first)
+            player2.append(second)
+            wins1.append(_int(row.get("Player1_wins")))
+            wins2.append(_int(row.get("Player2_wins")))
+            draws.append(_int(row.get("Draws")))
+
+        self.round = np.array(rounds, dtype=np.int64)
+        self.player1 = np.array(player1, dtype=np.int64)
+        self.player2 = np.array(player2, dtype=np.int64)
+        self.wins1 = np.array(wins1, dtype=np.int64)
+        self.wins2 = np.array(wins2, dtype=np.int64)
+        self.draws = np.array(draws, dtype=np.int64)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(csv.DictReader(f))
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Pairings from rows in the `split_matches_headers` layout, as the scrapers produce them."""
+        return cls({column: str(value) for column, value in zip(columns, row)} for row in rows)
+
+    @classmethod
+    def from_db(cls, conn, tournament_id):
+        rows = []
+        for row in conn.execute(MATCHES_QUERY, (tournament_id,)):
+            values = ["-" if value is None else str(value) for value in row]
+            round_number, table, player1, player2 = values[:4]
+            rows.append(dict(zip(PAIRINGS_COLUMNS, [round_number, table, player1, player1, player2, player2]
+                                 + values[4:])))
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def standings(self, rounds=None):
+        """Records and tiebreakers after the first `rounds` rounds (all by default)."""
+        count = len(self)
+        # Pairings without any games reported haven't been played yet
+        keep = (self.wins1 + self.wins2 + self.draws > 0) | (self.player2 < 0)
+        if rounds is not None:
+            keep &= self.round <= rounds
+        player1, player2 = self.player1[keep], self.player2[keep]
+        wins1, wins2, draws = self.wins1[keep], self.wins2[keep], self.draws[keep]
+        paired = player2 >= 0
+
+        # Every pairing from player 1's side, the real ones also from player 2's side
+        player = np.concatenate([player1, player2[paired]])
+        opponent = np.concatenate([player2, player1[paired]])
+        game_wins = np.concatenate([wins1, wins2[paired]])
+        game_losses = np.concatenate([wins2, wins1[paired]])
+        game_draws = np.concatenate([draws, draws[paired]])
+        bye = opponent < 0
+
+        won = bye | (game_wins > game_losses)
+        lost = ~bye & (game_wins < game_losses)
+        drew = ~won & ~lost
+
+        def total(values, mask=None):
+            if mask is None:
+                return np.bincount(player, weights=values, minlength=count)
+            return np.bincount(player[mask], weights=values[mask], minlength=count)
+
+        standings = Standings(self)
+        standings.match_wins = total(won).astype(np.int64)
+        standings.match_losses = total(lost).astype(np.int64)
+        standings.match_draws = total(drew).astype(np.int64)
+        standings.game_wins = total(game_wins).astype(np.int64)
+        standings.game_losses = total(game_losses).astype(np.int64)
+        standings.game_draws = total(game_draws).astype(np.int64)
+        standings.points = 3 * standings.match_wins + standings.match_draws
+
+        matches = standings.match_wins + standings.match_losses + standings.match_draws
+        games = standings.game_wins + standings.game_losses + standings.game_draws
+        with np.errstate(divide="ignore", invalid="ignore"):
+            match_win = np.where(matches > 0, standings.points / (3 * matches), FLOOR)
+            game_win = np.where(games > 0, (3 * standings.game_wins + standings.game_draws) / (3 * games), FLOOR)
+        match_win = np.maximum(match_win, FLOOR)
+        game_win = np.maximum(game_win, FLOOR)
+
+        opponents = np.bincount(player[~bye], minlength=count)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            standings.omw = np.where(opponents > 0, total(match_win[opponent.clip(0)], ~bye) / opponents, 0.0)
+            standings.ogw = np.where(opponents > 0, total(game_win[opponent.clip(0)], ~bye) / opponents, 0.0)
+        standings.tgw = game_win
+        return standings
+
+class Standings:
+    """Per-player records and tiebreakers of a `Pairings`, indexed by player code."""
+    def __init__(self, pairings):
+        self.pairings = pairings
+        # Arrays filled by `Pairings.standings`; the tiebreakers are fractions
+        self.match_wins = self.match_losses = self.match_draws = None
+        self.game_wins = self.game_losses = self.game_draws = None
+        self.points = None
+        self.omw = self.tgw = self.ogw = None
+
+    def order(self):
+        """Player codes from first to last place."""
+        # Rounded so values computed along different paths still tie
+        name_rank = np.argsort(np.argsort(np.array(self.pairings.usernames, dtype=object)))
+        return np.lexsort((name_rank, -self.ogw.round(9), -self.tgw.round(9), -self.omw.round(9), -self.points))
+
+    def rows(self):
+        """Standings rows in the `split_standings_headers` layout, first place first."""
+        pairings = self.pairings
+        rows = []
+        for rank, player in enumerate(self.order().tolist(), 1):
+            rows.append([str(rank), pairings.usernames[player], pairings.display_names[player]]
+                        + pairings.decks[player]
+                        + [int(self.match_wins[player]), int(self.match_losses[player]), int(self.match_draws[player]),
+                           int(self.game_wins[player]), int(self.game_losses[player]), int(self.game_draws[player]),
+                           str(int(self.points[player])), percentage(self.omw[player]),
+                           percentage(self.tgw[player]), percentage(self.ogw[player])])
+        return rows
+
+def standings_rows(columns, rows, rounds=None):
+    """Standings rows derived from pairings rows in the `split_matches_headers` layout."""
+    return Pairings.from_rows(columns, rows).standings(rounds).rows()
+
+def write_standings(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(STANDINGS_COLUMNS)
+        writer.writerows(rows)
+
+def _comparable(column, value):
+    value = (value or "").strip()
+    if column.endswith("%"):
+        try:
+            return float(value.rstrip("%"))
+        except ValueError:
+            return value
+    try:
+        return int(float(value))
+    except ValueError:
+        return value
+
+def _same(column, derived, scraped):
+    derived_value, scraped_value = _comparable(column, derived), _comparable(column, scraped)
+    if column.endswith("%") and isinstance(derived_value, float) and isinstance(scraped_value, float):
+        # Percentages are shown with two decimals, and a value on a .xx5 boundary may round either way
+        return abs(derived_value - scraped_value) <= PERCENTAGE_TOLERANCE
+    return derived_value == scraped_value
+
+def compare(derived, standings_file, show=10):
+    """Print how derived standings differ from a scraped standings file; return the number of differences."""
+    with open(standings_file, newline="", encoding="utf-8") as f:
+        scraped = {}
+        for row in csv.DictReader(f):
+            key = _player_key(row.get("Username") or "", row.get("Players/Teams") or "")
+            if key is not None:
+                scraped[key] = row
+    derived_rows = {row[1]: dict(zip(STANDINGS_COLUMNS, row)) for row in derived}
+
+    columns = ["Rank", "Match Wins", "Match Losses", "Match Draws", "Game Wins", "Game Losses", "Game Draws",
+               "Points", "OMW%", "TGW%", "OGW%"]
+    mismatches = {column: 0 for column in columns}
+    shown = 0
+    for key, expected in scraped.items():
+        row = derived_rows.get(key)
+        if row is None:
+            continue
+        for column in columns:
+            if column not in expected:
+                continue
+            if not _same(column, str(row[column]), expected[column]):
+                mismatches[column] += 1
+                if shown < show:
+                    shown += 1
+                    print(f"  {key}: {column} derived {row[column]}, scraped {expected[column]}")
+
+    missing = sorted(set(scraped) - set(derived_rows))
+    extra = sorted(set(derived_rows) - set(scraped))
+    print(f"{len(scraped)} scraped players, {len(derived_rows)} derived, "
+          f"{len(missing)} missing from the pairings, {len(extra)} not in the standings")
+    for column in columns:
+        print(f"  {column:<14} {mismatches[column]} different")
+    # Rank differences follow from the others, so they aren't counted twice
+    return len(missing) + sum(count for column, count in mismatches.items() if column != "Rank")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive standings and tiebreakers from pairings.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    derive = commands.add_parser("derive", help="Write the standings of a pairings CSV or of a tournament's matches")
+    derive.add_argument("pairings_file", nargs="?", help="<id>_pairings.csv file")
+    derive.add_argument("--db", help="Read the matches of --tournament from this database instead")
+    derive.add_argument("--tournament", help="Melee id of the tournament with --db")
+    derive.add_argument("--output", help="Standings CSV to write (default: <id>_standings.csv)")
+    derive.add_argument("--rounds", type=int, help="Only count the first N rounds, e.g. the Swiss rounds")
+    check = commands.add_parser("compare", help="Compare derived standings with a scraped standings CSV")
+    check.add_argument("pairings_file")
+    check.add_argument("standings_file")
+    check.add_argument("--rounds", type=int, help="Only count the first N rounds, e.g. the Swiss rounds")
+    check.add_argument("--show", type=int, default=10, help="Differences to print (default: 10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        derived = Pairings.from_csv(args.pairings_file).standings(args.rounds).rows()
+        return 1 if compare(derived, args.standings_file, args.show) else 0
+
+    if args.db:
+        if not args.tournament:
+            parser.error("--db needs --tournament")
+        with closing(sqlite3.connect(args.db)) as conn:
+            tournament_id = get_tournament_by_melee_id(conn, args.tournament)
+            if tournament_id is None:
+                print(f"Tournament {args.tournament} not found.")
+                return 1
+            pairings = Pairings.from_db(conn, tournament_id)
+        output = args.output or f"{args.tournament}_standings.csv"
+    elif args.pairings_file:
+        pairings = Pairings.from_csv(args.pairings_file)
+        output = args.output or os.path.basename(args.pairings_file).replace("_pairings", "_standings")
+        if output == os.path.basename(args.pairings_file):
+            output = f"{os.path.splitext(output)[0]}_standings.csv"
+    else:
+        parser.error("give a pairings file or --db and --tournament")
+
+    rows = pairings.standings(args.rounds).rows()
+    write_standings(output, rows)
+    print(f"Saved standings of {len(rows)} players as \"{output}\"")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
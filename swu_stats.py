@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""swu_stats.py
+One entry point for all the SWU stats scripts.
+Every script stays runnable on its own; `swu_stats.py <command> [args]` runs the
+script of the command exactly as `python <script>.py [args]` would. Only the
+module of the chosen command is imported, and the scripts import their heavy
+dependencies (pandas, Selenium, country_converter, lxml) only where they are
+used, so e.g. `swu_stats.py cache` or any `--help` starts without loading them.
+Usage
+-------
+    python swu_stats.py <command> [args ...]
+    python swu_stats.py --help
+    python swu_stats.py <command> --help
+
+Commands:
+    hub                   Scrape the Competitive Hub listing and tournaments (comp_hub_scraper.py)
+    crawl                 Fetch hub tournament pages concurrently (hub_crawler.py)
+    scrape                Scrape one Melee.gg tournament (melee_scraper.py)
+    load                  Load standings/pairings CSV files into the database (melee_csv_to_sql.py)
+    unify                 Apply hub placements to Melee standings (unify_placements.py)
+    remove-gaps           Renumber standings after the top cut (remove_standing_gaps.py)
+    remove-unknown-decks  Drop results without a known deck (remove_unknown_decks.py)
+    migrate               Bring the database schema up to date (migrate.py)
+    matchups              Refresh or query the matchup matrix (matchup_matrix.py)
+    report                Meta share and conversion report (analytics.py)
+    standings             Derive standings and tiebreakers from pairings (swiss_standings.py)
+    locations             Look up stored country codes (locations.py)
+    players               Suggest players by fuzzy name or record aliases (player_identity.py)
+    decklists             Expand decklists into cards and query card inclusion (decklists.py)
+    cache                 Inspect or clear the Melee page cache (scrape_cache.py)
+    http-cache            Inspect or clear the HTTP response cache (http_cache.py)
+"""
+import argparse
+import runpy
+import sys
+
+# (command, module, summary); the summaries are shown by --help
+COMMANDS = [
+    ("hub", "comp_hub_scraper", "Scrape the Competitive Hub listing and tournaments"),
+    ("crawl", "hub_crawler", "Fetch hub tournament pages concurrently"),
+    ("scrape", "melee_scraper", "Scrape one Melee.gg tournament"),
+    ("load", "melee_csv_to_sql", "Load standings/pairings CSV files into the database"),
+    ("unify", "unify_placements", "Apply hub placements to Melee standings"),
+    ("remove-gaps", "remove_standing_gaps", "Renumber standings after the top cut"),
+    ("remove-unknown-decks", "remove_unknown_decks", "Drop results without a known deck"),
+    ("migrate", "migrate", "Bring the database schema up to date"),
+    ("matchups", "matchup_matrix", "Refresh or query the matchup matrix"),
+    ("report", "analytics", "Meta share and conversion report"),
+    ("standings", "swiss_standings", "Derive standings and tiebreakers from pairings"),
+    ("locations", "locations", "Look up stored country codes"),
+    ("players", "player_identity", "Suggest players by fuzzy name or record aliases"),
+    ("decklists", "decklists", "Expand decklists into cards and query card inclusion"),
+    ("cache", "scrape_cache", "Inspect or clear the Melee page cache"),
+    ("http-cache", "http_cache", "Inspect or clear the HTTP response cache"),
+]
+
+MODULES = {command: module for command, module, _ in COMMANDS}
+
+def run(command, args):
+    """Run the script of `command` as __main__ with `args` as its command line."""
+    # alter_sys makes the script the real __main__ (sys.argv[0] becomes its path), so
+    # e.g. the worker functions of comp_hub_scraper.py can be pickled as usual
+    sys.argv = [MODULES[command]] + list(args)
+    runpy.run_module(MODULES[command], run_name="__main__", alter_sys=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="swu_stats.py",
+        description="SWU stats tools. Run `swu_stats.py <command> --help` for the options of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {command:<22}{summary}" for command, _, summary in COMMANDS),
+    )
+    parser.add_argument("command", choices=list(MODULES), metavar="command", help="Tool to run (see below)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed on to the command")
+    args = parser.parse_args(argv)
+    run(args.command, args.args)
+
+if __name__ == "__main__":
+    main()
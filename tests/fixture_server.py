@@ -0,0 +1,89 @@
+"""Local HTTP server of synthetic hub tournament pages, for the crawler tests and benchmarks/bench_hub_crawler.py."""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def tournament_page(number, players):
+    rows = "".join(
+        f"<tr><td>{rank}</td><td>Deck</td><td>Leader</td><td>Player {number}-{rank}</td></tr>"
+        for rank in range(1, players + 1)
+    )
+    return (f'<html><body><a id="link_text-238-135" href="https://melee.gg/Tournament/View/{100000 + number}">Melee</a>'
+            f'<table id="tableResults"><thead><tr><th>#</th></tr></thead><tbody>{rows}</tbody></table></body></html>')
+
+class FixtureServer:
+    """Serves /tournament/<n> pages with a fixed latency and injected error answers.
+
+    `failing` maps a page number to the statuses its first requests are answered
+    with, in order; by default a `failure_rate` share of the pages fails once
+    with 429 or 503. Error answers carry `Retry-After: <retry_after>` unless it is
+    None. Pages have an ETag and are answered `304 Not Modified` when it is sent
+    back in `If-None-Match`. Every request is logged in `requests` as
+    (page number, time.monotonic(), request headers, status).
+    """
+    def __init__(self, pages, latency=0, failure_rate=0, seed=1, players=32, failing=None, retry_after="0"):
+        if failing is None:
+            rng = random.Random(seed)
+            failing = {number: [rng.choice([429, 503])] for number in range(pages) if rng.random() < failure_rate}
+        self.failing = failing
+        self.bodies = {number: tournament_page(number, players).encode("utf-8") for number in range(pages)}
+        self.lock = threading.Lock()
+        self.answered = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(latency)
+                number = int(self.path.rsplit("/", 1)[-1])
+                etag = f'"page-{number}"'
+                with server.lock:
+                    statuses = server.failing.get(number, [])
+                    answered = server.answered.get(number, 0)
+                    server.answered[number] = answered + 1
+                    if answered < len(statuses):
+                        status = statuses[answered]
+                    elif self.headers.get("If-None-Match") == etag:
+                        status = 304
+                    else:
+                        status = 200
+                    server.requests.append((number, time.monotonic(), dict(self.headers), status))
+                if status != 200:
+                    self.send_response(status)
+                    if status != 304 and retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.bodies[number]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        with self.lock:
+            self.answered = {}
+            self.requests = []
+
+    def url(self, number):
+        return f"http://127.0.0.1:{self.httpd.server_port}/tournament/{number}"
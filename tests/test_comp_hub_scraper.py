@@ -0,0 +1,37 @@
+"""comp_hub_scraper.py's serial loop must record failed tournaments like the worker pool does."""
+from contextlib import closing, redirect_stdout
+from io import StringIO
+
+import comp_hub_scraper
+from benchmarks.synthetic import create_database
+
+def link(number, date):
+    return {"link": f"https://www.swu-competitivehub.com/tournament/{number}", "date": date,
+            "name": f"Event {number}", "location": "FR", "level": "PQ"}
+
+def test_failed_tournaments_are_recorded_and_hold_back_the_high_water_mark(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    links = [link(1, "2025-03-01"), link(2, "2025-03-08"), link(3, "2025-03-15")]
+
+    def scrape_tournament_page(url, session=None, parser=None):
+        number = int(url.rsplit("/", 1)[-1])
+        return {"melee_link": f"https://melee.gg/Tournament/View/{number}",
+                "results": [{"placement": "1", "player": f"Winner {number}"}]}
+
+    def scrape_melee_results(data, melee, retry_incomplete=False):
+        if data["melee_link"].endswith("/2"):
+            raise TimeoutError("standings table never loaded")
+
+    monkeypatch.setattr(comp_hub_scraper, "scrape_tournament_page", scrape_tournament_page)
+    monkeypatch.setattr(comp_hub_scraper, "scrape_melee_results", scrape_melee_results)
+    with closing(create_database(str(tmp_path / "hub.db"))) as conn, redirect_stdout(StringIO()):
+        processed, failed = comp_hub_scraper.run_serial(conn, links, "http", None, incremental=True)
+        tournaments = [name for (name,) in conn.execute("SELECT name FROM tournaments ORDER BY name")]
+        hub_links = [url for (url,) in conn.execute("SELECT link FROM hub_links ORDER BY link")]
+
+    assert processed == [links[0], links[2]]
+    assert failed == [links[1]]
+    assert tournaments == ["Event 1", "Event 3"]
+    assert hub_links == [links[0]["link"], links[2]["link"]]
+    assert not (tmp_path / "2_placements.txt").exists()
+    assert comp_hub_scraper.next_high_water_mark(None, processed, failed) == "2025-03-08"
@@ -0,0 +1,52 @@
+"""decklists.py against decklist pages in Melee's markup and as a text export."""
+from contextlib import closing
+from pathlib import Path
+
+import decklists
+from benchmarks.synthetic import create_database
+
+FIXTURES = Path(__file__).parent / "fixtures" / "decklists"
+CARDS = [
+    ("Battlefield Marine", None, "Ground Units", 3, 0),
+    ("Bounty Hunter's Quarry", None, "Card", 2, 1),
+    ("Don't Get Cocky", None, "Events", 3, 0),
+    ("Wampa", "Feasting On Flesh", "Ground Units", 2, 0),
+]
+
+def page(decklist_id):
+    return (FIXTURES / f"{decklist_id}.html").read_bytes()
+
+def test_markup_and_text_export_give_the_same_cards():
+    assert decklists.parse_decklist(page(1001)) == CARDS
+    assert decklists.parse_decklist(page(1002)) == CARDS
+    assert decklists.content_hash(decklists.parse_decklist(page(1002))) == decklists.content_hash(CARDS)
+
+def test_a_page_without_a_list_has_no_cards():
+    assert decklists.parse_decklist(page(1003)) == []
+
+def test_fetch_stores_identical_lists_once(tmp_path):
+    with closing(create_database(str(tmp_path / "decklists.db"))) as conn:
+        leader_id = conn.execute("SELECT MIN(leader_id) FROM leaders").fetchone()[0]
+        base_ids = [base_id for (base_id,) in conn.execute("SELECT base_id FROM bases ORDER BY base_id LIMIT 4")]
+        # Two decks share the 1001 link; 1002 is the same list as a text export; 1003 is private
+        links = [1001, 1001, 1002, 1003]
+        conn.executemany("INSERT INTO decks (leader_id, base_id, decklink) VALUES (?, ?, ?)",
+                         [(leader_id, base_id, f"https://melee.gg/Decklist/View/{link}")
+                          for base_id, link in zip(base_ids, links)])
+        conn.commit()
+
+        store, failed = decklists.fetch(conn, concurrency=1, rate=0, fixtures=str(FIXTURES))
+
+        assert (store.stored, store.shared, store.decks) == (1, 2, 3)
+        assert [link for link, _ in failed] == ["https://melee.gg/Decklist/View/1003"]
+        expanded = {}
+        for deck_id, name, subtitle, count, sideboard in conn.execute(
+                "SELECT a.deck_id, c.name, c.subtitle, a.count, a.sideboard FROM all_deck_cards a "
+                "JOIN cards c ON c.card_id = a.card_id"):
+            expanded.setdefault(deck_id, set()).add((name, subtitle, count, sideboard))
+        assert sorted(expanded) == [1, 2, 3]
+        assert all(cards == {(name, subtitle, count, sideboard) for name, subtitle, _, count, sideboard in CARDS}
+                   for cards in expanded.values())
+        assert conn.execute("SELECT deck_id FROM decks WHERE content_hash IS NULL").fetchall() == [(4,)]
+        # The private page is left for the next run
+        assert decklists.pending_decklinks(conn) == [("https://melee.gg/Decklist/View/1003", [4])]
@@ -0,0 +1,88 @@
+"""HubCrawler's retries, rate limit and cache revalidation against the local fixture server."""
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from http_cache import HttpCache
+from hub_crawler import HubCrawler, TokenBucket, retry_after
+from tests.fixture_server import FixtureServer
+
+def gaps(server, number):
+    times = [at for page, at, _, _ in server.requests if page == number]
+    return [later - earlier for earlier, later in zip(times, times[1:])]
+
+def test_errors_are_retried_with_exponential_backoff():
+    with FixtureServer(1, failing={0: [503, 502]}, retry_after=None) as server:
+        crawler = HubCrawler(rate=0, backoff=0.1)
+        [(_, data, error)] = crawler.crawl([{"link": server.url(0)}], progress=False)
+    assert error is None and data["melee_link"] == "https://melee.gg/Tournament/View/100000"
+    assert [status for _, _, _, status in server.requests] == [503, 502, 200]
+    assert (crawler.requests, crawler.retried) == (3, 2)
+    first, second = gaps(server, 0)
+    assert 0.1 <= first < 0.2 and 0.2 <= second < 0.35  # backoff * 2 ** attempt, plus up to 50% jitter
+
+def test_the_last_error_is_reported_once_the_retries_are_spent():
+    with FixtureServer(1, failing={0: [503] * 5}) as server:
+        crawler = HubCrawler(rate=0, retries=2, backoff=0.01)
+        [(_, data, error)] = crawler.crawl([{"link": server.url(0)}], progress=False)
+    assert data is None and isinstance(error, httpx.HTTPStatusError)
+    assert error.response.status_code == 503
+    assert crawler.requests == 3
+
+def test_retry_after_overrides_the_backoff():
+    with FixtureServer(1, failing={0: [429]}, retry_after="0.4") as server:
+        crawler = HubCrawler(rate=0, backoff=0.01)
+        [(_, _, error)] = crawler.crawl([{"link": server.url(0)}], progress=False)
+    assert error is None
+    assert gaps(server, 0)[0] >= 0.4
+
+def test_retry_after_header_values():
+    def response(value):
+        return httpx.Response(429, headers={} if value is None else {"Retry-After": value})
+
+    assert retry_after(response("2")) == 2
+    assert retry_after(response("-1")) == 0
+    assert retry_after(response(None)) is None
+    assert retry_after(response("soon")) is None
+    assert 25 < retry_after(response(formatdate(time.time() + 30, usegmt=True))) <= 30
+    assert retry_after(response(formatdate(time.time() - 30, usegmt=True))) == 0
+
+def test_token_bucket_allows_the_burst_then_the_rate():
+    async def acquire(bucket, count):
+        times = []
+        for _ in range(count):
+            await bucket.acquire()
+            times.append(time.monotonic())
+        return times
+
+    times = asyncio.run(acquire(TokenBucket(rate=20, burst=3), 9))
+    assert times[2] - times[0] < 0.02
+    assert times[-1] - times[2] == pytest.approx(6 / 20, abs=0.03)
+
+def test_requests_to_a_host_keep_to_the_rate():
+    with FixtureServer(10) as server:
+        crawler = HubCrawler(concurrency=8, rate=20, burst=1)
+        results = crawler.crawl([{"link": server.url(number)} for number in range(10)], progress=False)
+    assert all(error is None for _, _, error in results)
+    times = sorted(at for _, at, _, _ in server.requests)
+    assert times[-1] - times[0] >= 9 / 20 - 0.02
+
+def test_stale_pages_are_revalidated_and_fresh_ones_served_from_the_cache(tmp_path):
+    always_revalidate = [(r"^http://127\.0\.0\.1", 0)]
+    with FixtureServer(2) as server, HttpCache(str(tmp_path / "cache.db"), rules=always_revalidate) as cache:
+        links = [{"link": server.url(number)} for number in range(2)]
+        first = dict((link["link"], data) for link, data, _ in HubCrawler(rate=0, cache=cache).crawl(links, progress=False))
+        second = dict((link["link"], data) for link, data, _ in HubCrawler(rate=0, cache=cache).crawl(links, progress=False))
+        assert second == first
+        assert (cache.misses, cache.revalidated, cache.hits) == (2, 2, 0)
+        revalidations = [(headers.get("If-None-Match"), status) for _, _, headers, status in server.requests[2:]]
+        assert sorted(revalidations) == [('"page-0"', 304), ('"page-1"', 304)]
+
+        cache.rules = [(r"^http://127\.0\.0\.1", 3600)]
+        server.reset()
+        third = dict((link["link"], data) for link, data, _ in HubCrawler(rate=0, cache=cache).crawl(links, progress=False))
+        assert third == first
+        assert cache.hits == 2 and server.requests == []
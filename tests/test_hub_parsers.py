@@ -0,0 +1,47 @@
+"""The three backends of hub_parsers.py must read the hub pages into identical `Cell` rows."""
+from pathlib import Path
+
+import pytest
+
+import hub_parsers
+from comp_hub_scraper import parse_tournament_links, parse_tournament_page
+from hub_parsers import PARSERS, Cell
+
+FIXTURES = Path(__file__).parent / "fixtures" / "hub"
+
+def page(name):
+    return (FIXTURES / name).read_bytes()
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_listing_rows(parser):
+    rows = hub_parsers.listing_rows(page("listing.html"), parser)
+    assert rows == hub_parsers.listing_rows(page("listing.html"), "html.parser")
+    # The commented out, scripted and second tables with the same id are not read
+    assert [row[0].text for row in rows] == ["2025-03-15", "2025-03-09", "2025-03-08", "2025-03-01"]
+    assert rows[1][1] == Cell("Sector Qualifier München & Umgebung",
+                              "https://www.swu-competitivehub.com/tournament/sector-qualifier-m%C3%BCnchen", None)
+    assert rows[1][2].img == "" and rows[1][4].text == "SQ"
+    assert rows[2][1] == Cell("Store ShowdownGalactic Gamesno link", None, None)
+    assert rows[2][4].text == "Store"
+    assert rows[3][1].href == "/tournament/regional-nested" and rows[3][2].img == "Spain"
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_tournament_page(parser):
+    link, rows = hub_parsers.tournament_page(page("tournament.html"), parser)
+    assert (link, rows) == hub_parsers.tournament_page(page("tournament.html"), "html.parser")
+    # The first link outside scripts and comments
+    assert link == "https://melee.gg/Tournament/View/123456"
+    assert rows[0] == [Cell("1", None, None), Cell("", "https://melee.gg/Decklist/View/1001", "Han Solo"),
+                       Cell("Han SoloWorth the Risk", None, None), Cell("José Pérez", None, None)]
+    # A table nested in a cell adds its cells to the row and its rows after it; the second tbody is not read
+    assert [cell.text for cell in rows[1]] == ["2", "Sabine", "Sabine", "Sabine Wren", "Player\n        Two"]
+    assert [cell.text for cell in rows[2]] == ["Sabine"]
+    assert [cell.text for cell in rows[3]] == ["3", "Deck", "Darth Vader", "player\xa0three"]
+    assert [cell.text for cell in rows[4]] == ["4", "", "Boba Fett", "Four<4>"]
+    assert len(rows) == 5
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_scraper_results_do_not_depend_on_the_parser(parser):
+    assert parse_tournament_page(page("tournament.html"), parser) == parse_tournament_page(page("tournament.html"))
+    assert parse_tournament_links(page("listing.html").decode("utf-8"), parser=parser) \
+        == parse_tournament_links(page("listing.html").decode("utf-8"))
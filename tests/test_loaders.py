@@ -0,0 +1,163 @@
+"""Both loaders of melee_csv_to_sql.py must store the same players and results."""
+import csv
+import shutil
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.synthetic import create_database
+from melee_csv_to_sql import bulk_load, process_csv
+from melee_sinks import DerivedStandingsSink, SqliteSink
+from swiss_standings import STANDINGS_COLUMNS
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+def write_standings(path, entrants):
+    """Write a standings CSV of (username, rank) rows, all on the same deck."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(STANDINGS_COLUMNS)
+        for username, rank in entrants:
+            writer.writerow([rank, username, username, "Han Solo, Worth the Risk", "Lake Country",
+                             f"https://melee.gg/Decklist/View/{rank}", 0, 0, 0, 0, 0, 0, 0, "", "", ""])
+    return str(path)
+
+def database(path, melee_ids):
+    conn = create_database(str(path))
+    conn.executemany("INSERT INTO tournaments (date, level, name, link) VALUES ('2025-01-01', 'PQ', ?, ?)",
+                     [(f"Event {melee_id}", f"https://melee.gg/Tournament/View/{melee_id}") for melee_id in melee_ids])
+    conn.commit()
+    return conn
+
+def stored(conn):
+    players = sorted(name for (name,) in conn.execute("SELECT name FROM players"))
+    results = sorted(conn.execute(
+        "SELECT t.link, p.name, r.result FROM results r JOIN players p ON p.player_id = r.player_id "
+        "JOIN tournaments t ON t.tournament_id = r.tournament_id"))
+    return players, results
+
+def load_both(tmp_path, files, melee_ids):
+    with closing(database(tmp_path / "rows.db", melee_ids)) as rows_conn, redirect_stdout(StringIO()):
+        for csv_file in files:
+            process_csv(rows_conn, csv_file)
+        by_rows = stored(rows_conn)
+    with closing(database(tmp_path / "bulk.db", melee_ids)) as bulk_conn:
+        loader = bulk_load(bulk_conn, files)
+        by_bulk = stored(bulk_conn)
+    return by_rows, by_bulk, loader
+
+def test_names_equal_after_normalization_stay_separate_players(tmp_path):
+    files = [write_standings(tmp_path / "111_standings.csv", [("Jose", 1)]),
+             write_standings(tmp_path / "222_standings.csv", [("JOSE", 1), ("José", 2)])]
+    by_rows, by_bulk, loader = load_both(tmp_path, files, [111, 222])
+
+    assert by_bulk == by_rows
+    players, results = by_bulk
+    assert players == ["JOSE", "Jose", "José"]
+    assert len(results) == 3
+    assert sorted(name for name, _ in loader.alias_candidates) == ["JOSE", "José"]
+
+def test_recorded_aliases_are_used_by_both_loaders(tmp_path):
+    files = [write_standings(tmp_path / "111_standings.csv", [("Jose", 1)]),
+             write_standings(tmp_path / "222_standings.csv", [("José", 3)])]
+    for name in ("rows.db", "bulk.db"):
+        with closing(database(tmp_path / name, [111, 222])) as conn:
+            conn.execute("INSERT INTO players (name) VALUES ('Jose')")
+            conn.execute("INSERT INTO player_aliases (player_id, alias) VALUES (1, 'José')")
+            conn.commit()
+    with closing(sqlite3.connect(tmp_path / "rows.db")) as conn, redirect_stdout(StringIO()):
+        for csv_file in files:
+            process_csv(conn, csv_file)
+        by_rows = stored(conn)
+    with closing(sqlite3.connect(tmp_path / "bulk.db")) as conn:
+        loader = bulk_load(conn, files)
+        by_bulk = stored(conn)
+
+    assert by_bulk == by_rows
+    assert by_bulk[0] == ["Jose"]
+    assert [result[1:] for result in by_bulk[1]] == [("Jose", 1), ("Jose", 3)]
+    assert loader.alias_candidates == []
+
+def test_pairings_of_unknown_tournaments_are_skipped(tmp_path):
+    files = []
+    for melee_id in (900001, 900002):
+        files.append(str(tmp_path / f"{melee_id}_pairings.csv"))
+        shutil.copy(FIXTURES / "900001_pairings.csv", files[-1])
+    with closing(database(tmp_path / "bulk.db", [900001])) as conn:
+        loader = bulk_load(conn, [], files)
+        assert loader.skipped == [files[1]]
+        assert loader.rows_loaded == 12
+        assert conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0] == 1
+        assert conn.execute("SELECT DISTINCT tournament_id FROM matches").fetchall() == [(1,)]
+
+def test_the_sqlite_sink_skips_pairings_of_unknown_tournaments(tmp_path):
+    with open(FIXTURES / "900001_pairings.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    headers = ["Table", "Players/Teams", "Decklists", "Result"]
+    with closing(database(tmp_path / "sink.db", [900001])) as conn, redirect_stdout(StringIO()):
+        sink = SqliteSink(conn)
+        saved = []
+        for melee_id in ("900001", "900002"):
+            sink.start(melee_id, "pairings", f"{melee_id}_pairings.csv")
+            sink.write_page(headers, rows)
+            saved.append(sink.finish())
+        assert saved == [True, False]
+        assert sink.loader.skipped == ["900002_pairings.csv"]
+        assert conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0] == 12
+
+def test_derived_standings_of_unknown_tournaments_are_kept_as_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(FIXTURES / "900001_pairings.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    headers = ["Table", "Players/Teams", "Decklists", "Result"]
+    with closing(database(tmp_path / "sink.db", [])) as conn, redirect_stdout(StringIO()):
+        sink = DerivedStandingsSink(SqliteSink(conn))
+        sink.start("900001", "pairings", "900001_pairings.csv")
+        sink.write_page(headers, rows)
+
+        assert sink.finish() is False
+        assert sink.loader.skipped == ["900001_pairings.csv"]
+        assert conn.execute("SELECT COUNT(*) FROM tournaments").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+    # Both tables are written as if they had been scraped to CSV, ready to be loaded later
+    def read(path, columns=None):
+        with open(path, newline="", encoding="utf-8") as f:
+            return [row[:columns] for row in csv.reader(f)]
+
+    assert read(tmp_path / "900001_pairings.csv") == read(FIXTURES / "900001_pairings.csv")
+    # The fixture's tiebreakers are rounded by Melee, see test_swiss_standings.py
+    assert read(tmp_path / "900001_standings.csv", 13) == read(FIXTURES / "900001_standings.csv", 13)
+
+def test_both_loaders_store_the_same_synthetic_events(tmp_path):
+    from benchmarks.synthetic import write_events
+    files = []
+    for seed in (1, 2, 3):
+        directory = tmp_path / f"seed{seed}"
+        directory.mkdir()
+        write_events(str(directory), "local", seed)
+        files.append(str(tmp_path / f"{900000 + seed}_standings.csv"))
+        shutil.copy(directory / "100001_standings.csv", files[-1])
+    # The second load of a file adds nothing
+    files.append(files[0])
+
+    def decks(conn):
+        return sorted(conn.execute(
+            "SELECT t.link, p.name, r.result, l.name, l.subtitle, b.name, d.decklink FROM results r "
+            "JOIN tournaments t ON t.tournament_id = r.tournament_id JOIN players p ON p.player_id = r.player_id "
+            "LEFT JOIN decks d ON d.deck_id = r.deck_id LEFT JOIN leaders l ON l.leader_id = d.leader_id "
+            "LEFT JOIN bases b ON b.base_id = d.base_id"), key=repr)
+
+    melee_ids = [900001, 900002, 900003]
+    with closing(database(tmp_path / "rows.db", melee_ids)) as rows_conn, redirect_stdout(StringIO()):
+        for csv_file in files:
+            process_csv(rows_conn, csv_file)
+        by_rows = stored(rows_conn), decks(rows_conn)
+    with closing(database(tmp_path / "bulk.db", melee_ids)) as bulk_conn:
+        loader = bulk_load(bulk_conn, files)
+        by_bulk = stored(bulk_conn), decks(bulk_conn)
+
+    assert by_bulk == by_rows
+    assert loader.rows_loaded == len(by_bulk[1]) >= 90  # Three events of 32, less a repeated entrant
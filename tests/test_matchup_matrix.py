@@ -0,0 +1,51 @@
+"""matchup_matrix.refresh must pick up every change to a tournament's matches, not only new ones."""
+from contextlib import closing
+
+import matchup_matrix
+from benchmarks.synthetic import build_database
+
+def matrix_is_current(conn):
+    # Per leader: a swapped result cancels out in the totals over every leader
+    leaders = [leader_id for (leader_id,) in conn.execute("SELECT DISTINCT leader_id FROM decks")]
+    return all(matchup_matrix.query_matrix(conn, leaders=[leader_id])
+               == matchup_matrix.naive_query(conn, leaders=[leader_id]) for leader_id in leaders)
+
+def test_refresh_follows_changed_matches(tmp_path):
+    with closing(build_database(str(tmp_path / "matrix.db"), tournaments=8, players=16, rounds=4)) as conn:
+        assert matchup_matrix.refresh(conn, full=True)[0] == 8
+        assert matchup_matrix.refresh(conn) == (0, 0)
+        # Not a mirror match, whose swapped result would leave the matrix as it is
+        match_id, tournament_id, deck_id = conn.execute(
+            "SELECT m.match_id, m.tournament_id, m.deck1_id FROM matches m "
+            "JOIN decks d1 ON d1.deck_id = m.deck1_id JOIN decks d2 ON d2.deck_id = m.deck2_id "
+            "WHERE (d1.leader_id, d1.base_id) <> (d2.leader_id, d2.base_id) "
+            "AND m.player1_wins <> m.player2_wins ORDER BY m.match_id LIMIT 1").fetchone()
+
+        # A corrected result
+        with conn:
+            conn.execute("UPDATE matches SET player1_wins = player2_wins, player2_wins = player1_wins "
+                         "WHERE match_id = ?", (match_id,))
+        assert not matrix_is_current(conn)
+        assert matchup_matrix.refresh(conn) == (1, 1)
+        assert matrix_is_current(conn)
+
+        # A deck reassigned to another archetype, in the match or in the decks table
+        other_deck = conn.execute("SELECT deck_id FROM decks WHERE (leader_id, base_id) <> "
+                                  "(SELECT leader_id, base_id FROM decks WHERE deck_id = ?) LIMIT 1",
+                                  (deck_id,)).fetchone()[0]
+        with conn:
+            conn.execute("UPDATE matches SET deck1_id = ? WHERE match_id = ?", (other_deck, match_id))
+        assert matchup_matrix.refresh(conn) == (1, 1)
+        assert matrix_is_current(conn)
+        with conn:
+            conn.execute("UPDATE decks SET base_id = (SELECT MAX(base_id) FROM bases) + 1 WHERE deck_id = ?",
+                         (other_deck,))
+        assert matchup_matrix.refresh(conn)[0] >= 1
+        assert matrix_is_current(conn)
+
+        # Every match of a tournament deleted
+        with conn:
+            conn.execute("DELETE FROM matches WHERE tournament_id = ?", (tournament_id,))
+        assert matchup_matrix.refresh(conn) == (1, 1)
+        assert matrix_is_current(conn)
+        assert matchup_matrix.refresh(conn) == (0, 0)
@@ -0,0 +1,176 @@
+"""The http engine against a stub server must write the Selenium engine's CSV files.
+
+tests/fixtures/900001_*.csv are in the layout the Selenium engine writes for the
+event; tests/fixtures/melee holds a tournament page and DataTables JSON built from
+them in the schema melee_http.py assumes. They are not recorded Melee.gg responses,
+so these tests only pin the conversion; responses that don't match the schema must
+send the tournament to the browser. Round 4 is the active round but has no results
+yet, so the standings walk back to round 3.
+"""
+import json
+import threading
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import pytest
+
+import melee_http
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGES = FIXTURES / "melee"
+
+class StubServer:
+    """Serves the tournament page and JSON pages, sliced like DataTables does.
+
+    `edit` may change every JSON body before it is sent.
+    """
+    def __init__(self, edit=None):
+        self.posts = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.answer(PAGES / f"tournament_{self.path.rsplit('/', 1)[-1]}.html", "text/html; charset=utf-8")
+
+            def do_POST(self):
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(
+                    int(self.headers["Content-Length"])).decode("utf-8")).items()}
+                server.posts.append((self.path, form["roundId"], int(form["start"])))
+                if self.path == "/Standing/GetRoundStandings":
+                    table = "standings"
+                elif self.path == f"/Match/GetRoundMatches/{form['roundId']}":
+                    table = "matches"
+                else:
+                    table = "unknown"
+                path = PAGES / f"{table}_{form['roundId']}.json"
+                if not path.exists():
+                    self.answer(path, "application/json")
+                    return
+                body = json.loads(path.read_text(encoding="utf-8"))
+                start, length = int(form["start"]), int(form["length"])
+                body["draw"] = int(form["draw"])
+                body["data"] = body["data"][start:start + length]
+                if edit is not None:
+                    edit(body)
+                self.send(json.dumps(body).encode("utf-8"), "application/json")
+
+            def answer(self, path, content_type):
+                if path.exists():
+                    self.send(path.read_bytes(), content_type)
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+
+            def send(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+def scrape(server, mode):
+    with redirect_stdout(StringIO()):
+        melee_http.scrape_tournament(f"{server.base_url}/Tournament/View/900001", mode)
+
+def written(path, server):
+    # Links are resolved against the host of the tournament URL, here the stub server's
+    return path.read_text(encoding="utf-8").replace(server.base_url, "https://melee.gg")
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with StubServer() as server:
+        yield server
+
+def test_standings_walk_back_to_the_last_round_with_results(server, tmp_path):
+    scrape(server, "standings")
+    # The active round 4 has no standings yet
+    assert server.posts == [(melee_http.STANDINGS_ENDPOINT, "14", 0), (melee_http.STANDINGS_ENDPOINT, "13", 0)]
+    assert not (tmp_path / "900001_standings.csv").exists()
+    assert written(tmp_path / "900001_standings_incomplete.csv", server) \
+        == (FIXTURES / "900001_standings.csv").read_text(encoding="utf-8")
+
+def test_pairings_stop_at_the_first_round_without_pairings(server, tmp_path):
+    scrape(server, "pairings")
+    assert [round_id for _, round_id, _ in server.posts] == ["11", "12", "13", "14"]
+    assert written(tmp_path / "900001_pairings.csv", server) \
+        == (FIXTURES / "900001_pairings.csv").read_text(encoding="utf-8")
+
+def test_rounds_are_read_page_by_page(server, tmp_path):
+    pages = list(melee_http.fetch_table_pages(melee_http.create_session(), server.base_url + melee_http.STANDINGS_ENDPOINT,
+                                              "13", page_size=3))
+    assert [len(data) for data in pages] == [3, 3, 1]
+    assert [start for _, _, start in server.posts] == [0, 3, 6]
+
+def test_a_session_returns_the_same_kind_of_result_as_a_browser_scrape(server, tmp_path):
+    from melee_scraper import MeleeSession, ScrapeContext
+    with MeleeSession(engine="http") as session, redirect_stdout(StringIO()):
+        standings = session.scrape(f"{server.base_url}/Tournament/View/900001", "standings")
+        pairings = session.scrape(f"{server.base_url}/Tournament/View/900001", "pairings")
+    assert isinstance(standings, ScrapeContext) and standings.tournament == "900001"
+    assert (standings.pages, standings.rows) == (1, 7)
+    assert (pairings.pages, pairings.rows) == (3, 12)
+    assert standings.timer.totals["navigation"] > 0
+
+def renamed(table_field, new_name):
+    def edit(body):
+        for entry in body["data"]:
+            if table_field in entry:
+                entry[new_name] = entry.pop(table_field)
+    return edit
+
+def test_an_entry_missing_an_expected_field_is_not_converted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with StubServer(renamed("MatchRecord", "Record")) as server:
+        with pytest.raises(melee_http.UnexpectedResponse, match="MatchRecord"):
+            scrape(server, "standings")
+    # The sink was aborted, nothing half-converted is left behind
+    assert list(tmp_path.iterdir()) == []
+
+def test_unexpected_responses_send_the_tournament_to_the_browser(tmp_path, monkeypatch):
+    from melee_scraper import MeleeSession, ScrapeContext
+    monkeypatch.chdir(tmp_path)
+    browser = []
+
+    def scrape_once(session, url, mode):
+        browser.append((url, mode))
+        return ScrapeContext(None)
+
+    monkeypatch.setattr(MeleeSession, "start", lambda session: None)
+    monkeypatch.setattr(MeleeSession, "_scrape_once", scrape_once)
+    with StubServer(renamed("Competitors", "Teams")) as server, MeleeSession(engine="http") as session, \
+            redirect_stdout(StringIO()):
+        url = f"{server.base_url}/Tournament/View/900001"
+        session.scrape(url, "standings")
+        session.scrape(url, "pairings")
+        # An endpoint that doesn't exist is as good as an unknown schema
+        monkeypatch.setattr(melee_http, "STANDINGS_ENDPOINT", "/Standings/Round")
+        session.scrape(url, "both")
+
+    assert browser == [(url, "pairings"), (url, "both")]
+    assert session.http_fallbacks == 2
+    assert (tmp_path / "900001_standings_incomplete.csv").exists()
+    assert not (tmp_path / "900001_pairings.csv").exists()
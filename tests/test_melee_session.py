@@ -0,0 +1,69 @@
+"""MeleeSession's browser restarts, with the browser and the scrape itself replaced by stand-ins."""
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+
+from melee_scraper import MeleeSession
+
+class Driver:
+    def __init__(self):
+        self.alive = True
+
+    @property
+    def title(self):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return "Melee"
+
+    def quit(self):
+        pass
+
+class Scrape:
+    def __init__(self, pages):
+        self.pages = pages
+
+class Session(MeleeSession):
+    """Runs the scripted outcomes of `_scrape_once` in order: page counts or exceptions."""
+    def __init__(self, outcomes, restart_after=0):
+        super().__init__(restart_after=restart_after)
+        self.outcomes = list(outcomes)
+        self.starts = 0
+
+    def start(self):
+        self.driver = Driver()
+        self.starts += 1
+        self.pages_since_start = 0
+
+    def _scrape_once(self, url, mode):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            if isinstance(outcome, WebDriverException) and "reachable" in outcome.msg:
+                self.driver.alive = False
+            raise outcome
+        return Scrape(outcome)
+
+def test_timeouts_are_raised_without_a_restart():
+    session = Session([TimeoutException("no table")])
+    with pytest.raises(TimeoutException):
+        session.scrape("https://melee.gg/Tournament/View/1")
+    assert (session.starts, session.restarts) == (1, 0)
+
+def test_errors_of_a_live_browser_are_raised():
+    session = Session([WebDriverException("element not interactable")])
+    with pytest.raises(WebDriverException):
+        session.scrape("https://melee.gg/Tournament/View/1")
+    assert session.restarts == 0
+
+@pytest.mark.parametrize("lost", [InvalidSessionIdException("invalid session id"),
+                                  WebDriverException("chrome not reachable")])
+def test_a_lost_session_is_restarted_and_retried_once(lost):
+    session = Session([lost, 3])
+    assert session.scrape("https://melee.gg/Tournament/View/1").pages == 3
+    assert (session.starts, session.restarts, session.pages_since_start) == (2, 1, 3)
+
+def test_restart_after_waits_for_the_next_scrape():
+    session = Session([5, 5, 2], restart_after=4)
+    session.scrape("https://melee.gg/Tournament/View/1")
+    assert session.restarts == 0  # Not after the last tournament
+    session.scrape("https://melee.gg/Tournament/View/2")
+    session.scrape("https://melee.gg/Tournament/View/3")
+    assert (session.restarts, session.pages_since_start) == (2, 2)
@@ -0,0 +1,47 @@
+"""migrate.py must leave every loader lookup on an index and be safe to re-run."""
+import sqlite3
+from contextlib import closing, redirect_stdout
+from io import StringIO
+
+import pytest
+
+import migrate
+from benchmarks.synthetic import BASE_SCHEMA
+
+def base_database():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(BASE_SCHEMA.read_text(encoding="utf-8"))
+    return conn
+
+def test_no_loader_query_scans_a_table_after_migrating():
+    with closing(base_database()) as conn, redirect_stdout(StringIO()):
+        assert migrate.full_scans(conn) != []
+        migrate.migrate(conn)
+        assert migrate.full_scans(conn) == []
+
+def test_loader_queries_include_the_alias_lookup():
+    queries = [query for _name, query in migrate.LOADER_QUERIES]
+    assert "SELECT player_id FROM player_aliases WHERE alias=? ORDER BY alias_id LIMIT 1" in queries
+
+def test_migrating_twice_is_a_no_op():
+    with closing(base_database()) as conn, redirect_stdout(StringIO()):
+        applied = migrate.migrate(conn)
+        schema = sorted(conn.execute("SELECT type, name, sql FROM sqlite_master"))
+        versions = list(conn.execute("SELECT * FROM schema_version ORDER BY version"))
+
+        assert applied == [version for version, _name, _path in migrate.available_migrations()]
+        assert migrate.migrate(conn) == []
+        assert sorted(conn.execute("SELECT type, name, sql FROM sqlite_master")) == schema
+        assert list(conn.execute("SELECT * FROM schema_version ORDER BY version")) == versions
+
+def test_a_failing_migration_leaves_the_previous_version(tmp_path):
+    (tmp_path / "0001_first.sql").write_text('CREATE TABLE "first" ("id" INTEGER);', encoding="utf-8")
+    (tmp_path / "0002_broken.sql").write_text('CREATE TABLE "second" ("id" INTEGER);\nNOT SQL;',
+                                              encoding="utf-8")
+    with closing(sqlite3.connect(":memory:")) as conn, redirect_stdout(StringIO()):
+        with pytest.raises(RuntimeError, match="0002_broken.sql"):
+            migrate.migrate(conn, tmp_path)
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+        assert migrate.current_version(conn) == 1
+        assert "first" in tables and "second" not in tables
@@ -0,0 +1,103 @@
+"""scrape_cache.py keeps page snapshots, so cached events are re-parsed with the current column parsers."""
+import csv
+import sqlite3
+from contextlib import redirect_stdout
+from io import StringIO
+
+import melee_scraper
+from melee_scraper import CELL_XPATHS, PLAYER_LINK_XPATH, column_xpath, standings_column_parsers
+from scrape_cache import PageCache
+
+def node(text, href=None, found=None):
+    return {"text": text, "href": href, "found": found or {path: [] for path in CELL_XPATHS}}
+
+def standings_row(rank, username, name, deck, decklink, points):
+    cells = {
+        "Rank-column": node(str(rank)),
+        "Player-column": node(name, found={**{path: [] for path in CELL_XPATHS},
+                                           PLAYER_LINK_XPATH: [node(name, f"https://melee.gg/Profile/Index/{username}")]}),
+        "Decklists-column": node(deck, found={**{path: [] for path in CELL_XPATHS},
+                                              PLAYER_LINK_XPATH: [node(deck, decklink)]}),
+        "MatchRecord-column": node("2-1-0"),
+        "GameRecord-column": node("4-2-0"),
+        "Points-column": node(str(points)),
+        "OpponentMatchWinPercentage-column": node("55.56%"),
+        "TeamGameWinPercentage-column": node("66.67%"),
+        "OpponentGameWinPercentage-column": node("52.08%"),
+    }
+    return node(f"{rank} {name}", found={column_xpath(td_class): [cells[td_class]] for td_class in standings_column_parsers})
+
+HEADERS = ["Rank", "Players/Teams", "Decklist", "Match Record", "Game Record", "Points", "OMW%", "TGW%", "OGW%"]
+ROWS = [standings_row(1, "user_a", "Alex Smith", "Han Solo, Worth the Risk - Lake Country",
+                      "https://melee.gg/Decklist/View/1", 6),
+        standings_row(2, "user_b", "Björn Müller", "Yoda, Sensing Darkness - Tarkintown",
+                      "https://melee.gg/Decklist/View/2", 6)]
+
+def export(cache, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with redirect_stdout(StringIO()):
+        ctx = melee_scraper.scrape_from_cache(cache, "https://melee.gg/Tournament/View/900001", "standings")
+    with open(tmp_path / "900001_standings.csv", newline="", encoding="utf-8") as f:
+        return ctx, list(csv.reader(f))
+
+def test_cached_snapshots_are_parsed_with_the_current_parsers(tmp_path, monkeypatch):
+    with PageCache(str(tmp_path / "cache.db")) as cache:
+        cache.save_page("900001", "standings", 2, 1, HEADERS, ROWS)
+        cache.finish_round("900001", "standings", 2, 1)
+        cache.finish_table("900001", "standings", True)
+
+        ctx, rows = export(cache, tmp_path, monkeypatch)
+        assert ctx.rows == 2
+        assert rows[0][:6] == ["Rank", "Username", "Players/Teams", "Leader", "Base", "Decklink"]
+        assert rows[1] == ["1", "user_a", "Alex Smith", "Han Solo, Worth the Risk", "Lake Country",
+                           "https://melee.gg/Decklist/View/1", "2", "1", "0", "4", "2", "0", "6",
+                           "55.56%", "66.67%", "52.08%"]
+
+        # A changed column parser applies to the cached pages without scraping them again
+        monkeypatch.setitem(standings_column_parsers, "Player-column",
+                            lambda cell, players: ["-", cell.text.upper()])
+        ctx, rows = export(cache, tmp_path, monkeypatch)
+        assert [row[2] for row in rows[1:]] == ["ALEX SMITH", "BJÖRN MÜLLER"]
+
+class Element:
+    """WebElement stand-in built from the same data as a snapshot."""
+    def __init__(self, data):
+        self.text = data["text"]
+        self.href = data["href"]
+        self.found = data["found"]
+
+    def get_attribute(self, name):
+        return self.href if name == "href" else None
+
+    def find_elements(self, by, value):
+        return [Element(child) for child in self.found.get(value, [])]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise melee_scraper.NoSuchElementException(value)
+        return elements[0]
+
+def test_dom_snapshots_parse_like_the_elements_they_were_taken_from():
+    elements = [Element(row) for row in ROWS]
+    column_xpaths = [column_xpath(td_class) for td_class in standings_column_parsers]
+    snapshots = [melee_scraper.row_snapshot(row, column_xpaths) for row in elements]
+
+    assert snapshots == ROWS
+    assert melee_scraper.parse_page("standings", 2, HEADERS, snapshots) == \
+        (HEADERS, melee_scraper.parse_standings_rows(elements))
+
+def test_a_cache_of_parsed_rows_is_emptied(tmp_path):
+    path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE pages (tournament TEXT, table_name TEXT, round INTEGER, page INTEGER, headers TEXT, rows TEXT);
+        INSERT INTO pages VALUES ('900001', 'standings', 2, 1, '["Rank"]', '[["1"]]');
+    """)
+    conn.close()
+
+    with PageCache(path) as cache:
+        assert cache.page("900001", "standings", 2, 1) is None
+        cache.save_page("900001", "standings", 2, 1, HEADERS, ROWS)
+    with PageCache(path) as cache:
+        assert cache.page("900001", "standings", 2, 1) == (HEADERS, ROWS)
@@ -0,0 +1,52 @@
+"""Standings derived by swiss_standings.py against a standings file with the tiebreakers computed exactly."""
+import csv
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import swiss_standings
+from swiss_standings import Pairings, compare, percentage
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAIRINGS = FIXTURES / "900001_pairings.csv"
+STANDINGS = FIXTURES / "900001_standings.csv"  # Tiebreakers from exact fractions, rounded half up
+
+def quiet_compare(derived, standings_file):
+    with redirect_stdout(StringIO()):
+        return compare(derived, str(standings_file))
+
+def test_derived_standings_match_the_fixture():
+    derived = Pairings.from_csv(str(PAIRINGS)).standings().rows()
+    assert quiet_compare(derived, STANDINGS) == 0
+    with open(STANDINGS, newline="", encoding="utf-8") as f:
+        expected = list(csv.reader(f))[1:]
+    assert [row[:13] for row in derived] == [row[:6] + [int(value) for value in row[6:12]] + [row[12]]
+                                             for row in expected]
+
+def test_bye_counts_as_a_win_but_not_as_an_opponent():
+    standings = {row[1]: row for row in Pairings.from_csv(str(PAIRINGS)).standings().rows()}
+    # user_d: lost to user_c, a bye, beat user_e; OMW% is the average of those two opponents only
+    assert standings["user_d"][6:9] == [2, 1, 0]
+    assert standings["user_d"][13] == "66.50%"
+
+def test_percentages_on_a_rounding_boundary():
+    assert percentage(0.51875) == "51.88%"
+    assert percentage(0.5187499999999999) == percentage(0.5187500000000001)
+
+def test_compare_allows_one_unit_of_the_last_decimal_only(tmp_path):
+    derived = Pairings.from_csv(str(PAIRINGS)).standings().rows()
+    with open(STANDINGS, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    omw = rows[0].index("OMW%")
+
+    def shifted(by):
+        changed = [list(row) for row in rows]
+        changed[1][omw] = f"{float(changed[1][omw].rstrip('%')) + by:.2f}%"
+        path = tmp_path / f"shifted_{by}.csv"
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(changed)
+        return path
+
+    assert quiet_compare(derived, shifted(0.01)) == 0
+    assert quiet_compare(derived, shifted(0.05)) == 1
+    assert swiss_standings.PERCENTAGE_TOLERANCE < 0.02
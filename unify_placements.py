@@ -16,10 +16,13 @@ Two warnings that are commonly encountered and that need to be manually fixed:
 
 Usage
 -------
-    python unify_placements.py <placements.txt>
-    python unify_placements.py --all
+    python unify_placements.py <placements.txt> [--db swu_meta.db]
+    python unify_placements.py --all [--workers N] [--report unify_report.json] [--db swu_meta.db]
 
-If `--all` is specified, it processes all `*_placements.txt` files in the current folder.
+If `--all` is specified, it processes all `*_placements.txt` files in the current folder,
+spread over `--workers` processes (one per core by default). The messages are printed
+in file order as usual, and all warnings are also written to a JSON report
+(`--report`, default `unify_report.json`).
 It expects the placements file to be in a specific format where each line contains
 a placement followed by a colon and the player's name, e.g.:
     1st: Player One
@@ -27,15 +30,27 @@ a placement followed by a colon and the player's name, e.g.:
 It expects the standings file to be a CSV with columns "Username", "Players/Teams", and "Rank".
 Other columns are ignored but will be preserved in the output.
 
+Names are compared after normalization (case, accents and spacing are ignored, see
+player_identity.py). With `--db` a placement that matches no name in the standings is
+also tried under the other known names (aliases) of the player it resolves to in the
+database. For placements that still don't match, the closest names of the standings
+are suggested along with the warning.
+
 It will output a unified standings file with the same name as the original standings file,
 but with `_unified` appended before the `.csv` extension.
 """
 import argparse
 import glob
+import json
 import re
 import sys
 import os
-import pandas as pd
+import sqlite3
+
+from player_identity import PlayerIndex, normalize_name
+
+REPORT_FILE = "unify_report.json"
+SUGGESTIONS = 3  # Closest standings names suggested for an unmatched placement
 
 def parse_placement(placement_str):
     match = re.match(r"(\d+)(?:st|nd|rd|th)(?:-(\d+)(?:st|nd|rd|th))?", placement_str)
@@ -65,68 +80,200 @@ def find_standings_file(base_id):
             return fname
     return None
 
-def unify_placements(placements_file, standings_file, output_file):
+def _as_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+def name_index(df):
+    """Return (key, row) pairs of every normalized Username and Players/Teams value."""
+    import pandas as pd
+    names = pd.concat([
+        df["Username"].astype(str).map(normalize_name),
+        df["Players/Teams"].astype(str).map(normalize_name),
+    ])
+    return pd.DataFrame({"key": names.to_numpy(), "row": names.index.to_numpy()}).drop_duplicates()
+
+def load_identity(db_file):
+    """Return the PlayerIndex of the players and aliases in `db_file`."""
+    conn = sqlite3.connect(db_file)
+    try:
+        return PlayerIndex.load(conn)
+    finally:
+        conn.close()
+
+def unify_placements(placements_file, standings_file, output_file, verbose=True, identity=None):
+    """Write the standings with the placement ranks applied; return a report of what was done.
+
+    The report lists the placements that matched no player (`unmatched`) with the
+    closest standings names (`suggestions`), and the players in the top cut that are
+    missing from the placements (`extra_top_cut`). Placements that match no name are
+    retried under the aliases of their player in `identity` (a PlayerIndex), if given.
+    With `verbose` the warnings are also printed as they are found.
+    """
+    import pandas as pd  # Deferred so `--help` and the file lookups start instantly
     placements = load_placements(placements_file)
     df = pd.read_csv(standings_file)
+    report = {"placements_file": placements_file, "standings_file": standings_file, "output_file": output_file,
+              "placements": len(placements), "updated_rows": 0, "unmatched": [], "suggestions": {},
+              "extra_top_cut": [], "messages": []}
+
+    def warn(message):
+        report["messages"].append(message)
+        if verbose:
+            print(message)
 
-    # Build a set of all player names from placements for quick lookup (lowercase)
-    placement_names = set(player_name.lower() for _, player_name in placements)
+    # Build a set of all player names from placements for quick lookup (normalized)
+    placement_keys = [normalize_name(player_name) for _, player_name in placements]
+    placement_names = set(placement_keys)
     # Build a set of all top cut ranks from placements
-    top_cut_ranks = set(parse_placement(placement_str) for placement_str, _ in placements if placement_str.strip() != "" and parse_placement(placement_str) is not None)
+    ranks = [parse_placement(placement_str) for placement_str, _ in placements]
+    top_cut_ranks = set(rank for rank in ranks if rank is not None)
 
-    # Update ranks in the DataFrame
-    for placement_str, player_name in placements:
-        new_rank = parse_placement(placement_str)
-        if new_rank is None:
-            continue
+    # Resolve every placement against the normalized names in one merge; when several
+    # placements hit the same row the last one wins, like assigning them in order
+    keys = name_index(df)
+    known = set(keys["key"])
+    orders = list(range(len(placements)))
+    if identity is not None:
+        # Placements without a matching name also try the other names of their player
+        for order, key in enumerate(placement_keys):
+            player_id = identity.resolve(key) if key not in known else None
+            if player_id is None:
+                continue
+            for alias_key in sorted(identity.keys_of[player_id] - {key}):
+                orders.append(order)
+                placement_keys.append(alias_key)
+                placement_names.add(alias_key)
+    placed = pd.DataFrame({
+        "order": orders,
+        "key": placement_keys,
+        "rank": [ranks[order] for order in orders],
+    })
+    placed = placed[placed["rank"].notna()]
+    merged = keys.merge(placed, on="key").sort_values("order", kind="stable").drop_duplicates("row", keep="last")
+    for new_rank, rows in merged.groupby("rank", sort=False)["row"]:
+        df.loc[rows.to_numpy(), "Rank"] = int(new_rank)
+    report["updated_rows"] = len(merged)
 
-        mask = (
-            df["Username"].astype(str).str.strip().str.lower() == player_name.lower()
-        ) | (
-            df["Players/Teams"].astype(str).str.strip().str.lower() == player_name.lower()
-        )
-        matches = df[mask]
-        if not matches.empty:
-            df.loc[mask, "Rank"] = new_rank
-        elif player_name != "":
-            print(f"Warning: Could not match player '{player_name}' in standings.")
+    matched = set(placed.loc[placed["key"].isin(known), "order"])
+    standings_names = None
+    for order in placed["order"].drop_duplicates():
+        player_name = placements[order][1]
+        if order not in matched and player_name != "":
+            report["unmatched"].append(player_name)
+            warn(f"Warning: Could not match player '{player_name}' in standings.")
+            if standings_names is None:
+                standings_names = PlayerIndex()
+                for name in df["Username"].astype(str).tolist() + df["Players/Teams"].astype(str).tolist():
+                    standings_names.add(name.strip(), name)
+            closest = [(name, round(score, 2)) for score, name, _ in standings_names.candidates(player_name, SUGGESTIONS)]
+            if closest:
+                report["suggestions"][player_name] = closest
+                warn("  Closest names in standings: " + ", ".join(f"'{name}' ({score:.2f})" for name, score in closest))
 
     # Check for extra people in the top cut
-    for _, row in df.iterrows():
-        try:
-            rank = int(row["Rank"])
-        except Exception:
+    rank_values = [_as_int(value) for value in df["Rank"].tolist()]
+    usernames = df["Username"].tolist() if "Username" in df else [""] * len(df)
+    teams = df["Players/Teams"].tolist() if "Players/Teams" in df else [""] * len(df)
+    for position, rank in enumerate(rank_values):
+        if rank is None or rank not in top_cut_ranks:
             continue
-        if rank in top_cut_ranks:
-            username = str(row.get("Username", "")).strip()
-            team = str(row.get("Players/Teams", "")).strip()
-            # If neither username nor team is in placements, warn
-            if (username.lower() not in placement_names) and (team.lower() not in placement_names):
-                print(f"Warning: Extra player in top cut: Place {rank}, Username '{username}', Players/Teams '{team}'")
+        username = str(usernames[position]).strip()
+        team = str(teams[position]).strip()
+        # If neither username nor team is in placements, warn
+        if (normalize_name(username) not in placement_names) and (normalize_name(team) not in placement_names):
+            report["extra_top_cut"].append({"rank": rank, "username": username, "team": team})
+            warn(f"Warning: Extra player in top cut: Place {rank}, Username '{username}', Players/Teams '{team}'")
 
     df.to_csv(output_file, index=False)
-    print(f"Unified placements written to {output_file}")
+    message = f"Unified placements written to {output_file}"
+    report["messages"].append(message)
+    if verbose:
+        print(message)
+    return report
+
+_identity = None  # PlayerIndex of --db, set in every worker by _init_worker
+
+def _init_worker(db_file):
+    global _identity
+    _identity = load_identity(db_file) if db_file else None
+
+def unify_file(placements_file):
+    """Unify a placements file with its standings without printing; return the report, or None without standings."""
+    base_id = placements_file.split("_")[0]
+    standings_file = find_standings_file(base_id)
+    if not standings_file:
+        return None
+    output_file = standings_file.replace(".csv", "_unified.csv")
+    try:
+        return unify_placements(placements_file, standings_file, output_file, verbose=False, identity=_identity)
+    except Exception as e:
+        return {"placements_file": placements_file, "standings_file": standings_file, "output_file": None,
+                "error": f"{type(e).__name__}: {e}", "messages": [f"Error: {e}"]}
+
+def unify_all(files, workers=None, db_file=None):
+    """Yield (placements file, report) for every file, in order, unified by `workers` processes."""
+    if workers == 1 or len(files) < 2:
+        _init_worker(db_file)
+        yield from zip(files, map(unify_file, files))
+        return
+    # Only imported for a pool, it costs a good part of the --help startup budget
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_file,)) as pool:
+        yield from zip(files, pool.map(unify_file, files, chunksize=4))
+
+def write_report(path, results):
+    unified = [report for _, report in results if report is not None and "error" not in report]
+    summary = {
+        "files": len(results),
+        "unified": len(unified),
+        "skipped": [placements_file for placements_file, report in results if report is None],
+        "errors": [report for _, report in results if report is not None and "error" in report],
+        "unmatched": sum(len(report["unmatched"]) for report in unified),
+        "extra_top_cut": sum(len(report["extra_top_cut"]) for report in unified),
+        "results": [{key: value for key, value in report.items() if key != "messages"} for report in unified],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Unify placements with standings.")
     parser.add_argument("placements_file", nargs="?", help="Placements .txt file")
     parser.add_argument("--all", action="store_true", help="Process all *_placements.txt files in the current folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processes unifying files in parallel with --all (default: one per core)")
+    parser.add_argument("--report", default=REPORT_FILE,
+                        help=f"JSON report of the warnings of an --all run (default: {REPORT_FILE})")
+    parser.add_argument("--db", help="Also match placements through the player aliases of this database")
     args = parser.parse_args()
+    if args.db and not os.path.exists(args.db):
+        print(f"Database {args.db} not found.")
+        sys.exit(1)
 
     if args.all:
-        files = glob.glob("*_placements.txt")
+        files = sorted(glob.glob("*_placements.txt"))
         if not files:
             print("No *_placements.txt files found in the current folder.")
             sys.exit(1)
-        for placements_file in files:
-            base_id = placements_file.split("_")[0]
-            standings_file = find_standings_file(base_id)
-            if not standings_file:
+        results = []
+        for placements_file, report in unify_all(files, args.workers, args.db):
+            results.append((placements_file, report))
+            if report is None:
                 # print(f"Could not find standings file for base ID {base_id}")
                 continue
-            output_file = standings_file.replace(".csv", "_unified.csv")
-            print(f"\nProcessing {placements_file} with {standings_file}...")
-            unify_placements(placements_file, standings_file, output_file)
+            # Printed in file order, whatever order the workers finish in
+            print(f"\nProcessing {placements_file} with {report['standings_file']}...")
+            for message in report["messages"]:
+                print(message)
+        summary = write_report(args.report, results)
+        print(f"\nUnified {summary['unified']} of {summary['files']} files: {summary['unmatched']} unmatched placements, "
+              f"{summary['extra_top_cut']} extra top cut players, {len(summary['errors'])} errors. "
+              f"Report written to {args.report}")
+        if summary["errors"]:
+            sys.exit(1)
     else:
         if not args.placements_file:
             print("Usage: python unify_placements.py <placements.txt> [--all]")
@@ -138,4 +285,5 @@ if __name__ == "__main__":
             # print(f"Could not find standings file for base ID {base_id}")
             sys.exit(1)
         output_file = standings_file.replace(".csv", "_unified.csv")
-        unify_placements(placements_file, standings_file, output_file)
+        unify_placements(placements_file, standings_file, output_file,
+                         identity=load_identity(args.db) if args.db else None)